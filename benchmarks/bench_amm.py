@@ -0,0 +1,103 @@
+"""Swap router throughput over a synthetic pool graph.
+
+Builds T tokens connected by P random constant-product pools and measures
+quotes per second for:
+
+- uncached: every quote a new amount, so every candidate route is priced
+- cached: repeated amounts served from the quote cache
+- batch: quote_many() over B amounts per call
+- after reserve change: cached amounts re-priced after one pool moves
+
+    python benchmarks/bench_amm.py --tokens 20 --pools 60 --quotes 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.amm import EXACT_IN, EXACT_OUT, SwapRouter  # noqa: E402
+
+
+class BenchPool:
+    def __init__(self, token_a, token_b, reserve_a, reserve_b):
+        self.token_a = token_a
+        self.token_b = token_b
+        self.reserve_a = Decimal(reserve_a)
+        self.reserve_b = Decimal(reserve_b)
+        self.fee_rate = Decimal("0.003")
+
+
+class BenchTokenomics:
+    def __init__(self, tokens, pools, rng):
+        self.liquidity_pools = {}
+        names = [f"T{i}" for i in range(tokens)]
+        # A spanning chain keeps every pair routable; the rest are random
+        pairs = list(zip(names, names[1:]))
+        while len(pairs) < pools:
+            pair = tuple(rng.sample(names, 2))
+            if pair not in pairs and pair[::-1] not in pairs:
+                pairs.append(pair)
+        for token_a, token_b in pairs:
+            self.liquidity_pools[f"{token_a}-{token_b}"] = BenchPool(
+                token_a, token_b, rng.randint(10 ** 5, 10 ** 8), rng.randint(10 ** 5, 10 ** 8)
+            )
+        self.tokens = names
+
+
+def measure(label, count, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:>22} {count / elapsed:>12,.0f} quotes/s {elapsed * 1e6 / count:>9.1f} us/quote")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--pools', type=int, default=60)
+    parser.add_argument('--max-hops', type=int, default=3)
+    parser.add_argument('--quotes', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tokenomics = BenchTokenomics(args.tokens, args.pools, rng)
+    router = SwapRouter(tokenomics, max_hops=args.max_hops, cache_size=args.quotes * 2)
+    pairs = [tuple(rng.sample(tokenomics.tokens, 2)) for _ in range(50)]
+    requests = [(pairs[i % len(pairs)], Decimal(rng.randint(1, 10 ** 4))) for i in range(args.quotes)]
+
+    started = time.perf_counter()
+    for token_in, token_out in pairs:
+        router.paths(token_in, token_out)
+    routes = sum(len(router.paths(*pair)) for pair in pairs) / len(pairs)
+    print(f"{args.tokens} tokens, {args.pools} pools, {routes:.0f} candidate routes per pair "
+          f"(route tables built in {(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def run_quotes(side=EXACT_IN):
+        for (token_in, token_out), amount in requests:
+            router.quote(token_in, token_out, amount, side=side)
+
+    def run_batches():
+        amounts = [amount for _, amount in requests[:args.batch]]
+        for i in range(args.quotes // args.batch):
+            token_in, token_out = pairs[i % len(pairs)]
+            router.quote_many(token_in, token_out, [a + i for a in amounts])
+
+    measure('uncached exact-in', args.quotes, run_quotes)
+    measure('cached exact-in', args.quotes, run_quotes)
+    measure('uncached exact-out', args.quotes, lambda: run_quotes(EXACT_OUT))
+    measure(f'batch of {args.batch}', args.quotes // args.batch * args.batch, run_batches)
+
+    pool = next(iter(tokenomics.liquidity_pools.values()))
+    pool.reserve_a += 1
+    measure('after reserve change', args.quotes, run_quotes)
+    print(f"cache: {router.stats()}")
+
+
+if __name__ == '__main__':
+    main()
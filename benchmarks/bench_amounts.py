@@ -0,0 +1,111 @@
+"""Decimal against 18-decimal wei integers for ledger math.
+
+Runs the same work both ways: netting a batch of transfers against
+balances (as check_transfer_balances does), fee estimation (as the
+estimate_fee route does) and accruing per-position rewards. Decimal runs
+use the default context; the wei runs use src.services.amounts.
+
+    python benchmarks/bench_amounts.py --count 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.amounts import WEI, format_wei, parse_amount  # noqa: E402
+
+
+def timed(work, *args):
+    started = time.perf_counter()
+    result = work(*args)
+    return result, time.perf_counter() - started
+
+
+def net(balances, transfers):
+    available = dict(balances)
+    for from_address, to_address, amount in transfers:
+        if available[from_address] >= amount:
+            available[from_address] -= amount
+            available[to_address] += amount
+    return available
+
+
+def fees_decimal(amounts, base_fee):
+    large = Decimal("10000")
+    rate = Decimal("0.0001")
+    multiplier = Decimal("1.5")
+    total = Decimal(0)
+    for amount in amounts:
+        fee = base_fee * multiplier
+        if amount > large:
+            fee += amount * rate
+        total += fee
+    return total
+
+
+def fees_wei(amounts, base_fee):
+    large = 10000 * WEI
+    total = 0
+    for amount in amounts:
+        fee = base_fee * 3 // 2
+        if amount > large:
+            fee += amount // 10000
+        total += fee
+    return total
+
+
+def rewards_decimal(stakes, rate, elapsed):
+    year = Decimal(365 * 86400)
+    return [stake * rate * elapsed / year for stake in stakes]
+
+
+def rewards_wei(stakes, rate, elapsed):
+    year = 365 * 86400 * WEI
+    return [stake * rate * elapsed // year for stake in stakes]
+
+
+def report(label, decimal_seconds, wei_seconds, count):
+    print(f"{label:>10} Decimal {count / decimal_seconds:>12,.0f}/s  wei {count / wei_seconds:>12,.0f}/s  "
+          f"({decimal_seconds / wei_seconds:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    raw = [f"{rng.randrange(1, 50000)}.{rng.randrange(10 ** 6):06d}" for _ in range(args.count)]
+    decimal_amounts = [Decimal(text) for text in raw]
+    wei_amounts = [parse_amount(text) for text in raw]
+    addresses = [f"NX{i:038d}" for i in range(args.accounts)]
+    pairs = [(rng.choice(addresses), rng.choice(addresses)) for _ in range(args.count)]
+    print(f"{args.count} amounts, {args.accounts} accounts")
+
+    # The netting loop is the same code; only the amount type differs
+    decimal_result, decimal_seconds = timed(
+        net, {a: Decimal("1000000") for a in addresses}, [(f, t, a) for (f, t), a in zip(pairs, decimal_amounts)]
+    )
+    wei_result, wei_seconds = timed(
+        net, {a: 1000000 * WEI for a in addresses}, [(f, t, a) for (f, t), a in zip(pairs, wei_amounts)]
+    )
+    assert all(format_wei(wei_result[a]) == f"{decimal_result[a].normalize():f}" for a in addresses)
+    report('transfers', decimal_seconds, wei_seconds, args.count)
+
+    decimal_total, decimal_seconds = timed(fees_decimal, decimal_amounts, Decimal("0.001"))
+    wei_total, wei_seconds = timed(fees_wei, wei_amounts, parse_amount("0.001"))
+    assert format_wei(wei_total) == f"{decimal_total.normalize():f}"
+    report('fees', decimal_seconds, wei_seconds, args.count)
+
+    _, decimal_seconds = timed(rewards_decimal, decimal_amounts, Decimal("0.12"), Decimal(86400))
+    _, wei_seconds = timed(rewards_wei, wei_amounts, parse_amount("0.12"), 86400)
+    report('rewards', decimal_seconds, wei_seconds, args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,588 @@
+"""Per-route latency and throughput for every API blueprint.
+
+Seeds a NeuraXBlockchain and NeuraXTokenomics with --blocks, --transactions,
+--accounts and --proposals (plus stakes and AI validations) from --seed,
+snapshots the state into a scratch data directory, then drives the routes
+of blockchain_bp, wallet_bp, tokenomics_bp and user_bp:
+
+- client: in-process through Flask's test client, one request at a time
+- gunicorn: over HTTP against a local gunicorn started on that snapshot,
+  with --concurrency client threads (workers > 1 run behind the state
+  service, as in production)
+
+Each route gets --warmup untimed requests and then --requests timed ones,
+with parameters drawn from a per-route random stream, so two runs with the
+same arguments send the same requests. Reports p50/p95/p99 latency and
+requests per second per route; --save writes them as a JSON baseline and
+--compare checks a run against one, exiting non-zero on regressions.
+Latencies only compare between runs on one machine, so baselines are not
+committed; benchmarks/check_api.sh records one on the host it runs on and
+compares later runs against it::
+
+    python benchmarks/bench_api.py --save benchmarks/baseline.local.json
+    python benchmarks/bench_api.py --compare benchmarks/baseline.local.json
+"""
+import argparse
+import hashlib
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.services.amounts import WEI, from_wei  # noqa: E402
+from src.services.signing import engine_transaction_kwargs, sign_transaction  # noqa: E402
+
+SEED_BALANCE = 1000000 * WEI
+BENCH_USERS = 20
+# Arguments that change what is measured; a baseline only compares with
+# runs that match it on these
+WORKLOAD_ARGS = ('blocks', 'transactions', 'accounts', 'proposals', 'seed', 'requests', 'warmup',
+                 'concurrency', 'gunicorn_workers', 'gunicorn_threads')
+# The same for the machine the baseline was recorded on
+HOST_META = ('python', 'platform', 'cpus')
+
+
+def host_meta():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+# Seeding
+
+def signed_payload(from_address, to_address, amount):
+    payload = {"from_address": from_address, "to_address": to_address, "amount": amount, "data": {}}
+    payload["signature"] = sign_transaction("bench", payload)
+    return payload
+
+
+def seed_state(data_dir, args):
+    """Build the benchmark state in ``data_dir``; returns request fixtures"""
+    from core.blockchain import NeuraXBlockchain
+    from tokenomics.smart_contracts import NeuraXTokenomics, TransactionType
+
+    from src.services.governance import GovernanceEngine
+    from src.services.storage import StateManager
+
+    rng = random.Random(f"{args.seed}:seed")
+    state = StateManager(
+        NeuraXBlockchain,
+        NeuraXTokenomics,
+        data_dir=data_dir,
+        fsync=False,
+        governance_factory=GovernanceEngine
+    )
+    tokenomics = state.tokenomics
+
+    addresses = [
+        "NX" + hashlib.sha256(f"{args.seed}:account:{i}".encode()).hexdigest()[:38]
+        for i in range(args.accounts)
+    ]
+    # Accounts and starting balances in one journaled genesis command
+    state.execute('genesis', 'allocate', {address: from_wei(SEED_BALANCE) for address in addresses})
+
+    # Each transfer lands in the ledger and on the chain; chain transactions
+    # go in --blocks batches and the engine mines as it normally would
+    transfers = []
+    for _ in range(args.transactions):
+        from_address, to_address = rng.sample(addresses, 2)
+        transfers.append((from_address, to_address, from_wei(rng.randrange(1, 1000) * WEI // 1000)))
+    state.execute_batch([
+        ('tokenomics', 'create_transaction', (TransactionType.TRANSFER, f, t, amount), {})
+        for f, t, amount in transfers
+    ])
+    per_block = max(1, -(-len(transfers) // max(1, args.blocks)))
+    for start in range(0, len(transfers), per_block):
+        state.execute_batch([
+            ('blockchain', 'create_transaction', (), engine_transaction_kwargs(signed_payload(f, t, amount)))
+            for f, t, amount in transfers[start:start + per_block]
+        ])
+
+    stakers = addresses[:max(1, args.accounts // 10)]
+    state.execute_batch([
+        ('tokenomics', 'create_transaction',
+         (TransactionType.STAKE, address, address, tokenomics.config.min_stake_amount,
+          {"lock_period": rng.choice((0, 30, 180, 365)) * 86400}), {})
+        for address in stakers
+    ])
+
+    ledger_ids = list(tokenomics.transactions)
+    validators = addresses[-max(1, args.accounts // 20):]
+    state.execute_batch([
+        ('tokenomics', 'create_transaction',
+         (TransactionType.AI_VALIDATION, address, address, from_wei(0), {
+             "validated_tx_id": rng.choice(ledger_ids) if ledger_ids else None,
+             "validation_result": {"is_valid": True, "accuracy": round(rng.random(), 3)}
+         }), {})
+        for address in validators for _ in range(3)
+    ])
+
+    for i in range(args.proposals):
+        proposal_id = state.execute(
+            'governance',
+            'create_proposal',
+            proposer=rng.choice(addresses),
+            title=f"Benchmark proposal {i}",
+            description="Seeded by benchmarks/bench_api.py",
+            proposal_data={}
+        )
+        if proposal_id:
+            for voter in rng.sample(addresses, min(5, len(addresses))):
+                state.execute(
+                    'governance',
+                    'vote',
+                    voter=voter,
+                    proposal_id=proposal_id,
+                    vote_choice=rng.choice(('for', 'against'))
+                )
+
+    blocks = state.blockchain.blocks
+    fixtures = {
+        "addresses": addresses,
+        "stakers": stakers,
+        "validators": validators,
+        "block_hashes": [block.hash for block in blocks],
+        "chain_tx_hashes": [tx.hash for block in blocks for tx in block.transactions],
+        "proposal_ids": sorted(tokenomics.governance_contract.proposals),
+        "pools": [(pool.token_a, pool.token_b) for _, pool in sorted(tokenomics.liquidity_pools.items())],
+        "user_ids": [],
+        "created_users": []
+    }
+    print(f"seeded {len(blocks)} blocks, {len(fixtures['chain_tx_hashes'])} chain transactions, "
+          f"{len(tokenomics.transactions)} ledger transactions, {len(addresses)} accounts, "
+          f"{len(fixtures['proposal_ids'])} proposals")
+    state.snapshot()
+    state.close()
+    return fixtures
+
+
+# Routes: (name, method, build) where build(fixtures, rng) returns
+# (path, json_body); an optional fourth item is called with the response
+
+def _transfer(fx, rng):
+    from_address, to_address = rng.sample(fx["addresses"], 2)
+    return {"from_address": from_address, "to_address": to_address, "amount": "0.001", "private_key": "bench"}
+
+
+def _created_user(fx, status, body):
+    if status == 201 and isinstance(body, dict):
+        fx["created_users"].append(body["id"])
+
+
+def _pool_query(fx, rng):
+    token_in, token_out = rng.choice(fx["pools"])
+    return f"token_in={token_in}&token_out={token_out}&amount_in={rng.randrange(1, 1000)}"
+
+
+ROUTES = [
+    # blockchain_bp
+    ('blockchain.info', 'GET', lambda fx, rng: ('/api/blockchain/info', None)),
+    ('blockchain.blocks', 'GET', lambda fx, rng: (f'/api/blockchain/blocks?page={rng.randrange(1, 6)}&limit=20', None)),
+    ('blockchain.block', 'GET', lambda fx, rng: (f'/api/blockchain/block/{rng.choice(fx["block_hashes"])}', None)),
+    ('blockchain.transaction', 'GET',
+     lambda fx, rng: (f'/api/blockchain/transaction/{rng.choice(fx["chain_tx_hashes"])}', None)),
+    ('blockchain.proof', 'GET', lambda fx, rng: (f'/api/blockchain/proof/{rng.choice(fx["chain_tx_hashes"])}', None)),
+    ('blockchain.transactions', 'GET', lambda fx, rng: ('/api/blockchain/transactions?limit=50', None)),
+    ('blockchain.transactions_by_address', 'GET',
+     lambda fx, rng: (f'/api/blockchain/transactions?limit=50&address={rng.choice(fx["addresses"])}', None)),
+    ('blockchain.mempool', 'GET', lambda fx, rng: ('/api/blockchain/mempool', None)),
+    ('blockchain.validate_address', 'POST',
+     lambda fx, rng: ('/api/blockchain/validate_address', {"address": rng.choice(fx["addresses"])})),
+    ('blockchain.network_stats', 'GET', lambda fx, rng: ('/api/blockchain/network_stats', None)),
+    ('blockchain.ai_validation_stats', 'GET', lambda fx, rng: ('/api/blockchain/ai_validation_stats', None)),
+    ('blockchain.submit_transaction', 'POST',
+     lambda fx, rng: ('/api/blockchain/submit_transaction', dict(_transfer(fx, rng), fee="0.001"))),
+    # wallet_bp
+    ('wallet.balance', 'GET', lambda fx, rng: (f'/api/wallet/balance/{rng.choice(fx["addresses"])}', None)),
+    ('wallet.info', 'GET', lambda fx, rng: (f'/api/wallet/info/{rng.choice(fx["addresses"])}', None)),
+    ('wallet.staking_positions', 'GET',
+     lambda fx, rng: (f'/api/wallet/staking_positions/{rng.choice(fx["stakers"])}', None)),
+    ('wallet.transaction_history', 'GET',
+     lambda fx, rng: (f'/api/wallet/transaction_history/{rng.choice(fx["addresses"])}?limit=20', None)),
+    ('wallet.estimate_fee', 'POST',
+     lambda fx, rng: ('/api/wallet/estimate_fee', {"type": rng.choice(('transfer', 'stake', 'governance')),
+                                                   "amount": str(rng.randrange(1, 50000))})),
+    ('wallet.transfer', 'POST', lambda fx, rng: ('/api/wallet/transfer', _transfer(fx, rng))),
+    ('wallet.transfer_batch', 'POST',
+     lambda fx, rng: ('/api/wallet/transfer_batch', {"transfers": [_transfer(fx, rng) for _ in range(10)]})),
+    ('wallet.create', 'POST', lambda fx, rng: ('/api/wallet/create', {})),
+    # tokenomics_bp
+    ('tokenomics.stats', 'GET', lambda fx, rng: ('/api/tokenomics/stats', None)),
+    ('tokenomics.token_info', 'GET', lambda fx, rng: ('/api/tokenomics/token_info', None)),
+    ('tokenomics.staking_info', 'GET', lambda fx, rng: ('/api/tokenomics/staking_info', None)),
+    ('tokenomics.governance_info', 'GET', lambda fx, rng: ('/api/tokenomics/governance_info', None)),
+    ('tokenomics.proposals', 'GET', lambda fx, rng: (f'/api/tokenomics/proposals?page={rng.randrange(1, 4)}', None)),
+    ('tokenomics.voting_power', 'GET',
+     lambda fx, rng: (f'/api/tokenomics/voting_power/{rng.choice(fx["proposal_ids"])}/{rng.choice(fx["addresses"])}',
+                      None)),
+    ('tokenomics.vote', 'POST',
+     lambda fx, rng: ('/api/tokenomics/vote', {"voter": rng.choice(fx["addresses"]),
+                                               "proposal_id": rng.choice(fx["proposal_ids"]),
+                                               "vote_choice": rng.choice(('for', 'against'))})),
+    ('tokenomics.ai_rewards_info', 'GET', lambda fx, rng: ('/api/tokenomics/ai_rewards_info', None)),
+    ('tokenomics.validator_stats', 'GET',
+     lambda fx, rng: (f'/api/tokenomics/validator_stats/{rng.choice(fx["validators"])}', None)),
+    ('tokenomics.validator_leaderboard', 'GET',
+     lambda fx, rng: (f'/api/tokenomics/validator_leaderboard?page={rng.randrange(1, 3)}', None)),
+    ('tokenomics.liquidity_pools', 'GET', lambda fx, rng: ('/api/tokenomics/liquidity_pools', None)),
+    ('tokenomics.quote', 'GET', lambda fx, rng: (f'/api/tokenomics/quote?{_pool_query(fx, rng)}', None)),
+    ('tokenomics.quote_batch', 'POST',
+     lambda fx, rng: ('/api/tokenomics/quote_batch', dict(zip(('token_in', 'token_out'), rng.choice(fx["pools"])),
+                                                          amounts_in=[str(rng.randrange(1, 1000)) for _ in range(20)]))),
+    ('tokenomics.price_info', 'GET', lambda fx, rng: ('/api/tokenomics/price_info', None)),
+    ('tokenomics.distribution', 'GET', lambda fx, rng: ('/api/tokenomics/distribution', None)),
+    # user_bp; every user created here is deleted again by users.delete
+    ('users.list', 'GET', lambda fx, rng: ('/api/users', None)),
+    ('users.get', 'GET', lambda fx, rng: (f'/api/users/{rng.choice(fx["user_ids"])}', None)),
+    ('users.create', 'POST',
+     lambda fx, rng: ('/api/users', {"username": f"bench_{os.getpid()}_{rng.getrandbits(48):x}",
+                                     "email": f"bench_{os.getpid()}_{rng.getrandbits(48):x}@example.com"}),
+     _created_user),
+    ('users.update', 'PUT',
+     lambda fx, rng: (f'/api/users/{rng.choice(fx["user_ids"])}', {"email": f"bench_{os.getpid()}_{rng.getrandbits(48):x}@example.com"})),
+    ('users.delete', 'DELETE',
+     lambda fx, rng: (f'/api/users/{fx["created_users"].pop() if fx["created_users"] else 0}', None)),
+]
+
+
+# Drivers
+
+class ClientDriver:
+    """Requests through Flask's test client in this process"""
+
+    label = 'client'
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def run(self, requests, concurrency):
+        return [self._timed(*request) for request in requests]
+
+    def _timed(self, method, path, body):
+        started = time.perf_counter()
+        status, payload = self.request(method, path, body)
+        return time.perf_counter() - started, status, payload
+
+    def close(self):
+        # Settle the app's state now, while its data directory still exists
+        block_builder = self.app.config['NEURAX_BLOCK_BUILDER']
+        block_builder.stop()
+        if block_builder.pipeline is not None:
+            block_builder.pipeline.close()
+        self.app.config['NEURAX_STATE'].close()
+
+
+class HTTPDriver:
+    """Requests over HTTP with a keep-alive connection per client thread"""
+
+    label = 'gunicorn'
+
+    def __init__(self, host, port, processes=()):
+        self.host = host
+        self.port = port
+        self.processes = processes
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return connection
+
+    def request(self, method, path, body):
+        connection = self._connection()
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+    def run(self, requests, concurrency):
+        results = [None] * len(requests)
+        cursor = iter(range(len(requests)))
+        cursor_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with cursor_lock:
+                    i = next(cursor, None)
+                if i is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    status, payload = self.request(*requests[i])
+                except (OSError, http.client.HTTPException):
+                    status, payload = 0, None
+                results[i] = (time.perf_counter() - started, status, payload)
+
+        threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def close(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(data_dir, args):
+    """Start gunicorn (and the state service for several workers) on ``data_dir``"""
+    env = dict(os.environ, NEURAX_DATA_DIR=data_dir, NEURAX_WAL_FSYNC='0')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (ROOT, env.get('PYTHONPATH'))))
+    processes = []
+    if args.gunicorn_workers > 1:
+        env['NEURAX_STATE_SOCKET'] = os.path.join(data_dir, 'state.sock')
+        processes.append(subprocess.Popen([sys.executable, '-m', 'src.services.state_server'], cwd=ROOT, env=env))
+        deadline = time.time() + 60
+        while not os.path.exists(env['NEURAX_STATE_SOCKET']):
+            if processes[0].poll() is not None or time.time() > deadline:
+                raise RuntimeError("State service did not start")
+            time.sleep(0.1)
+
+    port = _free_port()
+    processes.append(subprocess.Popen([
+        sys.executable, '-m', 'gunicorn',
+        '-w', str(args.gunicorn_workers),
+        '--threads', str(args.gunicorn_threads),
+        '-b', f'127.0.0.1:{port}',
+        '--log-level', 'warning',
+        'src.main:app'
+    ], cwd=ROOT, env=env))
+    driver = HTTPDriver('127.0.0.1', port, processes)
+
+    deadline = time.time() + 60
+    while True:
+        if processes[-1].poll() is not None or time.time() > deadline:
+            driver.close()
+            raise RuntimeError("gunicorn did not start")
+        try:
+            if driver.request('GET', '/api/health', None)[0] == 200:
+                return driver
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+
+
+# Measurement
+
+def setup_users(driver, fixtures):
+    """Create the users the read and update routes use (untimed)"""
+    fixtures["user_ids"] = []
+    for i in range(BENCH_USERS):
+        status, body = driver.request('POST', '/api/users', {
+            "username": f"bench_{os.getpid()}_{driver.label}_{i}",
+            "email": f"bench_{os.getpid()}_{driver.label}_{i}@example.com"
+        })
+        if status == 201:
+            fixtures["user_ids"].append(body["id"])
+
+
+def teardown_users(driver, fixtures):
+    for user_id in fixtures["user_ids"] + fixtures["created_users"]:
+        driver.request('DELETE', f'/api/users/{user_id}', None)
+    fixtures["created_users"] = []
+
+
+def bench_routes(driver, fixtures, routes, args):
+    setup_users(driver, fixtures)
+    results = {}
+    try:
+        for route in routes:
+            name, method, build = route[:3]
+            on_response = route[3] if len(route) > 3 else None
+            rng = random.Random(f"{args.seed}:{name}")
+            requests = []
+            for _ in range(args.warmup + args.requests):
+                path, body = build(fixtures, rng)
+                requests.append((method, path, body))
+
+            outcomes = driver.run(requests[:args.warmup], args.concurrency)
+            started = time.perf_counter()
+            outcomes += driver.run(requests[args.warmup:], args.concurrency)
+            elapsed = time.perf_counter() - started
+            if on_response is not None:
+                for _, status, payload in outcomes:
+                    on_response(fixtures, status, payload)
+
+            timed = outcomes[args.warmup:]
+            latencies = sorted(latency for latency, _, _ in timed)
+            results[name] = {
+                "requests": len(timed),
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                "rps": round(len(timed) / elapsed, 1) if elapsed else 0.0,
+                "client_errors": sum(1 for _, status, _ in timed if 400 <= status < 500),
+                "server_errors": sum(1 for _, status, _ in timed if status >= 500 or status == 0)
+            }
+            report_route(driver.label, name, results[name])
+    finally:
+        teardown_users(driver, fixtures)
+    return results
+
+
+def report_route(label, name, result):
+    print(f"{label:>8} {name:<36} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+          f"p99 {result['p99_ms']:>8.2f} ms  {result['rps']:>9.1f} req/s  "
+          f"4xx {result['client_errors']:>4}  5xx {result['server_errors']:>4}")
+
+
+def compare(results, baseline, threshold, slack_ms):
+    """``(regressions, notes)`` against a baseline.
+
+    A route regressed when its p50 grew by more than ``threshold`` times
+    plus ``slack_ms``, or it returned more 5xx responses. Tail latency and
+    throughput move too much between runs on a shared machine to gate on,
+    so p95 growth beyond the same bound is only noted.
+    """
+    regressions = []
+    notes = []
+    for mode, routes in results.items():
+        for name, result in routes.items():
+            base = baseline.get(mode, {}).get(name)
+            if base is None:
+                continue
+            if result["p50_ms"] > base["p50_ms"] * threshold + slack_ms:
+                regressions.append(f"{mode} {name}: p50 {base['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+            if result["server_errors"] > base["server_errors"]:
+                regressions.append(f"{mode} {name}: 5xx {base['server_errors']} -> {result['server_errors']}")
+            if result["p95_ms"] > base["p95_ms"] * threshold + slack_ms:
+                notes.append(f"{mode} {name}: p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=200)
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--accounts', type=int, default=2000)
+    parser.add_argument('--proposals', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mode', default='client', help="comma-separated: client, gunicorn")
+    parser.add_argument('--routes', default='', help="regex selecting route names, e.g. 'wallet\\.|transactions'")
+    parser.add_argument('--requests', type=int, default=200, help="timed requests per route")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads in gunicorn mode")
+    parser.add_argument('--gunicorn-workers', type=int, default=1)
+    parser.add_argument('--gunicorn-threads', type=int, default=8)
+    parser.add_argument('--save', help="write results to this JSON baseline")
+    parser.add_argument('--compare', help="compare against this JSON baseline")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="allowed p50 slowdown factor before a route counts as regressed")
+    parser.add_argument('--slack-ms', type=float, default=0.25,
+                        help="absolute p50 growth allowed on top of --threshold")
+    args = parser.parse_args()
+
+    routes = [route for route in ROUTES if re.search(args.routes, route[0])]
+    modes = [mode.strip() for mode in args.mode.split(',') if mode.strip()]
+    scratch = tempfile.mkdtemp(prefix='neurax-bench-')
+    results = {}
+    try:
+        seed_dir = os.path.join(scratch, 'seed')
+        fixtures = seed_state(seed_dir, args)
+
+        for mode in modes:
+            # Every mode starts from its own copy of the seeded state
+            data_dir = os.path.join(scratch, mode)
+            shutil.copytree(seed_dir, data_dir)
+            if mode == 'client':
+                os.environ['NEURAX_DATA_DIR'] = data_dir
+                os.environ['NEURAX_WAL_FSYNC'] = '0'
+                from src.main import app
+                driver = ClientDriver(app)
+            elif mode == 'gunicorn':
+                if importlib.util.find_spec('gunicorn') is None:
+                    print("gunicorn is not installed; skipping gunicorn mode")
+                    continue
+                driver = start_gunicorn(data_dir, args)
+            else:
+                parser.error(f"Unknown mode: {mode}")
+            try:
+                results[mode] = bench_routes(driver, fixtures, routes, args)
+            finally:
+                driver.close()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                "meta": {
+                    "args": vars(args),
+                    **host_meta(),
+                    "created_at": time.time()
+                },
+                "results": results
+            }, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            saved = json.load(f)
+        saved_meta = saved.get("meta", {})
+        saved_args = saved_meta.get("args", {})
+        differing = [name for name in WORKLOAD_ARGS if name in saved_args and saved_args[name] != getattr(args, name)]
+        if differing:
+            print(f"warning: {args.compare} was recorded with different {', '.join(differing)}")
+        current = host_meta()
+        other_host = [name for name in HOST_META if saved_meta.get(name) != current[name]]
+        if other_host:
+            print(f"warning: {args.compare} was recorded on another host ({', '.join(other_host)} differ); "
+                  f"record a baseline on this one")
+        regressions, notes = compare(results, saved["results"], args.threshold, args.slack_ms)
+        for note in notes:
+            print(f"note {note}")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold}x + {args.slack_ms} ms against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
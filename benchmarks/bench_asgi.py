@@ -0,0 +1,200 @@
+"""Held subscriptions and request throughput, WSGI vs ASGI deployment.
+
+In-process mode (default) parks N long-poll subscribers on /api/events/poll
+and publishes one event, once through the WSGI app with a thread per
+connection (as a threaded WSGI server would) and once through src.asgi:app
+with a coroutine per connection. Reports the time to park all subscribers,
+threads and RSS used, and fan-out latency to the last subscriber.
+
+Server mode drives already running servers over HTTP: it opens N idle
+long-poll connections and then measures /api/health throughput while they
+are held, which is where a fixed pool of sync workers runs out. Several
+workers share state through the state service::
+
+    export NEURAX_STATE_SOCKET=/tmp/neurax.sock
+    python -m src.services.state_server &
+    gunicorn -w 4 -b :8000 src.main:app &
+    uvicorn --workers 4 --port 8001 src.asgi:app &
+    python benchmarks/bench_asgi.py --wsgi-url http://127.0.0.1:8000 \\
+        --asgi-url http://127.0.0.1:8001 --subscribers 2000
+
+    python benchmarks/bench_asgi.py --subscribers 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.events import format_event_id  # noqa: E402
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))] if values else 0.0
+
+
+def publish(bus):
+    bus.publish_many(bus.last_id[0] + 1, [('blocks', None, {"height": -1})])
+
+
+def report(label, park_seconds, threads, rss, latencies):
+    print(f"{label:>5} park {park_seconds * 1000:>8.1f} ms  threads {threads:>6}  "
+          f"rss +{rss / 1048576:>7.1f} MiB  fan-out p50 {percentile(latencies, 0.5) * 1000:>7.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms  max {max(latencies, default=0) * 1000:>7.1f} ms")
+
+
+def bench_wsgi_inprocess(flask_app, bus, subscribers):
+    client = flask_app.test_client()
+    since = format_event_id(bus.last_id)
+    received = []
+    lock = threading.Lock()
+
+    def subscriber():
+        # Stand in for a threaded server, which the route requires
+        client.get(f'/api/events/poll?topics=blocks&since={since}&timeout=30',
+                   environ_overrides={'wsgi.multithread': True})
+        with lock:
+            received.append(time.perf_counter())
+
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=subscriber, daemon=True) for _ in range(subscribers)]
+    for thread in threads:
+        thread.start()
+    # Give every thread time to reach its wait
+    while len(bus._condition._waiters) < subscribers and time.perf_counter() - started < 30:
+        time.sleep(0.01)
+    park_seconds = time.perf_counter() - started
+    thread_count = threading.active_count()
+    rss = rss_bytes() - rss_before
+
+    published = time.perf_counter()
+    publish(bus)
+    for thread in threads:
+        thread.join()
+    report('wsgi', park_seconds, thread_count, rss, [t - published for t in received])
+
+
+def bench_asgi_inprocess(asgi_app, bus, subscribers):
+    since = format_event_id(bus.last_id)
+    query = f'topics=blocks&since={since}&timeout=30'.encode()
+
+    async def subscriber():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            pass
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/events/poll', 'query_string': query,
+                 'headers': [], 'http_version': '1.1'}
+        await asgi_app(scope, receive, send)
+        return time.perf_counter()
+
+    async def run():
+        rss_before = rss_bytes()
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(subscriber()) for _ in range(subscribers)]
+        while sum(len(f) for f in bus._async_waiters.values()) < subscribers and time.perf_counter() - started < 30:
+            await asyncio.sleep(0.01)
+        park_seconds = time.perf_counter() - started
+        thread_count = threading.active_count()
+        rss = rss_bytes() - rss_before
+
+        published = time.perf_counter()
+        publish(bus)
+        received = await asyncio.gather(*tasks)
+        report('asgi', park_seconds, thread_count, rss, [t - published for t in received])
+
+    asyncio.run(run())
+
+
+async def _http_get(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        return await reader.read()
+    finally:
+        writer.close()
+
+
+async def bench_server(label, url, subscribers, concurrency, duration):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    held = [asyncio.ensure_future(_http_get(host, port, '/api/events/poll?topics=blocks&timeout=60'))
+            for _ in range(subscribers)]
+    await asyncio.sleep(1)
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(_http_get(host, port, '/api/health'), timeout=duration)
+                if not response.startswith(b'HTTP/1.1 200'):
+                    errors += 1
+            except (OSError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    for future in held:
+        future.cancel()
+    print(f"{label:>5} {subscribers} held  {len(latencies) / duration:>8.0f} req/s  "
+          f"p50 {percentile(latencies, 0.5) * 1000:>7.1f} ms  p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms  "
+          f"errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--wsgi-url')
+    parser.add_argument('--asgi-url')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    if args.wsgi_url or args.asgi_url:
+        for label, url in (('wsgi', args.wsgi_url), ('asgi', args.asgi_url)):
+            if url:
+                asyncio.run(bench_server(label, url, args.subscribers, args.concurrency, args.duration))
+        return
+
+    from src.asgi import app as asgi_app
+    from src.main import app as flask_app
+
+    bus = flask_app.config['NEURAX_EVENT_BUS']
+    print(f"{args.subscribers} idle long-poll subscribers, one published event")
+    # ASGI first so its RSS figure cannot reuse memory freed by the threads
+    bench_asgi_inprocess(asgi_app, bus, args.subscribers)
+    bench_wsgi_inprocess(flask_app, bus, args.subscribers)
+
+
+if __name__ == '__main__':
+    main()
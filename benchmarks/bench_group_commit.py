@@ -0,0 +1,96 @@
+"""Concurrent transfer throughput through StateManager by thread count.
+
+Commands are applied one at a time under the state's apply lock, so
+threads do not speed up the applies themselves. What they can share is
+the fsync: a command's log write is made durable after the lock is
+released, and one fsync covers every command appended before it (group
+commit). The benchmark runs with fsync off and on; the gap between the
+two columns is the cost of durability. How much extra threads recover of
+it depends on the disk's fsync latency; where fsync is cheap next to an
+apply, or there is one core, they recover little.
+
+    python benchmarks/bench_group_commit.py --transfers 4000 --threads 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from enum import Enum
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.storage import StateManager  # noqa: E402
+
+
+class TransactionType(Enum):
+    TRANSFER = "transfer"
+
+
+class BenchLedger:
+    """Minimal stand-in for NeuraXTokenomics with plain balance transfers"""
+
+    def __init__(self, accounts):
+        self.balances = {f"NX{i:038d}": Decimal("1000000") for i in range(accounts)}
+        self.transactions = {}
+
+    def create_transaction(self, tx_type, from_address, to_address, amount, data=None):
+        if self.balances[from_address] < amount:
+            return None
+        self.balances[from_address] -= amount
+        self.balances[to_address] += amount
+        tx_id = f"tx{len(self.transactions)}-{threading.get_ident()}"
+        self.transactions[tx_id] = (from_address, to_address, amount)
+        return tx_id
+
+
+def run(fsync, threads, transfers, accounts):
+    with tempfile.TemporaryDirectory() as data_dir:
+        state = StateManager(
+            lambda: None,
+            lambda: BenchLedger(accounts),
+            data_dir=data_dir,
+            snapshot_every=10 ** 9,
+            snapshot_interval=10 ** 9,
+            fsync=fsync
+        )
+        addresses = list(state.tokenomics.balances)
+        per_thread = transfers // threads
+
+        def worker(offset):
+            for i in range(per_thread):
+                # Each thread moves funds within its own pair of accounts
+                source = addresses[(2 * offset) % len(addresses)]
+                target = addresses[(2 * offset + 1) % len(addresses)]
+                state.execute('tokenomics', 'create_transaction', TransactionType.TRANSFER,
+                              source, target, Decimal("1"))
+
+        pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        state.close()
+        return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transfers', type=int, default=4000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'no fsync tx/s':>15} {'fsync tx/s':>12} {'durable/no fsync':>17}")
+    for threads in args.threads:
+        volatile = run(False, threads, args.transfers, args.accounts)
+        durable = run(True, threads, args.transfers, args.accounts)
+        print(f"{threads:>8} {volatile:>15.0f} {durable:>12.0f} {durable / volatile:>16.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Serialization cost of a large explorer payload, old path vs new provider.
+
+Renders a /block/<hash>-style response with N transactions through:
+
+- stdlib: Flask's DefaultJSONProvider, calling tx.to_dict() per request
+- provider: NeuraXJSONProvider (orjson when installed), same to_dict() calls
+- provider+cache: NeuraXJSONProvider embedding confirmed_objects' cached bytes
+
+    python benchmarks/bench_json.py --transactions 1000 --rounds 200
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from src.services.json_provider import NeuraXJSONProvider, SerializedObjectCache, orjson  # noqa: E402
+
+
+class BenchTransaction:
+    def __init__(self, i):
+        self.hash = hashlib.sha256(str(i).encode()).hexdigest()
+        self.from_address = f"NX{i:038d}"
+        self.to_address = f"NX{i + 1:038d}"
+        self.amount = Decimal(i) / Decimal(7)
+        self.fee = Decimal("0.001")
+        self.timestamp = 1700000000.0 + i
+
+    def to_dict(self):
+        return {
+            "hash": self.hash,
+            "from_address": self.from_address,
+            "to_address": self.to_address,
+            "amount": str(self.amount),
+            "fee": str(self.fee),
+            "timestamp": self.timestamp
+        }
+
+
+def render(app, transactions, to_list):
+    with app.app_context():
+        return app.json.response({
+            "height": 1,
+            "hash": "ab" * 32,
+            "transactions": to_list(transactions)
+        }).get_data()
+
+
+def to_dicts(transactions):
+    return [tx.to_dict() for tx in transactions]
+
+
+def measure(label, app, transactions, to_list, rounds):
+    render(app, transactions, to_list)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        size = len(render(app, transactions, to_list))
+    per_call = (time.perf_counter() - started) / rounds
+    print(f"{label:>16} {per_call * 1000:>9.3f} ms/response {size:>10} bytes")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    transactions = [BenchTransaction(i) for i in range(args.transactions)]
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    provider_app = Flask('provider')
+    provider_app.json = NeuraXJSONProvider(provider_app)
+    cache = SerializedObjectCache()
+
+    print(f"orjson: {'yes' if orjson else 'no'}, {args.transactions} transactions per response")
+    baseline = measure('stdlib', stdlib_app, transactions, to_dicts, args.rounds)
+    provider = measure('provider', provider_app, transactions, to_dicts, args.rounds)
+    cached = measure('provider+cache', provider_app, transactions, cache.encoded_list, args.rounds)
+    print(f"speedup: provider {baseline / provider:.1f}x, provider+cache {baseline / cached:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
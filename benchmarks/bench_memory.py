@@ -0,0 +1,151 @@
+"""Bytes per account and per transaction, plain objects vs compact storage.
+
+Builds N accounts, N ledger transactions and N block transactions shaped
+like the engine's (Decimal amounts, float scores and timestamps, hex ids),
+once as plain objects in a dict or list and once in the compact
+struct-of-arrays containers from src.services.compact, and reports the
+memory tracemalloc attributes to each.
+
+    python benchmarks/bench_memory.py --count 200000
+"""
+import argparse
+import copy
+import enum
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.compact import (  # noqa: E402
+    ACCOUNT_SCHEMA, BLOCK_TRANSACTION_SCHEMA, LEDGER_TRANSACTION_SCHEMA, CompactList, CompactMapping
+)
+
+
+class BenchType(enum.Enum):
+    TRANSFER = "transfer"
+    STAKE = "stake"
+
+
+class BenchAccount:
+    def __init__(self, address, i):
+        self.address = address
+        self.balance = Decimal(i % 100000) / 8
+        self.staked_amount = Decimal(0)
+        self.locked_amount = Decimal(0)
+        self.ai_score = 50.0
+        self.reputation_score = 50.0
+        self.last_activity = 1700000000.0 + i
+
+    def available_balance(self):
+        return self.balance - self.locked_amount
+
+
+class BenchLedgerTransaction:
+    def __init__(self, i, addresses):
+        self.tx_id = uuid.UUID(int=i * 7919 + 1).hex
+        self.tx_type = BenchType.TRANSFER if i % 4 else BenchType.STAKE
+        self.from_address = addresses[i % len(addresses)]
+        self.to_address = addresses[(i * 31) % len(addresses)]
+        self.amount = Decimal(i % 5000) / 4
+        self.data = {}
+        self.timestamp = 1700000000.0 + i
+
+    def to_dict(self):
+        return {
+            "tx_id": self.tx_id,
+            "type": self.tx_type.value,
+            "from_address": self.from_address,
+            "to_address": self.to_address,
+            "amount": str(self.amount),
+            "timestamp": self.timestamp
+        }
+
+
+class BenchBlockTransaction:
+    def __init__(self, i, addresses):
+        self.from_address = addresses[i % len(addresses)]
+        self.to_address = addresses[(i * 31) % len(addresses)]
+        self.amount = Decimal(i % 5000) / 4
+        self.data = {}
+        self.timestamp = 1700000000.0 + i
+        self.hash = hashlib.sha256(str(i).encode()).hexdigest()
+
+    def to_dict(self):
+        return {
+            "hash": self.hash,
+            "from_address": self.from_address,
+            "to_address": self.to_address,
+            "amount": str(self.amount),
+            "timestamp": self.timestamp,
+            "data": self.data
+        }
+
+
+def measure(build):
+    """Bytes held by what ``build`` returns, and the seconds it took"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    elapsed = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used, elapsed
+
+
+def report(label, count, plain, compact):
+    (_, plain_bytes, plain_seconds), (_, compact_bytes, compact_seconds) = plain, compact
+    print(f"{label:>18} {plain_bytes / count:>8.0f} B -> {compact_bytes / count:>6.0f} B each "
+          f"({plain_bytes / compact_bytes:.1f}x smaller)  build {plain_seconds:.2f}s -> {compact_seconds:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+    count = args.count
+
+    # Address strings are shared by every representation and not counted;
+    # transactions are spread over a tenth of the accounts
+    addresses = [f"NX{i:038d}" for i in range(count)]
+    active = addresses[:max(1, count // 10)]
+    accounts = [BenchAccount(address, i) for i, address in enumerate(addresses)]
+    ledger = [BenchLedgerTransaction(i, active) for i in range(count)]
+    block = [BenchBlockTransaction(i, active) for i in range(count)]
+    for obj in accounts + ledger + block:
+        # Materialize instance dicts up front so they are not counted below
+        vars(obj)
+    print(f"{count} accounts, ledger transactions and block transactions")
+
+    # Both sides build new objects so both pay for their records; the
+    # compact containers adopt copies so the originals stay plain
+    plain = measure(lambda: {a.address: BenchAccount(a.address, i) for i, a in enumerate(accounts)})
+    compact = measure(lambda: CompactMapping(ACCOUNT_SCHEMA, ((a.address, copy.copy(a)) for a in accounts)))
+    report('account', count, plain, compact)
+    assert compact[0][addresses[5]].available_balance() == accounts[5].available_balance()
+
+    plain = measure(lambda: {tx.tx_id: BenchLedgerTransaction(i, active) for i, tx in enumerate(ledger)})
+    compact = measure(lambda: CompactMapping(LEDGER_TRANSACTION_SCHEMA, ((tx.tx_id, copy.copy(tx)) for tx in ledger)))
+    report('ledger transaction', count, plain, compact)
+    assert compact[0][ledger[7].tx_id].to_dict() == ledger[7].to_dict()
+
+    plain = measure(lambda: [BenchBlockTransaction(i, active) for i in range(count)])
+    compact = measure(lambda: CompactList(BLOCK_TRANSACTION_SCHEMA, map(copy.copy, block)))
+    report('block transaction', count, plain, compact)
+    assert compact[0][9].to_dict() == block[9].to_dict()
+
+    started = time.perf_counter()
+    views = compact[0]
+    for i in range(0, count, max(1, count // 10000)):
+        views[i].to_dict()
+    reads = len(range(0, count, max(1, count // 10000)))
+    print(f"view to_dict(): {(time.perf_counter() - started) / reads * 1e6:.1f} us each")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Cost of per-request sampling against the sampling interval.
+
+Runs a CPU-bound request stand-in of about --request-ms milliseconds at a
+stack --depth frames deep, without a profiler and under a request capture
+at each interval, interleaved over --rounds rounds. Reports the median
+slowdown, the samples each request got, and the CPU share one sample per
+interval costs as measured in isolation.
+
+    python benchmarks/bench_profiler.py --intervals-ms 1,2,5,10 --rounds 25
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.profiler import Profile, SamplingProfiler, _Sampler  # noqa: E402
+
+
+def nested(depth, work):
+    if depth:
+        return nested(depth - 1, work)
+    return work()
+
+
+def sample_cost(depth):
+    """Seconds one sampler pass takes over a thread ``depth`` frames deep"""
+    ready = threading.Event()
+    done = threading.Event()
+
+    def park():
+        ready.set()
+        done.wait()
+
+    thread = threading.Thread(target=nested, args=(depth, park))
+    thread.start()
+    ready.wait()
+    try:
+        profile = Profile(0, 'cost')
+        sampler = _Sampler(profile, thread_ids={thread.ident}, thread_names=False, duration=0)
+        # A zero interval and duration runs exactly one pass per call
+        count = 2000
+        return min(timeit.repeat(sampler._run, number=count, repeat=5)) / count
+    finally:
+        done.set()
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--intervals-ms', default='1,2,5,10')
+    parser.add_argument('--request-ms', type=float, default=40)
+    parser.add_argument('--depth', type=int, default=45)
+    parser.add_argument('--rounds', type=int, default=25)
+    args = parser.parse_args()
+    intervals = [float(value) / 1000 for value in args.intervals_ms.split(',')]
+
+    # Calibrate the request stand-in to roughly --request-ms
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            sum(range(10000))
+        if time.perf_counter() - started >= args.request_ms / 1000 / 4:
+            break
+        loops *= 2
+    loops *= 4
+
+    def work():
+        for _ in range(loops):
+            sum(range(10000))
+
+    profiler = SamplingProfiler('bench', max_requests=1)
+    seconds = {interval: [] for interval in [None] + intervals}
+    samples = {interval: [] for interval in intervals}
+    for _ in range(args.rounds):
+        for interval in seconds:
+            sampler = None
+            if interval is not None:
+                profiler.request_interval = interval
+                sampler = profiler.start_request('bench')
+            started = time.perf_counter()
+            nested(args.depth, work)
+            seconds[interval].append(time.perf_counter() - started)
+            if sampler is not None:
+                samples[interval].append(profiler.get(profiler.finish_request(sampler)).samples)
+
+    cost = sample_cost(args.depth)
+    base = statistics.median(seconds[None])
+    print(f"request {base * 1000:.1f} ms, one sample {cost * 1e6:.1f} us at depth {args.depth}, "
+          f"switch interval {sys.getswitchinterval() * 1000:g} ms")
+    for interval in intervals:
+        slowdown = statistics.median(seconds[interval]) / base - 1
+        print(f"{interval * 1000:>6g} ms  slowdown {slowdown * 100:+5.1f}%  "
+              f"samples/request {statistics.median(samples[interval]):>4g}  "
+              f"sampling cost {cost / interval * 100:.2f}% of a core")
+
+
+if __name__ == '__main__':
+    main()
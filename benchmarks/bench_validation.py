@@ -0,0 +1,102 @@
+"""Validation pipeline throughput against worker count.
+
+Pushes N mempool entries through ValidationPipeline in blocks of B, with
+each verification recomputing the transaction hash and doing --work
+rounds of PBKDF2-SHA256 to stand in for signature verification. Reports
+verified transactions per second and speedup over one worker for each
+worker count, and checks that blocks were committed in submission order.
+
+    python benchmarks/bench_validation.py --transactions 20000 --work 2000 --workers 0,1,2,4,8,16,32
+"""
+import argparse
+import functools
+import hashlib
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.mempool import MempoolEntry, transaction_hash  # noqa: E402
+from src.services.signing import sign_transaction  # noqa: E402
+from src.services.validation import ValidationPipeline  # noqa: E402
+
+
+def costly_verify(work, sender, nonce, fee, payload, tx_hash):
+    if work:
+        hashlib.pbkdf2_hmac('sha256', tx_hash.encode(), sender.encode(), work)
+    if transaction_hash(sender, nonce, fee, payload) != tx_hash:
+        return "Transaction hash mismatch"
+    return None
+
+
+def make_entries(count):
+    entries = []
+    for i in range(count):
+        payload = {
+            "from_address": f"NXsender{i % 500}",
+            "to_address": f"NXrecipient{i % 97}",
+            "amount": Decimal(i % 1000 + 1),
+            "data": {}
+        }
+        payload["signature"] = sign_transaction("key", payload)
+        entry = MempoolEntry(payload["from_address"], i // 500, Decimal("0.001"), payload)
+        entry.tx_hash = transaction_hash(entry.sender, entry.nonce, entry.fee, entry.payload)
+        entries.append(entry)
+    return entries
+
+
+def run(entries, workers, work, block_size, max_pending, chunk_size):
+    pipeline = ValidationPipeline(
+        functools.partial(costly_verify, work),
+        workers=workers,
+        max_pending=max_pending,
+        chunk_size=chunk_size
+    )
+    pipeline.start()
+    committed = []
+
+    def on_done(items, results):
+        committed.append(items[0][4])
+
+    started = time.perf_counter()
+    blocks = []
+    for i in range(0, len(entries), block_size):
+        block = entries[i:i + block_size]
+        blocks.append(block[0].tx_hash)
+        pipeline.submit([entry.verification_args() for entry in block], on_done)
+    pipeline.close()
+    elapsed = time.perf_counter() - started
+    return elapsed, committed == blocks, pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=20000)
+    parser.add_argument('--work', type=int, default=2000, help="PBKDF2 rounds per verification")
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({0, 1, 2, 4, os.cpu_count() or 1})))
+    parser.add_argument('--block-size', type=int, default=1000)
+    parser.add_argument('--max-pending', type=int, default=10000)
+    parser.add_argument('--chunk-size', type=int, default=256)
+    args = parser.parse_args()
+
+    entries = make_entries(args.transactions)
+    print(f"{args.transactions} transactions, {args.work} PBKDF2 rounds each, "
+          f"blocks of {args.block_size}, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(',')):
+        elapsed, in_order, stats = run(
+            entries, workers, args.work, args.block_size, args.max_pending, args.chunk_size
+        )
+        rate = args.transactions / elapsed
+        if workers == 1:
+            baseline = rate
+        speedup = f"{rate / baseline:>5.2f}x" if baseline else "    -"
+        print(f"workers {workers:>3} {rate:>10,.0f} tx/s  speedup {speedup}  "
+              f"in order {in_order}  backpressure waits {stats['backpressure_waits']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Fail when an API route regressed against a baseline recorded on this
+# host. Latencies only compare between runs on the same machine, so the
+# baseline is local and not committed: the first run records it, later
+# runs compare against it. Run from the repository root (extra arguments
+# are passed to bench_api.py, e.g. --mode client,gunicorn or
+# --threshold 1.5, and must match between recording and comparing):
+#
+#     benchmarks/check_api.sh
+#
+# NEURAX_API_BASELINE picks another file, e.g. one a CI runner keeps in
+# its cache. After an intended performance change, delete the baseline
+# and run again to record a new one.
+set -e
+cd "$(dirname "$0")/.."
+baseline="${NEURAX_API_BASELINE:-benchmarks/baseline.local.json}"
+if [ ! -f "$baseline" ]; then
+    echo "no baseline at $baseline; recording one on this host"
+    exec "${PYTHON:-python}" benchmarks/bench_api.py --save "$baseline" "$@"
+fi
+exec "${PYTHON:-python}" benchmarks/bench_api.py --compare "$baseline" "$@"
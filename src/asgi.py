@@ -0,0 +1,216 @@
+"""ASGI entry point for the NeuraX API.
+
+Serves the same Flask app as ``src.main:app`` under an ASGI server, for
+deployments that hold many long-lived connections::
+
+    uvicorn src.asgi:app
+
+Every worker process owns a copy of the state unless NEURAX_STATE_SOCKET
+points it at the shared state service, so more than one worker needs the
+service running (see ``src.services.state_server``)::
+
+    NEURAX_STATE_SOCKET=/tmp/neurax.sock python -m src.services.state_server &
+    NEURAX_STATE_SOCKET=/tmp/neurax.sock uvicorn src.asgi:app --workers 4
+
+Without it a second worker either fails to start, because the first holds
+the lock on NEURAX_DATA_DIR, or serves an in-memory state of its own.
+
+The event endpoints (``/api/events/poll`` and ``/api/events/stream``) are
+handled natively on the event loop, so an idle subscription is a parked
+future instead of a blocked worker thread; they still run inside a Flask
+request context with the app's request hooks (CORS, metrics, profiler).
+Every other request is run as a WSGI call on a bounded thread pool
+(``NEURAX_ASGI_THREADS``); the routes, blueprints and state access are
+exactly those of the WSGI deployment.
+"""
+import asyncio
+import contextvars
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qs
+
+from src.main import app as flask_app
+from src.routes.events import KEEPALIVE_INTERVAL, MAX_WAIT
+from src.services.events import event_dict, format_event_id, format_sse, parse_event_id, parse_timeout, parse_topics
+from src.services.wsgi import build_environ, run_wsgi
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _asgi_headers(response):
+    return [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.items()]
+
+
+class NeuraXASGI:
+    """ASGI application wrapping the Flask WSGI app.
+
+    Requests are executed on ``executor`` threads, so view code keeps its
+    blocking semantics and the event loop only does I/O.
+    """
+
+    def __init__(self, wsgi_app, threads=32):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='neurax-asgi')
+        self.native_routes = {
+            '/api/events/poll': self._poll_events,
+            '/api/events/stream': self._stream_events
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            handler = self.native_routes.get(scope['path'])
+            if handler is not None and scope['method'] == 'GET':
+                await self._call_native(handler, scope, receive, send)
+            else:
+                await self._call_wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _call_wsgi(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            await loop.run_in_executor(self.executor, run_wsgi, self.wsgi_app, build_environ(scope, body), send_from_thread)
+
+    async def _call_native(self, handler, scope, receive, send):
+        # The request context lives in context variables, so the hooks see
+        # the same request whichever pool thread they land on
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        def run(func, *args):
+            return loop.run_in_executor(self.executor, context.run, func, *args)
+
+        environ = build_environ(scope, io.BytesIO())
+        request_context, rv = await run(self._enter, environ)
+        error = None
+        try:
+            if rv is None:
+                rv, stream = await handler(scope, receive)
+            else:
+                stream = None
+        except Exception as e:
+            error = e
+            rv, stream = self._json(500, {"error": str(e)}), None
+        response = await run(self._exit, request_context, rv, error)
+
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': _asgi_headers(response)})
+        if stream is None:
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+        else:
+            await stream(send)
+
+    def _enter(self, environ):
+        """Push a request context and run the ``before_request`` hooks.
+
+        Returns the context and the value a hook ended the request with.
+        """
+        request_context = self.wsgi_app.request_context(environ)
+        request_context.push()
+        try:
+            return request_context, self.wsgi_app.preprocess_request()
+        except BaseException as e:
+            request_context.pop(e)
+            raise
+
+    def _exit(self, request_context, rv, error):
+        """Run the ``after_request`` hooks on ``rv`` and pop the context"""
+        try:
+            return self.wsgi_app.finalize_request(rv)
+        finally:
+            request_context.pop(error)
+
+    def _json(self, status, payload):
+        body = flask_app.json.dumps(payload, separators=(',', ':')) + '\n'
+        return flask_app.response_class(body, status=status, mimetype='application/json')
+
+    def _subscription(self, scope):
+        args = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        bus = flask_app.config['NEURAX_EVENT_BUS']
+        subscriptions = parse_topics(args.get('topics', ['blocks'])[0])
+        since = args.get('since', [_header(scope, b'last-event-id')])[0]
+        since = bus.last_id if since is None else parse_event_id(since)
+        return args, bus, subscriptions, since
+
+    async def _poll_events(self, scope, receive):
+        try:
+            args, bus, subscriptions, since = self._subscription(scope)
+            timeout = parse_timeout(args.get('timeout', [30])[0], MAX_WAIT)
+        except ValueError as e:
+            return self._json(400, {"error": str(e)}), None
+
+        events, last_id, missed = await bus.wait_async(since, subscriptions, timeout)
+        return self._json(200, {
+            "events": [event_dict(event) for event in events],
+            "last_id": format_event_id(last_id),
+            "missed": missed
+        }), None
+
+    async def _stream_events(self, scope, receive):
+        try:
+            _, bus, subscriptions, since = self._subscription(scope)
+        except ValueError as e:
+            return self._json(400, {"error": str(e)}), None
+        dumps = flask_app.json.dumps
+
+        async def stream(send):
+            await send({'type': 'http.response.body', 'body': f"retry: 3000\nid: {format_event_id(since)}\n\n".encode(), 'more_body': True})
+            # The stream ends when the client goes away; watch for that
+            # while waiting on the bus
+            disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+            position = since
+            try:
+                while True:
+                    waiter = asyncio.ensure_future(bus.wait_async(position, subscriptions, KEEPALIVE_INTERVAL))
+                    await asyncio.wait((waiter, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                    if disconnected.done():
+                        waiter.cancel()
+                        return
+                    events, last_id, missed = waiter.result()
+                    await send({'type': 'http.response.body', 'body': format_sse(events, last_id, missed, dumps).encode(), 'more_body': True})
+                    position = last_id
+            finally:
+                disconnected.cancel()
+
+        # Headers go through the after_request hooks like any streamed
+        # Flask response; the body is then written from the event loop
+        response = flask_app.response_class(iter(()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response, stream
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+app = NeuraXASGI(flask_app, threads=int(os.environ.get('NEURAX_ASGI_THREADS', 32)))
@@ -1,34 +1,201 @@
 import os
-from flask import Flask, send_from_directory, jsonify
+import atexit
+import hmac
+from flask import Flask, Response, request, send_from_directory, jsonify
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.blockchain import blockchain_bp
 from src.routes.wallet import wallet_bp
 from src.routes.tokenomics import tokenomics_bp
+from src.routes.events import events_bp
+from src.routes.admin import admin_bp
 from core.blockchain import NeuraXBlockchain
 from tokenomics.smart_contracts import NeuraXTokenomics
+from src.services.storage import StateManager
+from src.services.state_server import StateClient, RemoteMempool, RemoteBlockBuilder
+from src.services.ledger_index import AddressTransactionIndex
+from src.services.chain_index import ChainIndex
+from src.services.chain_stats import ValidationStats
+from src.services.mempool import DEFAULT_FEE_COLLECTOR, Mempool, BlockBuilder
+from src.services.validation import ValidationPipeline, resolve_verifier
+from src.services.merkle import MerkleTreeCache
+from src.services.response_cache import response_cache
+from src.services.json_provider import NeuraXJSONProvider
+from src.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
+from src.services.profiler import SamplingProfiler
+from src.services.events import EventBus, EventPump
+from src.services.amm import SwapRouter
+from src.services.staking_rewards import StakingRewards
+from src.services.governance import GovernanceEngine
+from src.services.validator_leaderboard import ValidatorLeaderboard
 
 # Initialize Flask app
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'neurax_blockchain_production_key_2026'
+app.json = NeuraXJSONProvider(app)
+
+# Per-route latency, size and status metrics, served on /api/metrics;
+# registered first so the other request hooks are included in the timing
+metrics.init_app(app)
+
+# Sampling profiler, only when NEURAX_PROFILER_TOKEN is set: captures are
+# started in the background with POST /api/admin/profile and fetched from
+# /api/admin/profiles/<id>, or taken per request with the X-NeuraX-Profile
+# header, both authorized by that token in X-NeuraX-Admin-Token
+profiler_token = os.environ.get('NEURAX_PROFILER_TOKEN')
+if profiler_token:
+    neurax_profiler = SamplingProfiler(
+        profiler_token,
+        interval=float(os.environ.get('NEURAX_PROFILER_INTERVAL_MS', 10)) / 1000,
+        max_seconds=float(os.environ.get('NEURAX_PROFILER_MAX_SECONDS', 60))
+    )
+    neurax_profiler.init_app(app)
+    app.config['NEURAX_PROFILER'] = neurax_profiler
 
 # Enable CORS
 CORS(app, origins="*")
 
-# Initialize NeuraX blockchain and tokenomics
-neurax_blockchain = NeuraXBlockchain()
-neurax_tokenomics = NeuraXTokenomics()
+# Initialize NeuraX blockchain and tokenomics. With NEURAX_STATE_SOCKET set
+# this worker talks to the shared state service (src/services/state_server.py);
+# otherwise it owns the state, recovering it from NEURAX_DATA_DIR (snapshot
+# plus write-ahead log tail) when that is set. NEURAX_COMPACT_STATE=1 keeps
+# accounts and transactions in columnar storage (src/services/compact.py)
+state_socket = os.environ.get('NEURAX_STATE_SOCKET')
+if state_socket:
+    neurax_state = StateClient(state_socket)
+else:
+    neurax_state = StateManager(
+        NeuraXBlockchain,
+        NeuraXTokenomics,
+        data_dir=os.environ.get('NEURAX_DATA_DIR'),
+        fsync=os.environ.get('NEURAX_WAL_FSYNC', '1') != '0',
+        governance_factory=GovernanceEngine,
+        compact=os.environ.get('NEURAX_COMPACT_STATE', '0') != '0'
+    )
+neurax_blockchain = neurax_state.blockchain
+neurax_tokenomics = neurax_state.tokenomics
+atexit.register(neurax_state.close)
 
-# Make blockchain and tokenomics available to routes
+# Make blockchain and tokenomics available to routes; all writes go
+# through NEURAX_STATE so they are journaled before being applied
+app.config['NEURAX_STATE'] = neurax_state
 app.config['NEURAX_BLOCKCHAIN'] = neurax_blockchain
 app.config['NEURAX_TOKENOMICS'] = neurax_tokenomics
+app.config['NEURAX_GOVERNANCE'] = neurax_state.governance
+
+# Indexes maintained incrementally from the chain and the ledger
+app.config['NEURAX_CHAIN_INDEX'] = ChainIndex(neurax_blockchain)
+app.config['NEURAX_VALIDATION_STATS'] = ValidationStats(neurax_blockchain)
+app.config['NEURAX_LEDGER_INDEX'] = AddressTransactionIndex(neurax_tokenomics)
+# NEURAX_MERKLE_SCHEME pins the engine's tree construction (one of
+# merkle.SCHEMES); by default it is detected from the first multi-transaction
+# block a proof is asked for
+app.config['NEURAX_MERKLE_TREES'] = MerkleTreeCache(
+    capacity=int(os.environ.get('NEURAX_MERKLE_CACHE_BLOCKS', 1024)),
+    scheme=os.environ.get('NEURAX_MERKLE_SCHEME') or None
+)
+app.config['NEURAX_SWAP_ROUTER'] = SwapRouter(neurax_tokenomics)
+# NEURAX_LOCK_PERIOD_UNIT ('seconds' or 'days') must match the unit the
+# engine counts staking lock periods in
+app.config['NEURAX_STAKING_REWARDS'] = StakingRewards(
+    neurax_tokenomics,
+    rate_history=neurax_state.reward_rates,
+    lock_period_unit=os.environ.get('NEURAX_LOCK_PERIOD_UNIT', 'seconds')
+)
+app.config['NEURAX_VALIDATOR_LEADERBOARD'] = ValidatorLeaderboard(
+    neurax_tokenomics,
+    history_size=int(os.environ.get('NEURAX_VALIDATOR_HISTORY', 10))
+)
+
+# Pending transactions are queued in the mempool and packed in bulk once
+# per block interval. With the state service there is one mempool and one
+# block builder for the whole deployment, hosted by the service
+if state_socket:
+    neurax_mempool = RemoteMempool(neurax_state)
+    neurax_block_builder = RemoteBlockBuilder(neurax_state)
+else:
+    neurax_mempool = Mempool(
+        max_size=int(os.environ.get('NEURAX_MEMPOOL_SIZE', 50000)),
+        max_age=int(os.environ.get('NEURAX_MEMPOOL_MAX_AGE', 3600)),
+        committed_nonces=neurax_state.nonces
+    )
+
+    # With NEURAX_VALIDATION_VERIFIER ('package.module:function') drained
+    # blocks are verified across NEURAX_VALIDATION_WORKERS processes (0
+    # verifies on the commit thread) and committed in drain order. The
+    # pipeline forks its workers on start, so it is started before any other
+    # thread of this process
+    neurax_validation = None
+    if os.environ.get('NEURAX_VALIDATION_VERIFIER'):
+        neurax_validation = ValidationPipeline(
+            resolve_verifier(os.environ['NEURAX_VALIDATION_VERIFIER']),
+            workers=int(os.environ.get('NEURAX_VALIDATION_WORKERS', 0)),
+            max_pending=int(os.environ.get('NEURAX_VALIDATION_QUEUE', 10000)),
+            chunk_size=int(os.environ.get('NEURAX_VALIDATION_CHUNK', 256))
+        )
+        neurax_validation.start()
+        atexit.register(neurax_validation.close)
+
+    # Mempool fees are paid to NEURAX_FEE_COLLECTOR
+    neurax_block_builder = BlockBuilder(
+        neurax_mempool,
+        neurax_state,
+        interval=neurax_blockchain.block_time,
+        max_block_transactions=int(os.environ.get('NEURAX_MAX_BLOCK_TRANSACTIONS', 1000)),
+        pipeline=neurax_validation,
+        fee_collector=os.environ.get('NEURAX_FEE_COLLECTOR', DEFAULT_FEE_COLLECTOR)
+    )
+    neurax_block_builder.start()
+    atexit.register(neurax_block_builder.stop)
+app.config['NEURAX_MEMPOOL'] = neurax_mempool
+app.config['NEURAX_BLOCK_BUILDER'] = neurax_block_builder
+
+# New blocks, address activity and proposal status changes are pushed to
+# subscribers of /api/events instead of being polled for
+neurax_event_bus = EventBus(
+    capacity=int(os.environ.get('NEURAX_EVENT_BUFFER', 10000)),
+    sequence=neurax_state.sequence
+)
+neurax_event_pump = EventPump(neurax_state, neurax_event_bus)
+neurax_event_pump.start()
+atexit.register(neurax_event_pump.stop)
+app.config['NEURAX_EVENT_BUS'] = neurax_event_bus
+
+if state_socket:
+    @app.before_request
+    def rebind_state_replica():
+        """Follow the replica when it has been rebuilt from a new snapshot"""
+        if app.config['NEURAX_BLOCKCHAIN'] is not neurax_state.blockchain:
+            app.config['NEURAX_BLOCKCHAIN'] = neurax_state.blockchain
+            app.config['NEURAX_TOKENOMICS'] = neurax_state.tokenomics
+            app.config['NEURAX_GOVERNANCE'] = neurax_state.governance
+            app.config['NEURAX_CHAIN_INDEX'].rebind(neurax_state.blockchain)
+            app.config['NEURAX_VALIDATION_STATS'].rebind(neurax_state.blockchain)
+            app.config['NEURAX_LEDGER_INDEX'].rebind(neurax_state.tokenomics)
+            app.config['NEURAX_SWAP_ROUTER'].rebind(neurax_state.tokenomics)
+            app.config['NEURAX_STAKING_REWARDS'].rebind(neurax_state.tokenomics, neurax_state.reward_rates)
+            app.config['NEURAX_VALIDATOR_LEADERBOARD'].rebind(neurax_state.tokenomics)
+
+metrics.gauge('neurax_chain_height', "Blocks in the served chain", lambda: len(app.config['NEURAX_BLOCKCHAIN'].blocks))
+metrics.gauge('neurax_state_sequence', "Commands applied to the served state", lambda: neurax_state.sequence)
+metrics.gauge('neurax_mempool_transactions', "Transactions waiting in the mempool", lambda: len(neurax_mempool))
+if state_socket:
+    # The state command phases are timed in the state service
+    metrics.source('state', lambda: neurax_state.call_service('metrics.export'))
+
+# /api/metrics is served to scrapers presenting NEURAX_METRICS_TOKEN as a
+# bearer token or, when no token is set, to loopback clients only
+metrics_token = os.environ.get('NEURAX_METRICS_TOKEN')
 
 # Register blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(blockchain_bp, url_prefix='/api/blockchain')
 app.register_blueprint(wallet_bp, url_prefix='/api/wallet')
 app.register_blueprint(tokenomics_bp, url_prefix='/api/tokenomics')
+app.register_blueprint(events_bp, url_prefix='/api/events')
+if profiler_token:
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
@@ -49,16 +216,30 @@ def health_check():
         "tokenomics_status": "active"
     })
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Request and phase metrics in the Prometheus text format"""
+    if metrics_token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {metrics_token}".encode()):
+            return jsonify({"error": "Forbidden"}), 403
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/stats')
+@response_cache.cached
 def get_stats():
     """Get comprehensive blockchain and tokenomics statistics"""
     try:
-        blockchain_stats = neurax_blockchain.get_blockchain_stats()
-        tokenomics_stats = neurax_tokenomics.get_tokenomics_stats()
+        blockchain = app.config['NEURAX_BLOCKCHAIN']
+        tokenomics = app.config['NEURAX_TOKENOMICS']
+        blockchain_stats = blockchain.get_blockchain_stats()
+        tokenomics_stats = tokenomics.get_tokenomics_stats()
         return jsonify({
             "blockchain": blockchain_stats,
             "tokenomics": tokenomics_stats,
-            "timestamp": neurax_blockchain.get_current_time()
+            "timestamp": blockchain.get_current_time()
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -84,9 +265,11 @@ def serve(path):
                 "endpoints": {
                     "health": "/api/health",
                     "stats": "/api/stats",
+                    "metrics": "/api/metrics",
                     "blockchain": "/api/blockchain/*",
                     "wallet": "/api/wallet/*",
-                    "tokenomics": "/api/tokenomics/*"
+                    "tokenomics": "/api/tokenomics/*",
+                    "events": "/api/events/*"
                 }
             })
 
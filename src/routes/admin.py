@@ -0,0 +1,86 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from src.services.profiler import FORMATS, TOKEN_HEADER, ProfilerBusy
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.before_request
+def require_admin_token():
+    """Reject admin requests without the profiler's admin token"""
+    profiler = current_app.config['NEURAX_PROFILER']
+    if not profiler.authorized(request.headers.get(TOKEN_HEADER)):
+        return jsonify({"error": "Forbidden"}), 403
+
+def _render_profile(profile, fmt):
+    if fmt == 'speedscope':
+        response = jsonify(profile.speedscope())
+        response.headers['Content-Disposition'] = 'attachment; filename="neurax-profile.speedscope.json"'
+        return response
+    return Response(profile.collapsed(), mimetype='text/plain')
+
+@admin_bp.route('/profile', methods=['POST'])
+def capture_profile():
+    """Start sampling every thread for N seconds in the background"""
+    try:
+        profiler = current_app.config['NEURAX_PROFILER']
+        
+        # Get capture parameters
+        try:
+            seconds = float(request.args.get('seconds', 10))
+            interval = float(request.args['interval_ms']) / 1000 if 'interval_ms' in request.args else None
+        except ValueError:
+            return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+        if interval is not None and not 0.001 <= interval <= 1:
+            return jsonify({"error": "interval_ms must be between 1 and 1000"}), 400
+        
+        try:
+            profile_id = profiler.start_capture(seconds, interval=interval)
+        except ProfilerBusy as e:
+            return jsonify({"error": str(e)}), 409
+        
+        return jsonify(dict(profiler.get(profile_id).summary(), id=profile_id)), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/profiles', methods=['GET'])
+def get_request_profiles():
+    """List the kept capture and single-request profiles, newest first"""
+    try:
+        profiler = current_app.config['NEURAX_PROFILER']
+        
+        profiles = profiler.recent()
+        return jsonify({
+            "profiles": profiles,
+            "total": len(profiles)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+def get_request_profile(profile_id):
+    """Get one profile by its capture id or the id from a response header"""
+    try:
+        profiler = current_app.config['NEURAX_PROFILER']
+        
+        fmt = request.args.get('format', 'collapsed')
+        if fmt not in FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(FORMATS)}"}), 400
+        
+        profile = profiler.get(profile_id)
+        if profile is None:
+            return jsonify({"error": "Profile not found"}), 404
+        if not profile.complete:
+            return jsonify(dict(profile.summary(), id=profile_id)), 202
+        
+        return _render_profile(profile, fmt)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/staking_audit', methods=['GET'])
+def get_staking_audit():
+    """Recompute every staking position from scratch and report mismatches"""
+    try:
+        staking_rewards = current_app.config['NEURAX_STAKING_REWARDS']
+        
+        return jsonify(staking_rewards.audit())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
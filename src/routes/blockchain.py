@@ -1,10 +1,17 @@
-from flask import Blueprint, request, jsonify, current_app
-from decimal import Decimal
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 import json
+from src.services.amounts import AmountError, from_wei, parse_amount
+from src.services.mempool import MempoolEntry
+from src.services.signing import sign_transaction
+from src.services.merkle import MerkleRootMismatch
+from src.services.response_cache import response_cache
+from src.services.json_provider import confirmed_objects
+from src.services.chain_export import FORMATS, RECORD_TYPES, encode_stream, export_records, resume_point
 
 blockchain_bp = Blueprint('blockchain', __name__)
 
 @blockchain_bp.route('/info', methods=['GET'])
+@response_cache.cached
 def get_blockchain_info():
     """Get blockchain information"""
     try:
@@ -70,9 +77,9 @@ def get_blocks():
 def get_block(block_hash):
     """Get specific block by hash"""
     try:
-        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        chain_index = current_app.config['NEURAX_CHAIN_INDEX']
         
-        block = blockchain.get_block_by_hash(block_hash)
+        block = chain_index.get_block(block_hash)
         if not block:
             return jsonify({"error": "Block not found"}), 404
         
@@ -85,7 +92,7 @@ def get_block(block_hash):
             "validator": block.validator,
             "ai_validation_score": block.ai_validation_score,
             "quantum_signature": block.quantum_signature,
-            "transactions": [tx.to_dict() for tx in block.transactions],
+            "transactions": confirmed_objects.encoded_list(block.transactions),
             "size": len(str(block)),
             "nonce": getattr(block, 'nonce', 0)
         }
@@ -99,6 +106,13 @@ def get_transaction(tx_hash):
     """Get specific transaction by hash"""
     try:
         blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        chain_index = current_app.config['NEURAX_CHAIN_INDEX']
+        
+        # Confirmed transactions come from the index; anything else may
+        # still be pending, which only the blockchain itself knows about
+        transaction = chain_index.get_transaction(tx_hash)
+        if transaction:
+            return jsonify(confirmed_objects.encoded(transaction))
         
         transaction = blockchain.get_transaction_by_hash(tx_hash)
         if not transaction:
@@ -108,47 +122,116 @@ def get_transaction(tx_hash):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@blockchain_bp.route('/proof/<tx_hash>', methods=['GET'])
+def get_transaction_proof(tx_hash):
+    """Get a Merkle inclusion proof for a confirmed transaction"""
+    try:
+        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        chain_index = current_app.config['NEURAX_CHAIN_INDEX']
+        merkle_trees = current_app.config['NEURAX_MERKLE_TREES']
+        
+        location = chain_index.locate(tx_hash)
+        if not location:
+            return jsonify({"error": "Transaction not found"}), 404
+        
+        height, position = location
+        block = blockchain.blocks[height]
+        try:
+            proof, root, scheme = merkle_trees.proof(block, position)
+        except MerkleRootMismatch as e:
+            # The block was sealed with an unknown tree construction
+            return jsonify({"error": str(e)}), 409
+        
+        return jsonify({
+            "transaction_hash": tx_hash,
+            "block_hash": block.hash,
+            "block_height": block.height,
+            "position": position,
+            "transaction_count": len(block.transactions),
+            "proof": proof,
+            "merkle_root": root,
+            "scheme": scheme.description
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @blockchain_bp.route('/transactions', methods=['GET'])
 def get_transactions():
     """Get recent transactions"""
     try:
-        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        chain_index = current_app.config['NEURAX_CHAIN_INDEX']
         
         # Get pagination parameters
         page = int(request.args.get('page', 1))
         limit = min(int(request.args.get('limit', 20)), 100)
         address = request.args.get('address')
+        before = request.args.get('before')
+        after = request.args.get('after')
         
-        # Get transactions
-        all_transactions = []
-        for block in blockchain.blocks:
-            for tx in block.transactions:
-                if address and address not in [tx.from_address, tx.to_address]:
-                    continue
-                all_transactions.append(tx.to_dict())
-        
-        # Sort by timestamp (newest first)
-        all_transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Paginate
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        transactions = all_transactions[start_idx:end_idx]
+        # Get one page of transactions from the chain index (newest first)
+        try:
+            transactions, next_cursor, prev_cursor = chain_index.page(
+                limit, address=address, page=page, before=before, after=after
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "transactions": transactions,
-            "total": len(all_transactions),
+            "total": chain_index.count(address),
             "page": page,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@blockchain_bp.route('/export', methods=['GET'])
+def export_chain():
+    """Stream confirmed blocks and transactions as NDJSON or binary frames"""
+    try:
+        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        dumps = current_app.json.dumps
+        
+        # Get export parameters
+        fmt = request.args.get('format', 'ndjson')
+        types = tuple(request.args.get('include', ','.join(RECORD_TYPES)).split(','))
+        if fmt not in FORMATS:
+            return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+        if not types or any(t not in RECORD_TYPES for t in types):
+            return jsonify({"error": f"include must be a subset of {','.join(RECORD_TYPES)}"}), 400
+        
+        # Resume from a height or from the last transaction cursor received
+        try:
+            start_height, start_position = resume_point(
+                int(request.args.get('from_height', 0)), request.args.get('cursor')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Pin the end of the export now so the stream is a consistent prefix
+        # of the chain even while new blocks are appended
+        blocks = blockchain.blocks
+        to_height = min(int(request.args.get('to_height', len(blocks))), len(blocks))
+        
+        records = export_records(blocks, start_height, to_height, start_position, types)
+        response = Response(
+            stream_with_context(encode_stream(records, lambda r: dumps(r, separators=(',', ':')), fmt)),
+            mimetype=FORMATS[fmt]
+        )
+        response.headers['X-NeuraX-Export-Start-Height'] = str(start_height)
+        response.headers['X-NeuraX-Export-End-Height'] = str(max(start_height, to_height))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @blockchain_bp.route('/submit_transaction', methods=['POST'])
 def submit_transaction():
-    """Submit a new transaction to the blockchain"""
+    """Submit a new transaction to the mempool for the next block"""
     try:
-        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+        mempool = current_app.config['NEURAX_MEMPOOL']
         data = request.get_json()
         
         # Validate required fields
@@ -157,27 +240,78 @@ def submit_transaction():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        # Create and submit transaction
-        tx_hash = blockchain.create_transaction(
-            from_address=data['from_address'],
-            to_address=data['to_address'],
-            amount=Decimal(str(data['amount'])),
-            private_key=data['private_key'],
-            data=data.get('data', {})
-        )
+        if not isinstance(data['private_key'], str) or not data['private_key']:
+            return jsonify({"error": "Invalid private_key: must be a non-empty string"}), 400
+        
+        # Fees are kept in wei; the amount goes to the engine as Decimal
+        try:
+            fee = parse_amount(data.get('fee', 0), field='fee')
+            amount = parse_amount(data['amount'], positive=True)
+        except AmountError as e:
+            return jsonify({"error": str(e)}), 400
+        if fee < 0:
+            return jsonify({"error": "Invalid fee: must not be negative"}), 400
+        nonce = data.get('nonce')
+        if nonce is not None:
+            if isinstance(nonce, str) and nonce.isdigit():
+                nonce = int(nonce)
+            elif not isinstance(nonce, int) or isinstance(nonce, bool) or nonce < 0:
+                return jsonify({"error": "Invalid nonce: must be a non-negative integer"}), 400
         
-        if tx_hash:
+        # Sign here: only the signature is queued, journaled and replicated
+        payload = {
+            "from_address": data['from_address'],
+            "to_address": data['to_address'],
+            "amount": from_wei(amount),
+            "data": data.get('data', {})
+        }
+        payload["signature"] = sign_transaction(data['private_key'], payload)
+        
+        # Queue the transaction; the block builder drains the mempool in bulk
+        entry = MempoolEntry(data['from_address'], nonce, fee, payload)
+        accepted, reason = mempool.add(entry)
+        if accepted:
             return jsonify({
                 "success": True,
-                "transaction_hash": tx_hash,
+                "transaction_hash": entry.tx_hash,
+                "nonce": entry.nonce,
+                "status": "pending",
                 "message": "Transaction submitted successfully"
             })
         else:
-            return jsonify({"error": "Failed to create transaction"}), 400
+            return jsonify({"error": reason, "transaction_hash": entry.tx_hash}), 409 if reason == "Duplicate transaction" else 400
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@blockchain_bp.route('/mempool', methods=['GET'])
+def get_mempool_stats():
+    """Get mempool depth, eviction counts and queueing latency"""
+    try:
+        mempool = current_app.config['NEURAX_MEMPOOL']
+        block_builder = current_app.config['NEURAX_BLOCK_BUILDER']
+        
+        stats = mempool.stats()
+        stats.update(block_builder.stats())
+        
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@blockchain_bp.route('/mempool/<tx_hash>', methods=['GET'])
+def get_mempool_transaction(tx_hash):
+    """Get the status of a submitted transaction"""
+    try:
+        block_builder = current_app.config['NEURAX_BLOCK_BUILDER']
+        
+        status = block_builder.status(tx_hash)
+        if not status:
+            return jsonify({"error": "Transaction not found"}), 404
+        
+        return jsonify(dict(status, transaction_hash=tx_hash))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @blockchain_bp.route('/validate_address', methods=['POST'])
 def validate_address():
     """Validate a blockchain address"""
@@ -200,6 +334,7 @@ def validate_address():
         return jsonify({"error": str(e)}), 500
 
 @blockchain_bp.route('/network_stats', methods=['GET'])
+@response_cache.cached
 def get_network_stats():
     """Get network statistics"""
     try:
@@ -224,29 +359,10 @@ def get_network_stats():
 def get_ai_validation_stats():
     """Get AI validation statistics"""
     try:
-        blockchain = current_app.config['NEURAX_BLOCKCHAIN']
-        
-        # Calculate AI validation statistics
-        total_validations = 0
-        total_score = 0
-        fraud_detected = 0
-        
-        for block in blockchain.blocks:
-            if hasattr(block, 'ai_validation_score'):
-                total_validations += 1
-                total_score += block.ai_validation_score
-                if block.ai_validation_score < 50:  # Threshold for fraud detection
-                    fraud_detected += 1
+        validation_stats = current_app.config['NEURAX_VALIDATION_STATS']
         
-        avg_score = total_score / max(1, total_validations)
-        
-        stats = {
-            "total_validations": total_validations,
-            "average_ai_score": round(avg_score, 2),
-            "fraud_attempts_detected": fraud_detected,
-            "fraud_detection_rate": round((fraud_detected / max(1, total_validations)) * 100, 2),
-            "ai_consensus_accuracy": round(avg_score, 2)
-        }
+        # Running totals are maintained as blocks are appended
+        stats = validation_stats.stats()
         
         return jsonify(stats)
     except Exception as e:
@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from src.services.events import event_dict, format_event_id, format_sse, parse_event_id, parse_timeout, parse_topics
+
+events_bp = Blueprint('events', __name__)
+
+MAX_WAIT = 60
+KEEPALIVE_INTERVAL = 15
+
+
+def _subscription():
+    bus = current_app.config['NEURAX_EVENT_BUS']
+    subscriptions = parse_topics(request.args.get('topics', 'blocks'))
+    since = request.args.get('since', request.headers.get('Last-Event-ID'))
+    since = bus.last_id if since is None else parse_event_id(since)
+    return bus, subscriptions, since
+
+
+def _held_connections_unsupported():
+    # A sync worker serves one request at a time, so a held subscription
+    # would block every other request on that worker
+    if not request.environ.get('wsgi.multithread'):
+        return jsonify({
+            "error": "Event subscriptions need a threaded worker (gunicorn -k gthread) or the ASGI app (src.asgi)"
+        }), 503
+    return None
+
+
+@events_bp.route('/poll', methods=['GET'])
+def poll_events():
+    """Long-poll for events after ``since`` on the requested topics"""
+    try:
+        unsupported = _held_connections_unsupported()
+        if unsupported:
+            return unsupported
+        
+        try:
+            bus, subscriptions, since = _subscription()
+            timeout = parse_timeout(request.args.get('timeout', 30), MAX_WAIT)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        events, last_id, missed = bus.wait(since, subscriptions, timeout)
+
+        return jsonify({
+            "events": [event_dict(event) for event in events],
+            "last_id": format_event_id(last_id),
+            "missed": missed
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """Server-sent event stream for the requested topics"""
+    try:
+        unsupported = _held_connections_unsupported()
+        if unsupported:
+            return unsupported
+        
+        try:
+            bus, subscriptions, since = _subscription()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        dumps = current_app.json.dumps
+
+        def generate(since):
+            yield f"retry: 3000\nid: {format_event_id(since)}\n\n"
+            while True:
+                events, last_id, missed = bus.wait(since, subscriptions, KEEPALIVE_INTERVAL)
+                yield format_sse(events, last_id, missed, dumps)
+                since = last_id
+
+        response = Response(stream_with_context(generate(since)), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
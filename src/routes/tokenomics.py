@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import time
+from src.services.response_cache import response_cache
+from src.services.amounts import AmountError, format_wei, from_wei, parse_amount
+from src.services.amm import EXACT_IN, EXACT_OUT, QuoteError
 
 tokenomics_bp = Blueprint('tokenomics', __name__)
 
 @tokenomics_bp.route('/stats', methods=['GET'])
+@response_cache.cached
 def get_tokenomics_stats():
     """Get comprehensive tokenomics statistics"""
     try:
@@ -45,24 +49,27 @@ def get_token_info():
         return jsonify({"error": str(e)}), 500
 
 @tokenomics_bp.route('/staking_info', methods=['GET'])
+@response_cache.cached
 def get_staking_info():
     """Get staking information"""
     try:
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        staking_rewards = current_app.config['NEURAX_STAKING_REWARDS']
+        rate = tokenomics.config.staking_reward_rate
         
         info = {
             "total_staked": str(tokenomics.staking_contract.total_staked),
             "total_positions": len(tokenomics.staking_contract.staking_positions),
+            "total_weighted_stake": staking_rewards.totals()["total_weighted_stake"],
             "reward_pool": str(tokenomics.staking_contract.reward_pool),
-            "base_apy": str(tokenomics.config.staking_reward_rate * 100),
+            "base_apy": str(rate * 100),
             "min_stake": str(tokenomics.config.min_stake_amount),
             "max_stake": str(tokenomics.config.max_stake_amount),
             "unstaking_period": tokenomics.config.unstaking_period,
+            "lock_period_unit": staking_rewards.lock_period_unit,
             "lock_periods": {
-                "no_lock": {"multiplier": "1.0x", "apy": str(tokenomics.config.staking_reward_rate * 100)},
-                "1_month": {"multiplier": "1.1x", "apy": str(tokenomics.config.staking_reward_rate * 110)},
-                "6_months": {"multiplier": "1.25x", "apy": str(tokenomics.config.staking_reward_rate * 125)},
-                "1_year": {"multiplier": "1.5x", "apy": str(tokenomics.config.staking_reward_rate * 150)}
+                name: {"multiplier": f"{percent / 100}x", "apy": str(rate * percent), "min_lock_period": minimum}
+                for name, minimum, percent in staking_rewards.lock_tiers()
             }
         }
         
@@ -75,15 +82,13 @@ def get_governance_info():
     """Get governance information"""
     try:
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
-        
-        active_proposals = [
-            p for p in tokenomics.governance_contract.proposals.values()
-            if p["status"] == "pending"
-        ]
+        governance = current_app.config['NEURAX_GOVERNANCE']
         
         info = {
-            "total_proposals": len(tokenomics.governance_contract.proposals),
-            "active_proposals": len(active_proposals),
+            "total_proposals": governance.count(),
+            "active_proposals": governance.count("pending"),
+            "passed_proposals": governance.count("passed"),
+            "rejected_proposals": governance.count("rejected"),
             "total_votes": len(tokenomics.governance_contract.votes),
             "reward_pool": str(tokenomics.governance_contract.reward_pool),
             "proposal_threshold": str(tokenomics.config.proposal_threshold),
@@ -103,43 +108,20 @@ def get_governance_info():
 def get_proposals():
     """Get governance proposals"""
     try:
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        governance = current_app.config['NEURAX_GOVERNANCE']
         
         # Get pagination parameters
-        page = int(request.args.get('page', 1))
+        page = max(int(request.args.get('page', 1)), 1)
         limit = min(int(request.args.get('limit', 10)), 50)
         status = request.args.get('status')  # pending, passed, rejected
         
-        # Filter proposals
-        proposals = list(tokenomics.governance_contract.proposals.values())
-        if status:
-            proposals = [p for p in proposals if p["status"] == status]
-        
-        # Sort by creation time (newest first)
-        proposals.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        # Paginate
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_proposals = proposals[start_idx:end_idx]
-        
-        # Add voting progress
-        for proposal in paginated_proposals:
-            total_votes = proposal["votes_for"] + proposal["votes_against"]
-            if total_votes > 0:
-                proposal["for_percentage"] = float(proposal["votes_for"] / total_votes * 100)
-                proposal["against_percentage"] = float(proposal["votes_against"] / total_votes * 100)
-            else:
-                proposal["for_percentage"] = 0
-                proposal["against_percentage"] = 0
-            
-            # Convert Decimal to string for JSON serialization
-            proposal["votes_for"] = str(proposal["votes_for"])
-            proposal["votes_against"] = str(proposal["votes_against"])
+        # Newest first from the status index, with voting progress from the
+        # running tallies
+        proposals = governance.page(page, limit, status or None)
         
         return jsonify({
-            "proposals": paginated_proposals,
-            "total": len(proposals),
+            "proposals": proposals,
+            "total": governance.count(status or None),
             "page": page,
             "limit": limit
         })
@@ -158,9 +140,11 @@ def create_proposal():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        state = current_app.config['NEURAX_STATE']
         
-        proposal_id = tokenomics.governance_contract.create_proposal(
+        proposal_id = state.execute(
+            'governance',
+            'create_proposal',
             proposer=data['proposer'],
             title=data['title'],
             description=data['description'],
@@ -186,23 +170,35 @@ def vote_on_proposal():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['voter', 'proposal_id', 'vote_choice', 'voting_power']
+        required_fields = ['voter', 'proposal_id', 'vote_choice']
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        state = current_app.config['NEURAX_STATE']
+        
+        # Voting power comes from the balance snapshot taken when the
+        # proposal was created; a submitted voting_power can only lower it
+        max_voting_power = None
+        if data.get('voting_power') is not None:
+            try:
+                max_voting_power = parse_amount(data['voting_power'], field='voting_power')
+            except AmountError as e:
+                return jsonify({"error": str(e)}), 400
         
-        success = tokenomics.governance_contract.vote(
+        voting_power = state.execute(
+            'governance',
+            'vote',
             voter=data['voter'],
             proposal_id=data['proposal_id'],
             vote_choice=data['vote_choice'],
-            voting_power=Decimal(str(data['voting_power']))
+            max_voting_power=max_voting_power
         )
         
-        if success:
+        if voting_power is not None:
             return jsonify({
                 "success": True,
+                "voting_power": format_wei(voting_power),
                 "message": "Vote cast successfully"
             })
         else:
@@ -211,17 +207,36 @@ def vote_on_proposal():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@tokenomics_bp.route('/voting_power/<proposal_id>/<address>', methods=['GET'])
+def get_voting_power(proposal_id, address):
+    """Get an address's voting power on a proposal"""
+    try:
+        governance = current_app.config['NEURAX_GOVERNANCE']
+        
+        voting_power = governance.voting_power(address, proposal_id)
+        if voting_power is None:
+            return jsonify({"error": "Proposal not found"}), 404
+        
+        return jsonify({
+            "proposal_id": proposal_id,
+            "address": address,
+            "voting_power": format_wei(voting_power)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @tokenomics_bp.route('/ai_rewards_info', methods=['GET'])
 def get_ai_rewards_info():
     """Get AI rewards information"""
     try:
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        leaderboard = current_app.config['NEURAX_VALIDATOR_LEADERBOARD']
         
         info = {
             "reward_pool": str(tokenomics.ai_rewards_contract.reward_pool),
             "base_reward_rate": str(tokenomics.config.ai_validation_reward_rate),
-            "total_validators": len(tokenomics.ai_rewards_contract.ai_scores),
-            "average_ai_score": sum(tokenomics.ai_rewards_contract.ai_scores.values()) / max(1, len(tokenomics.ai_rewards_contract.ai_scores)),
+            "total_validators": leaderboard.count(),
+            "average_ai_score": leaderboard.average_score(),
             "validation_requirements": {
                 "minimum_ai_score": 50,
                 "accuracy_threshold": 0.6,
@@ -238,29 +253,32 @@ def get_ai_rewards_info():
 def get_validator_stats(address):
     """Get validator statistics"""
     try:
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
-        
-        ai_score = tokenomics.ai_rewards_contract.ai_scores.get(address, 50.0)
-        validation_history = tokenomics.ai_rewards_contract.validation_history.get(address, [])
+        leaderboard = current_app.config['NEURAX_VALIDATOR_LEADERBOARD']
         
-        # Calculate statistics
-        total_validations = len(validation_history)
-        total_rewards = sum(Decimal(v['reward']) for v in validation_history)
+        # Rank is the validator's true position among all scored validators
+        stats = leaderboard.validator(address)
         
-        recent_validations = validation_history[-10:] if validation_history else []
-        recent_accuracy = sum(v['validation_result'].get('accuracy', 0.5) for v in recent_validations) / max(1, len(recent_validations))
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@tokenomics_bp.route('/validator_leaderboard', methods=['GET'])
+def get_validator_leaderboard():
+    """Get AI validators ranked by score"""
+    try:
+        leaderboard = current_app.config['NEURAX_VALIDATOR_LEADERBOARD']
         
-        stats = {
-            "address": address,
-            "ai_score": ai_score,
-            "total_validations": total_validations,
-            "total_rewards": str(total_rewards),
-            "recent_accuracy": recent_accuracy,
-            "validation_history": recent_validations,
-            "rank": "Top 10%" if ai_score > 90 else "Top 25%" if ai_score > 75 else "Average"
-        }
+        # Get pagination parameters
+        page = max(int(request.args.get('page', 1)), 1)
+        limit = min(int(request.args.get('limit', 20)), 100)
         
-        return jsonify(stats)
+        return jsonify({
+            "validators": leaderboard.page(page, limit),
+            "total": leaderboard.count(),
+            "average_ai_score": leaderboard.average_score(),
+            "page": page,
+            "limit": limit
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -269,19 +287,26 @@ def get_liquidity_pools():
     """Get liquidity pools information"""
     try:
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        swap_router = current_app.config['NEURAX_SWAP_ROUTER']
+        tvl_token = request.args.get('tvl_token', 'USDT')
         
         pools = []
         for pool_id, pool in tokenomics.liquidity_pools.items():
+            # Value both sides at their best mid price in the TVL token
+            tvl = swap_router.pool_value(pool, tvl_token)
+            
             pool_info = {
                 "pool_id": pool_id,
                 "token_a": pool.token_a,
                 "token_b": pool.token_b,
                 "reserve_a": str(pool.reserve_a),
                 "reserve_b": str(pool.reserve_b),
+                "price_a_in_b": str(pool.reserve_b / pool.reserve_a) if pool.reserve_a else None,
                 "total_liquidity": str(pool.total_liquidity),
                 "fee_rate": str(pool.fee_rate * 100),  # Convert to percentage
                 "providers": len(pool.liquidity_providers),
-                "tvl": str(pool.reserve_a + pool.reserve_b)  # Simplified TVL
+                "tvl": str(tvl) if tvl is not None else None,
+                "tvl_token": tvl_token
             }
             pools.append(pool_info)
         
@@ -292,6 +317,87 @@ def get_liquidity_pools():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _parse_quote_side(data, suffix=''):
+    """Return the quote side and the key its amounts are given under"""
+    if f"amount{suffix}_out" in data:
+        return EXACT_OUT, f"amount{suffix}_out"
+    return EXACT_IN, f"amount{suffix}_in"
+
+def _parse_max_hops(value):
+    """Return ``max_hops`` as an int, or ``None`` when it is not given"""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError("max_hops must be an integer")
+
+@tokenomics_bp.route('/quote', methods=['GET'])
+def get_swap_quote():
+    """Quote the best route for a swap between two tokens"""
+    try:
+        swap_router = current_app.config['NEURAX_SWAP_ROUTER']
+        
+        # Validate required fields
+        for field in ['token_in', 'token_out']:
+            if field not in request.args:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+        side, amount_key = _parse_quote_side(request.args)
+        if amount_key not in request.args:
+            return jsonify({"error": "Missing required field: amount_in or amount_out"}), 400
+        
+        try:
+            quote = swap_router.quote(
+                request.args['token_in'],
+                request.args['token_out'],
+                from_wei(parse_amount(request.args[amount_key], field=amount_key)),
+                side=side,
+                max_hops=_parse_max_hops(request.args.get('max_hops'))
+            )
+        except (QuoteError, InvalidOperation, ValueError) as e:
+            return jsonify({"error": str(e) or "Invalid amount"}), 400
+        
+        return jsonify(quote)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@tokenomics_bp.route('/quote_batch', methods=['POST'])
+def get_swap_quotes():
+    """Quote many amounts for one token pair in a single call"""
+    try:
+        swap_router = current_app.config['NEURAX_SWAP_ROUTER']
+        data = request.get_json()
+        
+        # Validate required fields
+        for field in ['token_in', 'token_out']:
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+        side, amount_key = _parse_quote_side(data, suffix='s')
+        amounts = data.get(amount_key)
+        if not isinstance(amounts, list) or not amounts:
+            return jsonify({"error": "amounts_in or amounts_out must be a non-empty list"}), 400
+        if len(amounts) > 1000:
+            return jsonify({"error": "At most 1000 amounts per batch"}), 400
+        
+        try:
+            quotes = swap_router.quote_many(
+                data['token_in'],
+                data['token_out'],
+                [from_wei(parse_amount(amount, field=amount_key)) for amount in amounts],
+                side=side,
+                max_hops=_parse_max_hops(data.get('max_hops'))
+            )
+        except (QuoteError, InvalidOperation, ValueError) as e:
+            return jsonify({"error": str(e) or "Invalid amount"}), 400
+        
+        return jsonify({
+            "quotes": quotes,
+            "total": len(quotes)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @tokenomics_bp.route('/price_info', methods=['GET'])
 def get_price_info():
     """Get token price information (simulated)"""
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
 from decimal import Decimal
 import secrets
-import hashlib
 import time
+from src.services.amounts import WEI, AmountError, format_wei, from_wei, parse_amount, to_wei
+from src.services.signing import address_for_key
+from src.services.transfers import read_transfer_batch, build_transfer_commands, check_transfer_balances
 
 wallet_bp = Blueprint('wallet', __name__)
 
@@ -14,12 +16,11 @@ def create_wallet():
         private_key = secrets.token_urlsafe(32)
         
         # Generate address from private key (simplified)
-        address_hash = hashlib.sha256(private_key.encode()).hexdigest()
-        address = f"NX{address_hash[:38]}"
+        address = address_for_key(private_key)
         
         # Create account in tokenomics
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
-        success = tokenomics.token_contract.create_account(address)
+        state = current_app.config['NEURAX_STATE']
+        success = state.execute('tokenomics.token_contract', 'create_account', address)
         
         if success:
             return jsonify({
@@ -85,15 +86,22 @@ def transfer_tokens():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        try:
+            amount = parse_amount(data['amount'], positive=True)
+        except AmountError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        state = current_app.config['NEURAX_STATE']
         
         # Create transfer transaction
         from tokenomics.smart_contracts import TransactionType
-        tx_id = tokenomics.create_transaction(
+        tx_id = state.execute(
+            'tokenomics',
+            'create_transaction',
             TransactionType.TRANSFER,
             data['from_address'],
             data['to_address'],
-            Decimal(str(data['amount']))
+            from_wei(amount)
         )
         
         if tx_id:
@@ -108,6 +116,55 @@ def transfer_tokens():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@wallet_bp.route('/transfer_batch', methods=['POST'])
+def transfer_tokens_batch():
+    """Transfer tokens for a batch of transfers in one request"""
+    try:
+        try:
+            items, strict = read_transfer_batch(request)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        state = current_app.config['NEURAX_STATE']
+        
+        # Check fields and amounts, then validate balances for the whole
+        # batch in one pass and apply it under a single lock acquisition
+        from tokenomics.smart_contracts import TransactionType
+        commands, errors = build_transfer_commands(items, TransactionType.TRANSFER)
+        
+        valid = [i for i, error in enumerate(errors) if error is None]
+        if strict and len(valid) != len(items):
+            outcomes = []
+        else:
+            outcomes = state.execute_batch(
+                [commands[i] for i in valid],
+                validate=check_transfer_balances,
+                strict=strict
+            )
+        
+        results = [{"index": i, "success": False, "error": error} for i, error in enumerate(errors)]
+        for i, (ok, value) in zip(valid, outcomes):
+            if ok and value:
+                results[i] = {"index": i, "success": True, "transaction_id": value}
+            else:
+                results[i]["error"] = value if not ok else "Transfer failed"
+        if strict and not outcomes:
+            for result in results:
+                result["error"] = result["error"] or "Batch rejected: another transfer in the batch is invalid"
+        
+        succeeded = sum(1 for result in results if result["success"])
+        return jsonify({
+            "success": succeeded == len(results),
+            "strict": strict,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        }), 200 if succeeded or not strict else 400
+            
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @wallet_bp.route('/stake', methods=['POST'])
 def stake_tokens():
     """Stake tokens"""
@@ -120,19 +177,31 @@ def stake_tokens():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        try:
+            amount = parse_amount(data['amount'], positive=True)
+        except AmountError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        lock_period = data.get('lock_period', 0)
+        if type(lock_period) is not int or lock_period < 0:
+            return jsonify({"error": "lock_period must be a non-negative integer"}), 400
         
-        # Create staking transaction
+        state = current_app.config['NEURAX_STATE']
+        
+        # Create staking transaction; lock_period is in the unit reported by
+        # /api/tokenomics/staking_info
         from tokenomics.smart_contracts import TransactionType
         tx_data = {
-            "lock_period": data.get('lock_period', 0)
+            "lock_period": lock_period
         }
         
-        tx_id = tokenomics.create_transaction(
+        tx_id = state.execute(
+            'tokenomics',
+            'create_transaction',
             TransactionType.STAKE,
             data['address'],
             data['address'],
-            Decimal(str(data['amount'])),
+            from_wei(amount),
             tx_data
         )
         
@@ -160,7 +229,7 @@ def unstake_tokens():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        state = current_app.config['NEURAX_STATE']
         
         # Create unstaking transaction
         from tokenomics.smart_contracts import TransactionType
@@ -168,7 +237,9 @@ def unstake_tokens():
             "position_id": data['position_id']
         }
         
-        tx_id = tokenomics.create_transaction(
+        tx_id = state.execute(
+            'tokenomics',
+            'create_transaction',
             TransactionType.UNSTAKE,
             data['address'],
             data['address'],
@@ -200,7 +271,9 @@ def claim_rewards():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        state = current_app.config['NEURAX_STATE']
+        staking_rewards = current_app.config['NEURAX_STAKING_REWARDS']
+        pending_rewards = staking_rewards.pending_rewards(data['position_id'])
         
         # Create claim rewards transaction
         from tokenomics.smart_contracts import TransactionType
@@ -208,7 +281,9 @@ def claim_rewards():
             "position_id": data['position_id']
         }
         
-        tx_id = tokenomics.create_transaction(
+        tx_id = state.execute(
+            'tokenomics',
+            'create_transaction',
             TransactionType.CLAIM_REWARDS,
             data['address'],
             data['address'],
@@ -220,6 +295,7 @@ def claim_rewards():
             return jsonify({
                 "success": True,
                 "transaction_id": tx_id,
+                "estimated_rewards": str(pending_rewards) if pending_rewards is not None else None,
                 "message": "Rewards claimed successfully"
             })
         else:
@@ -233,13 +309,24 @@ def get_staking_positions(address):
     """Get staking positions for an address"""
     try:
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        staking_rewards = current_app.config['NEURAX_STAKING_REWARDS']
         positions = tokenomics.staking_contract.get_staking_info(address)
         
+        # Positions are the engine's own records; pending rewards are only
+        # the reward index's estimates, the engine pays the actual amount
+        estimates = staking_rewards.positions(address)
+        
         return jsonify({
             "address": address,
             "positions": positions,
             "total_positions": len(positions),
-            "total_staked": str(sum(Decimal(p['amount']) for p in positions))
+            "total_staked": format_wei(sum(to_wei(p['amount']) for p in positions)),
+            "estimated_rewards": {
+                "positions": {
+                    p["position_id"]: p["estimated_pending_rewards"] for p in estimates["positions"]
+                },
+                "total_pending": estimates["estimated_total_pending_rewards"]
+            }
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -248,32 +335,30 @@ def get_staking_positions(address):
 def get_transaction_history(address):
     """Get transaction history for an address"""
     try:
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        ledger_index = current_app.config['NEURAX_LEDGER_INDEX']
         
         # Get pagination parameters
         page = int(request.args.get('page', 1))
         limit = min(int(request.args.get('limit', 20)), 100)
+        before = request.args.get('before')
+        after = request.args.get('after')
         
-        # Get transactions for address
-        address_transactions = [
-            tx.to_dict() for tx in tokenomics.transactions.values()
-            if tx.from_address == address or tx.to_address == address
-        ]
-        
-        # Sort by timestamp (newest first)
-        address_transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        # Paginate
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        transactions = address_transactions[start_idx:end_idx]
+        # Get one page of transactions from the per-address index (newest first)
+        try:
+            transactions, next_cursor, prev_cursor = ledger_index.page(
+                address, limit, page=page, before=before, after=after
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "address": address,
             "transactions": transactions,
-            "total": len(address_transactions),
+            "total": ledger_index.count(address),
             "page": page,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -290,7 +375,7 @@ def validate_transaction():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        tokenomics = current_app.config['NEURAX_TOKENOMICS']
+        state = current_app.config['NEURAX_STATE']
         
         # Create AI validation transaction
         from tokenomics.smart_contracts import TransactionType
@@ -299,7 +384,9 @@ def validate_transaction():
             "validation_result": data['validation_result']
         }
         
-        tx_id = tokenomics.create_transaction(
+        tx_id = state.execute(
+            'tokenomics',
+            'create_transaction',
             TransactionType.AI_VALIDATION,
             data['validator_address'],
             data['validator_address'],
@@ -325,30 +412,34 @@ def estimate_fee():
     try:
         data = request.get_json()
         
-        # Basic fee estimation
+        try:
+            amount = parse_amount(data.get('amount', 0))
+        except AmountError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Basic fee estimation, in wei
         tokenomics = current_app.config['NEURAX_TOKENOMICS']
-        base_fee = tokenomics.config.transaction_fee
+        base_fee = to_wei(tokenomics.config.transaction_fee)
         
         # Adjust fee based on transaction type and amount
         tx_type = data.get('type', 'transfer')
-        amount = Decimal(str(data.get('amount', 0)))
         
         if tx_type == 'stake':
-            fee = base_fee * Decimal("2")  # Higher fee for staking
+            fee = base_fee * 2  # Higher fee for staking
         elif tx_type == 'governance':
-            fee = base_fee * Decimal("1.5")  # Higher fee for governance
+            fee = base_fee * 3 // 2  # Higher fee for governance
         else:
             fee = base_fee
         
         # Add percentage-based fee for large amounts
-        if amount > Decimal("10000"):
-            fee += amount * Decimal("0.0001")  # 0.01% for large amounts
+        if amount > 10000 * WEI:
+            fee += amount // 10000  # 0.01% for large amounts
         
         return jsonify({
-            "estimated_fee": str(fee),
-            "base_fee": str(base_fee),
+            "estimated_fee": format_wei(fee),
+            "base_fee": format_wei(base_fee),
             "transaction_type": tx_type,
-            "amount": str(amount)
+            "amount": format_wei(amount)
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,285 @@
+import threading
+from collections import OrderedDict
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_EVEN, ROUND_UP
+
+# Quotes are rounded to the token's 18 decimals, always in the pool's
+# favour: outputs down and required inputs up
+AMOUNT_QUANTUM = Decimal(1).scaleb(-18)
+# Pool values are reported to the cent, rounded half to even
+VALUE_QUANTUM = Decimal('0.01')
+EXACT_IN = 'exact_in'
+EXACT_OUT = 'exact_out'
+
+
+class QuoteError(ValueError):
+    """Raised when a quote cannot be produced"""
+
+
+def amount_out_for(reserve_in, reserve_out, amount_in, fee_rate):
+    """Output of a constant-product swap for an exact input"""
+    amount_in_after_fee = amount_in * (1 - fee_rate)
+    amount_out = amount_in_after_fee * reserve_out / (reserve_in + amount_in_after_fee)
+    return amount_out.quantize(AMOUNT_QUANTUM, rounding=ROUND_DOWN)
+
+
+def amount_in_for(reserve_in, reserve_out, amount_out, fee_rate):
+    """Input a constant-product swap needs to produce an exact output"""
+    if amount_out >= reserve_out:
+        raise QuoteError("Insufficient liquidity")
+    amount_in = reserve_in * amount_out / ((reserve_out - amount_out) * (1 - fee_rate))
+    return amount_in.quantize(AMOUNT_QUANTUM, rounding=ROUND_UP)
+
+
+class _Hop:
+    __slots__ = ('pool_id', 'token_in', 'token_out', 'a_to_b')
+
+    def __init__(self, pool_id, token_in, token_out, a_to_b):
+        self.pool_id = pool_id
+        self.token_in = token_in
+        self.token_out = token_out
+        self.a_to_b = a_to_b
+
+
+class SwapRouter:
+    """Quotes and routes constant-product swaps across liquidity pools.
+
+    The token graph and the candidate paths between each token pair are
+    built once and only rebuilt when pools are added or removed; paths are
+    kept for the ``path_cache_size`` most recently quoted pairs. Best-route
+    quotes are cached per (pair, side, amount) together with the pools they
+    depend on; when a pool's reserves change, only the entries that route
+    through that pool are dropped.
+    """
+
+    def __init__(self, tokenomics, max_hops=3, cache_size=10000, path_cache_size=10000):
+        self.tokenomics = tokenomics
+        self.max_hops = max_hops
+        self.cache_size = cache_size
+        self.path_cache_size = path_cache_size
+        self._lock = threading.RLock()
+        self._pool_ids = None
+        self._graph = {}
+        self._paths = OrderedDict()
+        self._reserves = {}
+        self._quotes = OrderedDict()
+        self._quotes_by_pool = {}
+        self.hits = 0
+        self.misses = 0
+
+    def rebind(self, tokenomics):
+        """Quote against a newer copy of the pools, e.g. a reloaded replica"""
+        with self._lock:
+            self.tokenomics = tokenomics
+
+    def _refresh(self):
+        pools = self.tokenomics.liquidity_pools
+        if self._pool_ids != pools.keys():
+            self._build_graph(pools)
+
+        for pool_id, pool in pools.items():
+            reserves = (pool.reserve_a, pool.reserve_b, pool.fee_rate)
+            if self._reserves.get(pool_id) != reserves:
+                self._reserves[pool_id] = reserves
+                self._invalidate(pool_id)
+        return pools
+
+    def _build_graph(self, pools):
+        self._graph = {}
+        for pool_id, pool in pools.items():
+            self._graph.setdefault(pool.token_a, []).append(_Hop(pool_id, pool.token_a, pool.token_b, True))
+            self._graph.setdefault(pool.token_b, []).append(_Hop(pool_id, pool.token_b, pool.token_a, False))
+        self._pool_ids = set(pools.keys())
+        self._paths.clear()
+        self._reserves = {}
+        self._quotes.clear()
+        self._quotes_by_pool = {}
+
+    def _invalidate(self, pool_id):
+        for key in self._quotes_by_pool.pop(pool_id, ()):
+            self._quotes.pop(key, None)
+
+    def _check_max_hops(self, max_hops):
+        if max_hops is None:
+            return self.max_hops
+        if not 1 <= max_hops <= self.max_hops:
+            raise QuoteError(f"max_hops must be between 1 and {self.max_hops}")
+        return max_hops
+
+    def paths(self, token_in, token_out, max_hops=None):
+        """Every simple path of at most ``max_hops`` pools between two tokens"""
+        max_hops = self._check_max_hops(max_hops)
+        key = (token_in, token_out, max_hops)
+        with self._lock:
+            self._refresh()
+            if token_in not in self._graph or token_out not in self._graph:
+                return ()
+            paths = self._paths.get(key)
+            if paths is not None:
+                self._paths.move_to_end(key)
+                return paths
+            paths = self._paths[key] = self._find_paths(token_in, token_out, max_hops)
+            while len(self._paths) > self.path_cache_size:
+                self._paths.popitem(last=False)
+            return paths
+
+    def _find_paths(self, token_in, token_out, max_hops):
+        paths = []
+        stack = [(token_in, (), {token_in})]
+        while stack:
+            token, path, visited = stack.pop()
+            if len(path) == max_hops:
+                continue
+            for hop in self._graph.get(token, ()):
+                if hop.token_out == token_out:
+                    paths.append(path + (hop,))
+                elif hop.token_out not in visited:
+                    stack.append((hop.token_out, path + (hop,), visited | {hop.token_out}))
+        paths.sort(key=len)
+        return tuple(paths)
+
+    def _hop_reserves(self, hop):
+        reserve_a, reserve_b, fee_rate = self._reserves[hop.pool_id]
+        if hop.a_to_b:
+            return reserve_a, reserve_b, fee_rate
+        return reserve_b, reserve_a, fee_rate
+
+    def _evaluate(self, path, amount, side):
+        amounts = [amount]
+        if side == EXACT_IN:
+            for hop in path:
+                reserve_in, reserve_out, fee_rate = self._hop_reserves(hop)
+                amounts.append(amount_out_for(reserve_in, reserve_out, amounts[-1], fee_rate))
+        else:
+            for hop in reversed(path):
+                reserve_in, reserve_out, fee_rate = self._hop_reserves(hop)
+                amounts.append(amount_in_for(reserve_in, reserve_out, amounts[-1], fee_rate))
+            amounts.reverse()
+        return amounts
+
+    def _mid_price(self, path):
+        price = Decimal(1)
+        for hop in path:
+            reserve_in, reserve_out, _ = self._hop_reserves(hop)
+            price = price * reserve_out / reserve_in
+        return price
+
+    def _best(self, paths, amount, side):
+        best = None
+        for path in paths:
+            try:
+                amounts = self._evaluate(path, amount, side)
+            except (QuoteError, ArithmeticError):
+                continue
+            if amounts[-1] <= 0 or amounts[0] <= 0:
+                continue
+            if best is None or (amounts[-1] > best[1][-1] if side == EXACT_IN else amounts[0] < best[1][0]):
+                best = (path, amounts)
+        return best
+
+    def _quote_result(self, token_in, token_out, side, best):
+        path, amounts = best
+        mid_price = self._mid_price(path)
+        execution_price = amounts[-1] / amounts[0]
+        return {
+            "token_in": token_in,
+            "token_out": token_out,
+            "side": side,
+            "amount_in": amounts[0],
+            "amount_out": amounts[-1],
+            "route": [
+                {
+                    "pool_id": hop.pool_id,
+                    "token_in": hop.token_in,
+                    "token_out": hop.token_out,
+                    "amount_in": amounts[i],
+                    "amount_out": amounts[i + 1]
+                }
+                for i, hop in enumerate(path)
+            ],
+            "mid_price": mid_price,
+            "execution_price": execution_price,
+            "price_impact": 1 - execution_price / mid_price
+        }
+
+    def quote(self, token_in, token_out, amount, side=EXACT_IN, max_hops=None):
+        """Best route for swapping ``amount`` of ``token_in`` (or for
+        receiving ``amount`` of ``token_out`` when ``side`` is ``exact_out``).
+
+        Returns a dict with both amounts, per-hop amounts, mid and execution
+        price and price impact (fees included). Raises ``QuoteError`` if no
+        route works.
+        """
+        return self.quote_many(token_in, token_out, [amount], side, max_hops)[0]
+
+    def quote_many(self, token_in, token_out, amounts, side=EXACT_IN, max_hops=None):
+        """Quote several amounts for one pair, finding its paths only once"""
+        if side not in (EXACT_IN, EXACT_OUT):
+            raise QuoteError(f"Invalid side: {side}")
+        if token_in == token_out:
+            raise QuoteError("token_in and token_out must differ")
+        max_hops = self._check_max_hops(max_hops)
+
+        with self._lock:
+            paths = self.paths(token_in, token_out, max_hops)
+            if not paths:
+                raise QuoteError(f"No route from {token_in} to {token_out}")
+
+            quotes = []
+            for amount in amounts:
+                if amount <= 0:
+                    raise QuoteError("Amount must be positive")
+                key = (token_in, token_out, side, max_hops, amount)
+                quote = self._quotes.get(key)
+                if quote is not None:
+                    self._quotes.move_to_end(key)
+                    self.hits += 1
+                    quotes.append(quote)
+                    continue
+
+                self.misses += 1
+                best = self._best(paths, amount, side)
+                if best is None:
+                    raise QuoteError("Insufficient liquidity")
+                quote = self._quote_result(token_in, token_out, side, best)
+                self._remember(key, quote, paths)
+                quotes.append(quote)
+            return quotes
+
+    def _remember(self, key, quote, paths):
+        # The best route can change whenever any candidate pool moves, so
+        # the entry depends on every pool on every candidate path
+        self._quotes[key] = quote
+        for pool_id in {hop.pool_id for path in paths for hop in path}:
+            self._quotes_by_pool.setdefault(pool_id, set()).add(key)
+        while len(self._quotes) > self.cache_size:
+            old_key, _ = self._quotes.popitem(last=False)
+            for keys in self._quotes_by_pool.values():
+                keys.discard(old_key)
+
+    def spot_price(self, token, quote_token):
+        """Best mid price of ``token`` in ``quote_token``, or ``None``"""
+        if token == quote_token:
+            return Decimal(1)
+        with self._lock:
+            paths = self.paths(token, quote_token)
+            prices = [self._mid_price(path) for path in paths]
+        return max(prices) if prices else None
+
+    def pool_value(self, pool, quote_token):
+        """Value of both reserves of ``pool`` at their best mid prices in
+        ``quote_token``, or ``None`` when either side has no price"""
+        price_a = self.spot_price(pool.token_a, quote_token)
+        price_b = self.spot_price(pool.token_b, quote_token)
+        if price_a is None or price_b is None:
+            return None
+        value = pool.reserve_a * price_a + pool.reserve_b * price_b
+        return value.quantize(VALUE_QUANTUM, rounding=ROUND_HALF_EVEN)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_quotes": len(self._quotes),
+                "cached_pairs": len(self._paths),
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,97 @@
+import re
+from decimal import Decimal
+
+# Token amounts are integers counting 10**-18 NRX, matching the token's
+# declared decimals. Ledger math on these is plain int arithmetic; Decimal
+# only appears where an amount crosses into or out of the token engine.
+DECIMALS = 18
+WEI = 10 ** DECIMALS
+
+_AMOUNT_PATTERN = re.compile(r'([+-]?)(\d+)(?:\.(\d*))?|([+-]?)\.(\d+)')
+
+
+class AmountError(ValueError):
+    """An amount that is malformed or not representable in 18 decimals"""
+
+
+def parse_amount(value, field='amount', positive=False):
+    """Strictly parse an API amount into wei.
+
+    Accepts ints and decimal strings (``"12"``, ``"0.5"``) and JSON numbers
+    whose shortest form is one. Rejects booleans, exponents, NaN and
+    infinities, and anything with more than 18 fractional digits, rather
+    than rounding it.
+    """
+    if isinstance(value, bool):
+        raise AmountError(f"Invalid {field}: {value!r}")
+    if isinstance(value, int):
+        wei = value * WEI
+    else:
+        if isinstance(value, float):
+            # Shortest round-trip form, so 0.1 parses as 0.1
+            text = f"{Decimal(repr(value)):f}"
+        elif isinstance(value, str):
+            text = value.strip()
+        elif isinstance(value, Decimal):
+            text = f"{value:f}" if value.is_finite() else str(value)
+        else:
+            raise AmountError(f"Invalid {field}: {value!r}")
+        match = _AMOUNT_PATTERN.fullmatch(text)
+        if match is None:
+            raise AmountError(f"Invalid {field}: {value}")
+        sign, whole, fraction = (match.group(1, 2, 3) if match.group(2) is not None
+                                 else (match.group(4), '0', match.group(5)))
+        fraction = fraction or ''
+        if len(fraction) > DECIMALS:
+            fraction = fraction.rstrip('0')
+            if len(fraction) > DECIMALS:
+                raise AmountError(f"Invalid {field}: more than {DECIMALS} decimal places")
+        wei = int(whole) * WEI + int(fraction.ljust(DECIMALS, '0'))
+        if sign == '-':
+            wei = -wei
+    if positive and wei <= 0:
+        raise AmountError(f"Invalid {field}: must be positive")
+    return wei
+
+
+def to_wei(amount):
+    """Wei in a Decimal (or int) amount held by the token engine.
+
+    Exact for anything with up to 18 fractional digits; finer digits are
+    truncated toward zero. Never goes through a Decimal context, so the
+    result does not depend on context precision or rounding.
+    """
+    if isinstance(amount, int):
+        return amount * WEI
+    try:
+        sign, digits, exponent = Decimal(amount).as_tuple()
+    except (ArithmeticError, TypeError, ValueError):
+        raise AmountError(f"Invalid amount: {amount!r}") from None
+    if not isinstance(exponent, int):
+        raise AmountError(f"Invalid amount: {amount}")
+    value = int(''.join(map(str, digits)) or '0')
+    shift = exponent + DECIMALS
+    value = value * 10 ** shift if shift >= 0 else value // 10 ** -shift
+    return -value if sign else value
+
+
+def from_wei(value):
+    """Exact Decimal for a wei amount, for handing back to the token engine"""
+    if not value:
+        return Decimal(0)
+    digits = str(abs(value))
+    stripped = digits.rstrip('0')
+    # Drop trailing zeros by hand: normalize() would round to the context
+    exponent = min(len(digits) - len(stripped), DECIMALS)
+    digits = digits[:len(digits) - exponent]
+    return Decimal((int(value < 0), tuple(map(int, digits)), exponent - DECIMALS))
+
+
+def format_wei(value):
+    """Plain decimal string of a wei amount, without trailing zeros"""
+    whole, fraction = divmod(abs(value), WEI)
+    text = str(whole)
+    if fraction:
+        text += '.' + str(fraction).rjust(DECIMALS, '0').rstrip('0')
+    return '-' + text if value < 0 else text
+
@@ -0,0 +1,160 @@
+from array import array
+from bisect import bisect_left
+
+from src.services.followers import ChainFollower
+from src.services.json_provider import confirmed_objects
+
+# Transactions are addressed by (block height, position in block), packed
+# into a single unsigned 64-bit key so the index can live in flat arrays.
+POSITION_BITS = 24
+POSITION_MASK = (1 << POSITION_BITS) - 1
+
+# Hash tables are keyed by a truncated binary digest rather than the hex
+# string; every hit is verified against the full hash of the stored object.
+DIGEST_BYTES = 16
+
+
+def digest_key(hash_value):
+    """Compact dictionary key for a block or transaction hash"""
+    try:
+        return bytes.fromhex(hash_value)[:DIGEST_BYTES]
+    except (TypeError, ValueError):
+        return hash_value
+
+
+def encode_cursor(key):
+    """Encode a packed transaction key as a ``height:position`` cursor"""
+    return f"{key >> POSITION_BITS}:{key & POSITION_MASK}"
+
+
+def decode_cursor(cursor):
+    """Decode a ``height:position`` cursor into a packed transaction key"""
+    try:
+        height, position = cursor.split(':')
+        height, position = int(height), int(position)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if height < 0 or not 0 <= position <= POSITION_MASK:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return (height << POSITION_BITS) | position
+
+
+class ChainIndex(ChainFollower):
+    """Transaction and hash index over confirmed blocks.
+
+    Keeps every transaction key in chain order plus a secondary index of
+    keys per ``from_address``/``to_address``. Both are append-only arrays
+    extended as blocks are appended, so deep and address-filtered pages are
+    answered with a bisect and a slice instead of a full chain scan.
+
+    Block and transaction hashes map to a block height or packed key through
+    dictionaries keyed by ``digest_key``; hashes whose truncated digest
+    collides with an earlier one fall back to an overflow dictionary, one
+    per table, keyed by the full hash.
+    """
+
+    def __init__(self, blockchain):
+        super().__init__(blockchain)
+        self._keys = array('Q')
+        self._by_address = {}
+        self._block_hashes = {}
+        self._tx_hashes = {}
+        self._block_collisions = {}
+        self._tx_collisions = {}
+
+    def _apply_block(self, height, block):
+        self._add_hash(self._block_hashes, self._block_collisions, block.hash, height)
+
+        base = height << POSITION_BITS
+        for position, tx in enumerate(block.transactions):
+            key = base | position
+            self._keys.append(key)
+            self._add(tx.from_address, key)
+            if tx.to_address != tx.from_address:
+                self._add(tx.to_address, key)
+
+            tx_hash = getattr(tx, 'hash', None)
+            if tx_hash:
+                self._add_hash(self._tx_hashes, self._tx_collisions, tx_hash, key)
+
+    def _add_hash(self, table, collisions, hash_value, value):
+        key = digest_key(hash_value)
+        if key in table:
+            collisions[hash_value] = value
+        else:
+            table[key] = value
+
+    def _add(self, address, key):
+        keys = self._by_address.get(address)
+        if keys is None:
+            keys = self._by_address[address] = array('Q')
+        keys.append(key)
+
+    def _lookup(self, key):
+        block = self.blockchain.blocks[key >> POSITION_BITS]
+        return block.transactions[key & POSITION_MASK]
+
+    def get_block(self, block_hash):
+        """Look up a confirmed block by hash, or ``None``"""
+        self.sync()
+        height = self._block_hashes.get(digest_key(block_hash))
+        if height is not None:
+            block = self.blockchain.blocks[height]
+            if block.hash == block_hash:
+                return block
+        height = self._block_collisions.get(block_hash)
+        return None if height is None else self.blockchain.blocks[height]
+
+    def locate(self, tx_hash):
+        """Return ``(height, position)`` of a confirmed transaction, or ``None``"""
+        self.sync()
+        key = self._tx_hashes.get(digest_key(tx_hash))
+        if key is None or self._lookup(key).hash != tx_hash:
+            key = self._tx_collisions.get(tx_hash)
+        if key is None:
+            return None
+        return key >> POSITION_BITS, key & POSITION_MASK
+
+    def get_transaction(self, tx_hash):
+        """Look up a confirmed transaction by hash, or ``None``"""
+        location = self.locate(tx_hash)
+        if location is None:
+            return None
+        height, position = location
+        return self.blockchain.blocks[height].transactions[position]
+
+    def count(self, address=None):
+        """Number of confirmed transactions, optionally for one address"""
+        self.sync()
+        if address is None:
+            return len(self._keys)
+        return len(self._by_address.get(address, ()))
+
+    def page(self, limit, address=None, page=1, before=None, after=None):
+        """Return one page of confirmed transactions, newest first.
+
+        ``before`` and ``after`` are ``height:position`` cursors; when
+        neither is given the classic ``page`` offset is used. Returns the
+        transactions, already encoded as JSON, together with the cursors for the next (older) and
+        previous (newer) pages, each ``None`` when there is nothing further.
+        """
+        self.sync()
+        keys = self._keys if address is None else self._by_address.get(address, array('Q'))
+
+        if before is not None:
+            end = bisect_left(keys, decode_cursor(before))
+            start = max(0, end - limit)
+        elif after is not None:
+            start = bisect_left(keys, decode_cursor(after) + 1)
+            end = min(len(keys), start + limit)
+        else:
+            end = max(0, len(keys) - (page - 1) * limit)
+            start = max(0, end - limit)
+
+        selected = keys[start:end]
+        selected.reverse()
+
+        transactions = confirmed_objects.encoded_list(self._lookup(key) for key in selected)
+        next_cursor = encode_cursor(selected[-1]) if selected and start > 0 else None
+        prev_cursor = encode_cursor(selected[0]) if selected and end < len(keys) else None
+        return transactions, next_cursor, prev_cursor
@@ -0,0 +1,94 @@
+import time
+from collections import deque
+
+from src.services.followers import ChainFollower
+
+FRAUD_SCORE_THRESHOLD = 50
+
+
+class _Window:
+    """Running count, score sum and fraud count over a sliding window"""
+
+    def __init__(self):
+        self.entries = deque()
+        self.total_score = 0
+        self.fraud_detected = 0
+
+    def push(self, timestamp, score):
+        self.entries.append((timestamp, score))
+        self.total_score += score
+        if score < FRAUD_SCORE_THRESHOLD:
+            self.fraud_detected += 1
+
+    def pop(self):
+        _, score = self.entries.popleft()
+        self.total_score -= score
+        if score < FRAUD_SCORE_THRESHOLD:
+            self.fraud_detected -= 1
+
+
+def summarize(total_validations, total_score, fraud_detected):
+    """Build the AI validation stats payload from running totals"""
+    avg_score = total_score / max(1, total_validations)
+    return {
+        "total_validations": total_validations,
+        "average_ai_score": round(avg_score, 2),
+        "fraud_attempts_detected": fraud_detected,
+        "fraud_detection_rate": round((fraud_detected / max(1, total_validations)) * 100, 2),
+        "ai_consensus_accuracy": round(avg_score, 2)
+    }
+
+
+class ValidationStats(ChainFollower):
+    """Streaming AI validation statistics over the chain.
+
+    Keeps all-time count, score sum and fraud count, plus the same totals
+    over the last ``recent_blocks`` blocks and the last ``recent_seconds``
+    seconds of block time. Everything is updated as blocks are appended, so
+    reading the stats never rescans the chain.
+    """
+
+    def __init__(self, blockchain, recent_blocks=100, recent_seconds=3600):
+        super().__init__(blockchain)
+        self.recent_blocks = recent_blocks
+        self.recent_seconds = recent_seconds
+        self.total_validations = 0
+        self.total_score = 0
+        self.fraud_detected = 0
+        self._by_blocks = _Window()
+        self._by_time = _Window()
+
+    def _apply_block(self, height, block):
+        if not hasattr(block, 'ai_validation_score'):
+            return
+
+        score = block.ai_validation_score
+        self.total_validations += 1
+        self.total_score += score
+        if score < FRAUD_SCORE_THRESHOLD:
+            self.fraud_detected += 1
+
+        self._by_blocks.push(block.timestamp, score)
+        if len(self._by_blocks.entries) > self.recent_blocks:
+            self._by_blocks.pop()
+        self._by_time.push(block.timestamp, score)
+
+    def stats(self):
+        """All-time stats plus the block-count and time windows"""
+        self.sync()
+        with self._lock:
+            cutoff = time.time() - self.recent_seconds
+            window = self._by_time
+            while window.entries and window.entries[0][0] < cutoff:
+                window.pop()
+
+            stats = summarize(self.total_validations, self.total_score, self.fraud_detected)
+            stats["recent_blocks"] = dict(
+                summarize(len(self._by_blocks.entries), self._by_blocks.total_score, self._by_blocks.fraud_detected),
+                window_blocks=self.recent_blocks
+            )
+            stats["recent_time"] = dict(
+                summarize(len(window.entries), window.total_score, window.fraud_detected),
+                window_seconds=self.recent_seconds
+            )
+            return stats
@@ -0,0 +1,632 @@
+from array import array
+from collections.abc import ItemsView, MutableMapping, Sequence
+from decimal import Context, Decimal
+from weakref import ref
+
+# Amounts are stored as fixed-point integers with 18 decimals, split into a
+# signed high and an unsigned low 64-bit word
+AMOUNT_SCALE = 18
+_LOW_MASK = (1 << 64) - 1
+_WIDE = Context(prec=200)
+_POW10 = [10 ** i for i in range(AMOUNT_SCALE + 1)]
+
+# Distinct strings a table interns; later ones are kept per row instead, so
+# a stream of new addresses cannot grow the intern table without bound
+MAX_STRINGS = 1 << 18
+
+FIXED = 'fixed'
+FLOAT = 'float'
+STRING = 'string'
+CODE = 'code'
+OBJECT = 'object'
+
+
+def HEX(size):
+    """Column kind for lowercase hex strings of ``size`` bytes"""
+    return ('hex', size)
+
+
+# Account addresses are unique, so they are referenced rather than interned
+ACCOUNT_SCHEMA = (
+    ('address', OBJECT),
+    ('balance', FIXED),
+    ('staked_amount', FIXED),
+    ('locked_amount', FIXED),
+    ('ai_score', FLOAT),
+    ('reputation_score', FLOAT),
+    ('last_activity', FLOAT)
+)
+
+LEDGER_TRANSACTION_SCHEMA = (
+    ('tx_id', HEX(16)),
+    ('tx_type', CODE),
+    ('from_address', STRING),
+    ('to_address', STRING),
+    ('amount', FIXED),
+    ('data', OBJECT),
+    ('timestamp', FLOAT)
+)
+
+BLOCK_TRANSACTION_SCHEMA = (
+    ('hash', HEX(32)),
+    ('from_address', STRING),
+    ('to_address', STRING),
+    ('amount', FIXED),
+    ('data', OBJECT),
+    ('timestamp', FLOAT)
+)
+
+
+class _Marker:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):
+        # Unpickle to the same module-level object so identity checks hold
+        return self.name
+
+
+# Markers stored instead of a value: an empty dict (decoded to a new one)
+# and an attribute the original object did not have
+_EMPTY = _Marker('_EMPTY')
+_ABSENT = _Marker('_ABSENT')
+
+
+def to_fixed(value):
+    """``(fixed-point integer, exponent)`` of a Decimal, or ``None`` if it
+    cannot be stored exactly (more than 18 decimals, a positive exponent,
+    negative zero, non-finite or out of 128-bit range)"""
+    if type(value) is not Decimal or not value.is_finite():
+        return None
+    exponent = value.as_tuple().exponent
+    if not -AMOUNT_SCALE <= exponent <= 0 or (value.is_signed() and not value):
+        return None
+    fixed = int(value.scaleb(AMOUNT_SCALE, _WIDE))
+    if not -(1 << 127) <= fixed < (1 << 127):
+        return None
+    return fixed, exponent
+
+
+def from_fixed(fixed, exponent):
+    """Decimal with the value and exponent given to ``to_fixed``"""
+    return Decimal(fixed // _POW10[AMOUNT_SCALE + exponent]).scaleb(exponent, _WIDE)
+
+
+class RecordTable:
+    """Struct-of-arrays storage for objects that share a set of attributes.
+
+    Each schema attribute gets a typed column: fixed-point amounts, floats,
+    interned strings, small enumerations (up to 255 distinct values), fixed
+    width hex digests or plain object references. A value that does not fit
+    its column exactly, and any attribute outside the schema, is kept in a
+    per-row extras dict, so every object round-trips unchanged. Interned
+    strings are never freed, so at most ``max_strings`` are interned and
+    the rest go to extras like any other value that does not fit.
+
+    ``adopt`` moves an object's attributes into a row and turns the object
+    itself into a ``RecordView`` of that row. Live views are tracked weakly,
+    so ``view`` hands out the same object for a row for as long as anything
+    holds on to it.
+    """
+
+    def __init__(self, schema, max_strings=MAX_STRINGS):
+        self.schema = tuple(schema)
+        self.max_strings = max_strings
+        self._kinds = dict(self.schema)
+        self._columns = {}
+        for name, kind in self.schema:
+            if kind == FIXED:
+                self._columns[name] = (array('q'), array('Q'), array('b'))
+            elif kind == FLOAT:
+                self._columns[name] = array('d')
+            elif kind in (STRING, CODE):
+                self._columns[name] = array('I' if kind == STRING else 'B')
+            elif kind == OBJECT:
+                self._columns[name] = []
+            else:
+                self._columns[name] = bytearray()
+        self._strings = []
+        self._string_ids = {}
+        self._codes = {name: ([], {}) for name, kind in self.schema if kind == CODE}
+        self._classes = []
+        self._class_codes = array('B')
+        self._extras = []
+        self._setup()
+
+    def _setup(self):
+        self._views = {}
+        self._view_classes = {}
+        self._getters = {name: self._getter(name, kind) for name, kind in self.schema}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_views'], state['_view_classes'], state['_getters']
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('max_strings', MAX_STRINGS)
+        self.__dict__.update(state)
+        self._setup()
+
+    def _getter(self, name, kind):
+        column = self._columns[name]
+        if kind == FIXED:
+            high, low, exponents = column
+
+            def get(row):
+                return from_fixed((high[row] << 64) | low[row], exponents[row])
+        elif kind == FLOAT:
+            get = column.__getitem__
+        elif kind == STRING:
+            strings = self._strings
+
+            def get(row):
+                return strings[column[row]]
+        elif kind == CODE:
+            values = self._codes[name][0]
+
+            def get(row):
+                return values[column[row]]
+        elif kind == OBJECT:
+            def get(row):
+                value = column[row]
+                return {} if value is _EMPTY else value
+        else:
+            size = kind[1]
+
+            def get(row):
+                return column[row * size:(row + 1) * size].hex()
+        return get
+
+    def __len__(self):
+        return len(self._extras)
+
+    def allocate(self):
+        """Add an empty row and return it"""
+        row = len(self._extras)
+        for name, kind in self.schema:
+            column = self._columns[name]
+            if kind == FIXED:
+                for part in column:
+                    part.append(0)
+            elif kind == OBJECT:
+                column.append(None)
+            elif kind[0] == 'hex':
+                column.extend(bytes(kind[1]))
+            else:
+                column.append(0)
+        self._class_codes.append(0)
+        self._extras.append(None)
+        return row
+
+    def append(self, obj):
+        """Adopt an object into a new row and return the row"""
+        row = self.allocate()
+        self.adopt(row, obj)
+        return row
+
+    def store(self, row, obj):
+        """Overwrite a row with the attributes of ``obj``"""
+        attrs = vars(obj)
+        cls = type(obj)
+        if cls not in self._classes:
+            self._classes.append(cls)
+        self._class_codes[row] = self._classes.index(cls)
+        self._extras[row] = None
+        for name, _ in self.schema:
+            self.set(row, name, attrs.get(name, _ABSENT))
+        for name, value in attrs.items():
+            if name not in self._kinds:
+                self._set_extra(row, name, value)
+
+    def adopt(self, row, obj):
+        """Store ``obj`` in ``row`` and make it a live view of the row.
+
+        Afterwards the object's attributes read and write the row, and it
+        is still an instance of its class. An object whose class cannot be
+        swapped keeps its own attributes and the row holds a copy.
+        """
+        self.store(row, obj)
+        try:
+            obj.__class__ = self._view_class(type(obj))
+        except TypeError:
+            return
+        attrs = obj.__dict__
+        attrs.clear()
+        attrs['_compact_table'] = self
+        attrs['_compact_row'] = row
+        self._track(obj, row)
+
+    def _view_class(self, cls):
+        view_class = self._view_classes.get(cls)
+        if view_class is None:
+            view_class = self._view_classes[cls] = _view_class(cls, self.schema)
+        return view_class
+
+    def view(self, row):
+        """The live view of ``row``, creating one if none is held"""
+        view_ref = self._views.get(row)
+        obj = view_ref() if view_ref is not None else None
+        if obj is None:
+            cls = self.record_class(row)
+            obj = cls.__new__(self._view_class(cls))
+            attrs = obj.__dict__
+            attrs['_compact_table'] = self
+            attrs['_compact_row'] = row
+            self._track(obj, row)
+        return obj
+
+    def _track(self, obj, row):
+        view_ref = self._views[row] = _ViewRef(obj, self._forget)
+        view_ref.row = row
+
+    def _forget(self, view_ref):
+        if self._views.get(view_ref.row) is view_ref:
+            del self._views[view_ref.row]
+
+    def release(self, row):
+        """Empty a row; a live view of it becomes a plain object again"""
+        view_ref = self._views.pop(row, None)
+        obj = view_ref() if view_ref is not None else None
+        if obj is not None:
+            attrs = self._attributes(row)
+            object.__setattr__(obj, '__class__', self.record_class(row))
+            obj.__dict__.clear()
+            obj.__dict__.update(attrs)
+        for name, kind in self.schema:
+            if kind == OBJECT:
+                self._columns[name][row] = None
+        self._extras[row] = None
+
+    def record_class(self, row):
+        return self._classes[self._class_codes[row]]
+
+    def _set_extra(self, row, name, value):
+        extras = self._extras[row]
+        if extras is None:
+            extras = self._extras[row] = {}
+        extras[name] = value
+
+    def set(self, row, name, value):
+        kind = self._kinds.get(name)
+        if kind is not None and value is not _ABSENT and self._encode(row, name, kind, value):
+            extras = self._extras[row]
+            if extras is not None:
+                extras.pop(name, None)
+                if not extras:
+                    self._extras[row] = None
+        else:
+            self._set_extra(row, name, value)
+
+    def _encode(self, row, name, kind, value):
+        column = self._columns[name]
+        if kind == FIXED:
+            encoded = to_fixed(value)
+            if encoded is None:
+                return False
+            fixed, exponent = encoded
+            column[0][row] = fixed >> 64
+            column[1][row] = fixed & _LOW_MASK
+            column[2][row] = exponent
+        elif kind == FLOAT:
+            if type(value) is not float:
+                return False
+            column[row] = value
+        elif kind == STRING:
+            if type(value) is not str:
+                return False
+            string_id = self._string_ids.get(value)
+            if string_id is None:
+                if len(self._strings) >= self.max_strings:
+                    return False
+                string_id = self._string_ids[value] = len(self._strings)
+                self._strings.append(value)
+            column[row] = string_id
+        elif kind == CODE:
+            values, codes = self._codes[name]
+            try:
+                code = codes.get((type(value), value))
+            except TypeError:
+                return False
+            if code is None:
+                if len(values) >= 256:
+                    return False
+                code = codes[(type(value), value)] = len(values)
+                values.append(value)
+            column[row] = code
+        elif kind == OBJECT:
+            column[row] = _EMPTY if type(value) is dict and not value else value
+        else:
+            size = kind[1]
+            if type(value) is not str or len(value) != 2 * size:
+                return False
+            try:
+                raw = bytes.fromhex(value)
+            except ValueError:
+                return False
+            if raw.hex() != value:
+                return False
+            column[row * size:(row + 1) * size] = raw
+        return True
+
+    def get(self, row, name):
+        extras = self._extras[row]
+        if extras is not None and name in extras:
+            value = extras[name]
+            if value is _ABSENT:
+                raise AttributeError(name)
+            return value
+
+        getter = self._getters.get(name)
+        if getter is None:
+            raise AttributeError(name)
+        return getter(row)
+
+    def _attributes(self, row):
+        attrs = {}
+        for name, _ in self.schema:
+            try:
+                attrs[name] = self.get(row, name)
+            except AttributeError:
+                pass
+        extras = self._extras[row]
+        if extras is not None:
+            attrs.update((name, value) for name, value in extras.items() if value is not _ABSENT)
+        return attrs
+
+    def materialize(self, row):
+        """Rebuild a plain, detached instance of the original class from a row"""
+        cls = self.record_class(row)
+        obj = cls.__new__(cls)
+        obj.__dict__.update(self._attributes(row))
+        return obj
+
+
+class _ViewRef(ref):
+    # Weak reference that remembers which row its view belongs to
+    __slots__ = ('row',)
+
+
+class RecordView:
+    """Mixin that makes an object read and write one row of a ``RecordTable``.
+
+    ``RecordTable.adopt`` swaps an object's class for a subclass of its own
+    class with this mixin in front, so the object keeps its identity,
+    methods and ``isinstance`` checks while its attributes live in the
+    table's columns; changes through any reference to it are kept.
+    """
+
+    def __getattr__(self, name):
+        attrs = object.__getattribute__(self, '__dict__')
+        try:
+            return attrs['_compact_table'].get(attrs['_compact_row'], name)
+        except (AttributeError, KeyError):
+            pass
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        attrs = object.__getattribute__(self, '__dict__')
+        attrs['_compact_table'].set(attrs['_compact_row'], name, value)
+
+    def __delattr__(self, name):
+        attrs = object.__getattribute__(self, '__dict__')
+        table, row = attrs['_compact_table'], attrs['_compact_row']
+        table.get(row, name)
+        table.set(row, name, _ABSENT)
+
+    def __copy__(self):
+        attrs = object.__getattribute__(self, '__dict__')
+        return attrs['_compact_table'].materialize(attrs['_compact_row'])
+
+    def __reduce_ex__(self, protocol):
+        # Pickled with its table the view resolves to that table's row;
+        # pickled on its own it drags the table along
+        attrs = object.__getattribute__(self, '__dict__')
+        return _table_view, (attrs['_compact_table'], attrs['_compact_row'])
+
+
+_VIEW_CLASSES = {}
+
+
+def _column_property(name):
+    def fget(self):
+        attrs = self.__dict__
+        table = attrs['_compact_table']
+        row = attrs['_compact_row']
+        extras = table._extras[row]
+        if extras is not None and name in extras:
+            return table.get(row, name)
+        return table._getters[name](row)
+
+    def fset(self, value):
+        attrs = self.__dict__
+        attrs['_compact_table'].set(attrs['_compact_row'], name, value)
+
+    def fdel(self):
+        RecordView.__delattr__(self, name)
+
+    return property(fget, fset, fdel)
+
+
+def _view_class(cls, schema):
+    # Schema attributes get a property each, so reading a column costs a
+    # function call rather than a failed lookup and ``__getattr__``
+    view_class = _VIEW_CLASSES.get((cls, schema))
+    if view_class is None:
+        namespace = {name: _column_property(name) for name, _ in schema}
+        namespace.update(__slots__=(), __module__=cls.__module__, __qualname__=cls.__qualname__)
+        view_class = _VIEW_CLASSES[(cls, schema)] = type(cls.__name__, (RecordView, cls), namespace)
+    return view_class
+
+
+def _table_view(table, row):
+    return table.view(row)
+
+
+def _location(obj):
+    if isinstance(obj, RecordView):
+        attrs = object.__getattribute__(obj, '__dict__')
+        return attrs['_compact_table'], attrs['_compact_row']
+    return None, None
+
+
+def _encode_key(key):
+    # Hex digest keys (transaction ids) are held as bytes, half the size
+    if type(key) is str and len(key) % 2 == 0:
+        try:
+            raw = bytes.fromhex(key)
+        except ValueError:
+            return key
+        if raw.hex() == key:
+            return raw
+    return key
+
+
+def _decode_key(key):
+    return key.hex() if type(key) is bytes else key
+
+
+class _Items(ItemsView):
+    def __iter__(self):
+        for key in self._mapping._index:
+            yield _decode_key(key), self._mapping._view(key)
+
+    def __reversed__(self):
+        for key in reversed(self._mapping._index):
+            yield _decode_key(key), self._mapping._view(key)
+
+
+class CompactMapping(MutableMapping):
+    """Insertion-ordered dict whose values live in a ``RecordTable``.
+
+    A stored object becomes a live view of its row (see ``RecordView``):
+    the mapping hands the same object back, and changes made through it,
+    or through any other reference to it, are kept. An object backs one
+    row only, so storing a view that already backs another row (of this
+    or another mapping) stores a copy. Deleting or replacing a key turns
+    its object back into a plain one. Supports
+    ``reversed(mapping.items())`` like a dict.
+    """
+
+    def __init__(self, schema, items=()):
+        self._table = RecordTable(schema)
+        self._index = {}
+        self._free = []
+        for key, value in items:
+            self[key] = value
+
+    def _view(self, encoded_key):
+        return self._table.view(self._index[encoded_key])
+
+    def __getitem__(self, key):
+        return self._view(_encode_key(key))
+
+    def __setitem__(self, key, value):
+        encoded = _encode_key(key)
+        row = self._index.get(encoded)
+        table, value_row = _location(value)
+        if table is self._table and value_row == row:
+            return
+        if table is not None:
+            value = table.materialize(value_row)
+
+        if row is not None:
+            self._table.release(row)
+        elif self._free:
+            row = self._index[encoded] = self._free.pop()
+        else:
+            row = self._index[encoded] = self._table.allocate()
+        self._table.adopt(row, value)
+
+    def __delitem__(self, key):
+        row = self._index.pop(_encode_key(key))
+        self._table.release(row)
+        self._free.append(row)
+
+    def __contains__(self, key):
+        return _encode_key(key) in self._index
+
+    def __iter__(self):
+        for key in self._index:
+            yield _decode_key(key)
+
+    def __reversed__(self):
+        for key in reversed(self._index):
+            yield _decode_key(key)
+
+    def __len__(self):
+        return len(self._index)
+
+    def items(self):
+        return _Items(self)
+
+    @property
+    def table(self):
+        return self._table
+
+
+class CompactList(Sequence):
+    """Append-only list whose items live in a ``RecordTable``.
+
+    Appended objects become live views of their rows, as in
+    ``CompactMapping``.
+    """
+
+    def __init__(self, schema, items=()):
+        self._table = RecordTable(schema)
+        for item in items:
+            self.append(item)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._table.view(row) for row in range(len(self._table))[index]]
+        if index < 0:
+            index += len(self._table)
+        if not 0 <= index < len(self._table):
+            raise IndexError("list index out of range")
+        return self._table.view(index)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __iter__(self):
+        for row in range(len(self._table)):
+            yield self._table.view(row)
+
+    def append(self, item):
+        table, row = _location(item)
+        if table is not None:
+            item = table.materialize(row)
+        self._table.append(item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    @property
+    def table(self):
+        return self._table
+
+
+def compact_tokenomics(tokenomics):
+    """Move accounts and the ledger of a tokenomics instance into compact
+    storage; does nothing for parts that are already compact"""
+    token_contract = tokenomics.token_contract
+    if not isinstance(token_contract.accounts, CompactMapping):
+        token_contract.accounts = CompactMapping(ACCOUNT_SCHEMA, token_contract.accounts.items())
+    if not isinstance(tokenomics.transactions, CompactMapping):
+        tokenomics.transactions = CompactMapping(LEDGER_TRANSACTION_SCHEMA, tokenomics.transactions.items())
+
+
+def compact_blocks(blockchain, start=0):
+    """Move the transactions of blocks from height ``start`` into compact
+    storage; returns the height to continue from"""
+    blocks = blockchain.blocks
+    end = len(blocks)
+    for height in range(start, end):
+        block = blocks[height]
+        if not isinstance(block.transactions, CompactList):
+            block.transactions = CompactList(BLOCK_TRANSACTION_SCHEMA, block.transactions)
+    return end
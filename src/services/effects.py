@@ -0,0 +1,168 @@
+import copy
+import pickle
+from collections.abc import Mapping
+from itertools import islice
+
+from src.services.compact import RecordView
+
+
+class EffectsMismatch(Exception):
+    """A replayed command created different records than the journaled run"""
+
+
+def _ledger(state):
+    return state.tokenomics.transactions
+
+
+def _staking_positions(state):
+    return state.tokenomics.staking_contract.staking_positions
+
+
+def _proposals(state):
+    return state.tokenomics.governance_contract.proposals
+
+
+def _blocks(state):
+    return state.blockchain.blocks
+
+
+def _reward_rates(state):
+    return state.reward_rates
+
+
+# Containers commands add records to, in the order they are restored
+CONTAINERS = (
+    ('ledger', _ledger),
+    ('staking_positions', _staking_positions),
+    ('proposals', _proposals),
+    ('blocks', _blocks),
+    ('reward_rates', _reward_rates)
+)
+
+# Commands whose result is the id of a record outside the containers, and
+# the engine call that looks it up
+RESULT_LOOKUPS = {
+    ('blockchain', 'create_transaction'): ('blockchain', 'get_transaction_by_hash')
+}
+
+
+class CommandEffects:
+    """Records created by engine commands, journaled so replay reproduces them.
+
+    Engine calls stamp what they create with ``time.time()`` and name it
+    with ``uuid.uuid4()``, so running a journaled command again changes the
+    same balances and counters but creates records under other ids and
+    timestamps. ``mark`` notes the size of each container in ``CONTAINERS``
+    before a command; ``capture`` pickles what the command appended, plus
+    the record a ``RESULT_LOOKUPS`` command returned the id of. On replay
+    the command runs again and ``restore`` gives the records it created the
+    journaled contents and keys: objects are updated in place, so
+    references the engine holds stay valid. Nothing outside the engine is
+    patched.
+
+    Only appended records are covered. Timestamps the engine writes onto
+    existing objects, such as an account's last activity, are left as the
+    replay produced them.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def _containers(self):
+        for name, read in CONTAINERS:
+            try:
+                yield name, read(self.state)
+            except AttributeError:
+                yield name, None
+
+    def mark(self):
+        """Container sizes before a command"""
+        return [None if container is None else len(container) for _, container in self._containers()]
+
+    def _added(self, container, size):
+        # (key, record) pairs for mappings, records for lists
+        count = len(container) - size
+        if count <= 0:
+            return []
+        if isinstance(container, Mapping):
+            return list(islice(reversed(container.items()), count))[::-1]
+        return list(container[size:])
+
+    def _result_record(self, target, method, result):
+        lookup = RESULT_LOOKUPS.get((target, method))
+        if lookup is None or not isinstance(result, str):
+            return None
+        root, name = lookup
+        return getattr(getattr(self.state, root), name)(result)
+
+    def capture(self, marks, target, method, result):
+        """Pickled records created since ``marks``, or ``None`` if there are none"""
+        added = {}
+        for (name, container), size in zip(self._containers(), marks):
+            if container is not None and size is not None:
+                entries = self._added(container, size)
+                if entries and isinstance(container, Mapping):
+                    added[name] = [(key, _detached(value)) for key, value in entries]
+                elif entries:
+                    added[name] = [_detached(value) for value in entries]
+        record = self._result_record(target, method, result)
+        if not added and record is None:
+            return None
+        return pickle.dumps((added, result, _detached(record)), pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, marks, target, method, result, journaled):
+        """Give the records a replay created their journaled contents.
+
+        Returns ``{replayed id: journaled id}`` for the renamed records;
+        raises ``EffectsMismatch`` if the replay created other records.
+        """
+        added, journaled_result, journaled_record = pickle.loads(journaled) if journaled else ({}, None, None)
+        renames = {}
+        touched = False
+        for (name, container), size in zip(self._containers(), marks):
+            entries = added.get(name, [])
+            replayed = [] if container is None or size is None else self._added(container, size)
+            if len(replayed) != len(entries):
+                raise EffectsMismatch(f"{name}: replay created {len(replayed)} records, journaled {len(entries)}")
+            if not entries:
+                continue
+            touched = True
+            if isinstance(container, Mapping):
+                for key, _ in replayed:
+                    del container[key]
+                for (key, value), (journaled_key, journaled_value) in zip(replayed, entries):
+                    container[journaled_key] = _assign(value, journaled_value)
+                    if key != journaled_key:
+                        renames[key] = journaled_key
+            else:
+                for i, (value, journaled_value) in enumerate(zip(replayed, entries)):
+                    container[size + i] = _assign(value, journaled_value)
+
+        if journaled_record is not None or (touched and (target, method) in RESULT_LOOKUPS):
+            record = self._result_record(target, method, result)
+            if record is not None and journaled_record is not None:
+                _assign(record, journaled_record)
+            if result != journaled_result:
+                renames[result] = journaled_result
+        return renames
+
+
+def _detached(record):
+    # Compact views pickle with their whole table; journal a plain copy
+    return copy.copy(record) if isinstance(record, RecordView) else record
+
+
+def _assign(obj, journaled):
+    """``obj`` with the contents of ``journaled``, in place where the type allows"""
+    if type(obj) is not type(journaled):
+        return journaled
+    if isinstance(obj, dict):
+        obj.clear()
+        obj.update(journaled)
+        return obj
+    state = getattr(obj, '__dict__', None)
+    if state is None or hasattr(type(obj), '__slots__'):
+        return journaled
+    state.clear()
+    state.update(journaled.__dict__)
+    return obj
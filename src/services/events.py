@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import math
+import queue
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+
+from src.services.followers import ChainFollower, LedgerFollower
+from src.services.governance import GOVERNANCE_TARGETS, named_proposal
+from src.services.json_provider import confirmed_objects
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('blocks', 'address', 'proposals')
+
+
+def parse_topics(value):
+    """Parse ``blocks,address:NX...,proposals,proposal:<id>`` into a filter.
+
+    Returns a set of ``(topic, key)`` pairs where ``key`` is ``None`` for a
+    whole topic. Raises ``ValueError`` for unknown topics.
+    """
+    subscriptions = set()
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        topic, _, key = item.partition(':')
+        if topic == 'proposal':
+            topic = 'proposals'
+        if topic not in TOPICS:
+            raise ValueError(f"Unknown topic: {topic}")
+        subscriptions.add((topic, key or None))
+    if not subscriptions:
+        raise ValueError("At least one topic is required")
+    return subscriptions
+
+
+def format_event_id(cursor):
+    """Render an event cursor as the ``<sequence>:<index>`` id clients see"""
+    return f"{cursor[0]}:{cursor[1]}"
+
+
+def parse_event_id(value):
+    """Parse an id from ``format_event_id`` (or a bare state sequence)"""
+    sequence, _, index = str(value).partition(':')
+    try:
+        return int(sequence), int(index or 0)
+    except ValueError:
+        raise ValueError(f"Invalid event id: {value}") from None
+
+
+def parse_timeout(value, maximum):
+    """Parse a long-poll ``timeout`` in seconds, clamped to ``maximum``.
+
+    Raises ``ValueError`` for anything that is not a finite, non-negative
+    number, which would otherwise wait forever or fail inside the wait.
+    """
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid timeout: {value}") from None
+    if not math.isfinite(timeout) or timeout < 0:
+        raise ValueError("timeout must be a finite, non-negative number of seconds")
+    return min(timeout, maximum)
+
+
+def event_dict(event):
+    """JSON form of an ``(id, topic, key, timestamp, data)`` event"""
+    event_id, topic, key, timestamp, data = event
+    return {"id": format_event_id(event_id), "topic": topic, "key": key, "timestamp": timestamp, "data": data}
+
+
+def format_sse(events, last_id, missed, dumps):
+    """Render a batch of events as a server-sent events chunk"""
+    chunks = []
+    if missed:
+        last_id = format_event_id(last_id)
+        chunks.append(f"event: missed\nid: {last_id}\ndata: {{\"last_id\": \"{last_id}\"}}\n\n")
+    for event in events:
+        chunks.append(f"event: {event[1]}\nid: {format_event_id(event[0])}\ndata: {dumps(event_dict(event), separators=(',', ':'))}\n\n")
+    # A comment line keeps idle connections open through proxies
+    return ''.join(chunks) or ': keepalive\n\n'
+
+
+class EventBus:
+    """Bounded in-memory log of published events.
+
+    Events are published per state command and identified by a cursor
+    ``(sequence, index)``: the sequence of the command that produced them
+    and their position among its events. Every process applies the same
+    commands in the same order, so an id means the same event in every
+    worker and a client can resume on any of them. The last ``capacity``
+    events are kept in a ring buffer, so a subscriber that reconnects with
+    the last id it saw (e.g. SSE ``Last-Event-ID``) receives everything it
+    missed as long as it has not fallen more than ``capacity`` events
+    behind. Thread subscribers block on a condition variable; asyncio
+    subscribers park a future that publishers resolve through its event
+    loop, so an idle subscription costs no thread.
+    """
+
+    def __init__(self, capacity=10000, sequence=0):
+        self.capacity = capacity
+        self._events = deque(maxlen=capacity)
+        self._last_id = (sequence, 0)
+        # Events at or before this cursor are no longer buffered
+        self._floor = self._last_id
+        self._condition = threading.Condition()
+        self._async_waiters = {}
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish_many(self, sequence, events):
+        """Publish the ``(topic, key, data)`` triples of one command and wake subscribers once"""
+        if not events:
+            return
+        now = time.time()
+        with self._condition:
+            for index, (topic, key, data) in enumerate(events, 1):
+                if len(self._events) == self.capacity:
+                    self._floor = self._events[0][0]
+                self._events.append(((sequence, index), topic, key, now, data))
+            self._last_id = (sequence, len(events))
+            self._notify()
+
+    def _notify(self):
+        self._condition.notify_all()
+        if self._async_waiters:
+            for loop, futures in self._async_waiters.items():
+                loop.call_soon_threadsafe(_resolve_all, futures)
+            self._async_waiters = {}
+
+    def _since(self, since, subscriptions):
+        missed = since < self._floor
+        start = bisect_right(self._events, since, key=itemgetter(0))
+        matched = []
+        for index in range(start, len(self._events)):
+            event = self._events[index]
+            if (event[1], None) in subscriptions or (event[1], event[2]) in subscriptions:
+                matched.append(event)
+        return matched, missed
+
+    def wait(self, since, subscriptions, timeout):
+        """Return ``(events, last_id, missed)`` for events after ``since``.
+
+        Blocks for up to ``timeout`` seconds until a matching event arrives.
+        ``missed`` is True when events after ``since`` already left the
+        buffer. Events are ``(id, topic, key, timestamp, data)`` tuples.
+        A ``since`` ahead of this process (another worker's replica was
+        further along) waits for this process to catch up.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events, missed = self._since(since, subscriptions)
+                if events or missed:
+                    return events, max(since, self._last_id), missed
+                since = max(since, self._last_id)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], since, False
+                self._condition.wait(remaining)
+
+    async def wait_async(self, since, subscriptions, timeout):
+        """Coroutine version of ``wait`` that does not hold a thread"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self._condition:
+                events, missed = self._since(since, subscriptions)
+                if events or missed:
+                    return events, max(since, self._last_id), missed
+                since = max(since, self._last_id)
+                future = loop.create_future()
+                self._async_waiters.setdefault(loop, set()).add(future)
+
+            try:
+                await asyncio.wait_for(future, max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                return [], since, False
+            finally:
+                # A timed out or cancelled waiter must not stay registered
+                # until the next publish
+                with self._condition:
+                    waiters = self._async_waiters.get(loop)
+                    if waiters is not None:
+                        waiters.discard(future)
+                        if not waiters:
+                            del self._async_waiters[loop]
+
+
+def _resolve_all(futures):
+    for future in futures:
+        if not future.done():
+            future.set_result(None)
+
+
+def block_events(height, block):
+    """Events for a confirmed block and each of its transactions"""
+    events = [('blocks', None, {
+        "height": block.height,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "transactions": len(block.transactions),
+        "validator": block.validator,
+        "ai_score": block.ai_validation_score
+    })]
+    for position, tx in enumerate(block.transactions):
+        data = dict(confirmed_objects.to_dict(tx), source="chain", block_height=height, position=position)
+        events.append(('address', tx.from_address, data))
+        if tx.to_address != tx.from_address:
+            events.append(('address', tx.to_address, data))
+    return events
+
+
+class _ChainEvents(ChainFollower):
+    def __init__(self, blockchain):
+        super().__init__(blockchain)
+        self.blocks = []
+        # Subscribers only care about blocks appended from now on
+        self._height = len(blockchain.blocks)
+
+    def _apply_block(self, height, block):
+        # Confirmed blocks never change, so they are serialized later
+        self.blocks.append((height, block))
+
+
+class _LedgerEvents(LedgerFollower):
+    def __init__(self, tokenomics):
+        super().__init__(tokenomics)
+        self.events = []
+        self._seen = len(tokenomics.transactions)
+
+    def _apply_transaction(self, seq, tx_id, tx):
+        data = dict(tx.to_dict(), source="ledger")
+        self.events.append(('address', tx.from_address, data))
+        if tx.to_address and tx.to_address != tx.from_address:
+            self.events.append(('address', tx.to_address, data))
+
+
+class EventPump:
+    """Feeds the event bus from the chain, the ledger and governance.
+
+    Registered as a state listener, so it runs right after each command is
+    applied, whether on the committing thread or while a worker replica
+    replays the command. That is under the state's apply lock, so it only
+    collects what changed: references to new blocks, new ledger
+    transactions and proposal status changes. A publisher thread started by
+    ``start()`` serializes new blocks and their transactions and publishes
+    everything in command order. Only governance commands are checked for
+    proposal changes, and only for the proposal they name and any proposal
+    they created, so a command costs the same however many proposals exist.
+    """
+
+    def __init__(self, state, bus):
+        self.state = state
+        self.bus = bus
+        self._chain = _ChainEvents(state.blockchain)
+        self._ledger = _LedgerEvents(state.tokenomics)
+        proposals = state.tokenomics.governance_contract.proposals
+        self._statuses = {proposal_id: proposal["status"] for proposal_id, proposal in proposals.items()}
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def __call__(self, record, payload):
+        """Queue what the command ``record`` changed for publishing"""
+        sequence, target, _, args, kwargs = record[:5]
+        # A worker replica is replaced when it has to be re-bootstrapped
+        # from a snapshot; follow the newest copy
+        if self._chain.blockchain is not self.state.blockchain:
+            self._chain.rebind(self.state.blockchain)
+        if self._ledger.tokenomics is not self.state.tokenomics:
+            self._ledger.rebind(self.state.tokenomics)
+
+        self._chain.sync()
+        self._ledger.sync()
+        blocks = self._chain.blocks
+        # Ledger transactions and proposals can still change, so their
+        # data is taken now
+        events = self._ledger.events
+        self._chain.blocks = []
+        self._ledger.events = []
+        if target in GOVERNANCE_TARGETS:
+            events.extend(self._proposal_events(args, kwargs))
+        if blocks or events:
+            self._queue.put((sequence, blocks, events))
+
+    def _publish(self, item):
+        sequence, blocks, events = item
+        try:
+            chain_events = [event for height, block in blocks for event in block_events(height, block)]
+            self.bus.publish_many(sequence, chain_events + events)
+        except Exception:
+            logger.exception("Failed to publish events of command %d", sequence)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._publish(item)
+
+    def _proposal_events(self, args, kwargs):
+        proposals = self.state.tokenomics.governance_contract.proposals
+        changed = list(islice(reversed(proposals), max(0, len(proposals) - len(self._statuses))))
+        proposal_id = named_proposal(args, kwargs)
+        if proposal_id in proposals and proposal_id not in changed:
+            changed.append(proposal_id)
+
+        events = []
+        for proposal_id in changed:
+            proposal = proposals[proposal_id]
+            status = proposal["status"]
+            previous = self._statuses.get(proposal_id)
+            if status != previous:
+                self._statuses[proposal_id] = status
+                events.append(('proposals', proposal_id, {
+                    "proposal_id": proposal_id,
+                    "title": proposal.get("title"),
+                    "status": status,
+                    "previous_status": previous,
+                    "votes_for": str(proposal["votes_for"]),
+                    "votes_against": str(proposal["votes_against"])
+                }))
+        return events
+
+    def start(self):
+        self.state.listeners.append(self)
+        self._thread = threading.Thread(target=self._run, name='neurax-event-pump', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self in self.state.listeners:
+            self.state.listeners.remove(self)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,77 @@
+import threading
+from itertools import islice
+
+from src.services.metrics import metrics
+
+
+class LedgerFollower:
+    """Incrementally consume new entries of ``tokenomics.transactions``.
+
+    The ledger is an insertion-ordered dict that only ever grows, so new
+    transactions are always the last ``len(transactions) - seen`` items and
+    can be read from the tail without touching older entries.
+    """
+
+    def __init__(self, tokenomics):
+        self.tokenomics = tokenomics
+        self._seen = 0
+        self._lock = threading.RLock()
+
+    def rebind(self, tokenomics):
+        """Follow a newer copy of the same ledger, e.g. a reloaded replica"""
+        with self._lock:
+            self.tokenomics = tokenomics
+
+    def sync(self):
+        """Apply every transaction recorded since the last sync"""
+        with metrics.phase('index_sync', type(self).__name__), self._lock:
+            for _ in range(5):
+                try:
+                    transactions = self.tokenomics.transactions
+                    new = len(transactions) - self._seen
+                    if new <= 0:
+                        return
+                    tail = list(islice(reversed(transactions.items()), new))
+                    break
+                except RuntimeError:
+                    # Ledger was written to while we were reading its tail
+                    continue
+            else:
+                return
+
+            tail.reverse()
+            for tx_id, tx in tail:
+                self._apply_transaction(self._seen, tx_id, tx)
+                self._seen += 1
+
+    def _apply_transaction(self, seq, tx_id, tx):
+        raise NotImplementedError
+
+
+class ChainFollower:
+    """Incrementally consume newly appended blocks of ``blockchain.blocks``.
+
+    Blocks are only ever appended, so everything below the last synced
+    height is final and a sync only visits the new tail of the chain.
+    """
+
+    def __init__(self, blockchain):
+        self.blockchain = blockchain
+        self._height = 0
+        self._lock = threading.RLock()
+
+    def rebind(self, blockchain):
+        """Follow a newer copy of the same chain, e.g. a reloaded replica"""
+        with self._lock:
+            self.blockchain = blockchain
+
+    def sync(self):
+        """Apply every block appended since the last sync"""
+        with metrics.phase('index_sync', type(self).__name__), self._lock:
+            blocks = self.blockchain.blocks
+            for height in range(self._height, len(blocks)):
+                self._apply_block(height, blocks[height])
+                self._height = height + 1
+
+    def _apply_block(self, height, block):
+        raise NotImplementedError
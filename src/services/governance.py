@@ -0,0 +1,233 @@
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Hashable
+from itertools import islice
+
+from src.services.amounts import format_wei, from_wei, to_wei
+
+
+GOVERNANCE_TARGETS = ('governance', 'tokenomics.governance_contract')
+
+
+def named_proposal(args, kwargs):
+    """The proposal id a governance command is called with, if any"""
+    proposal_id = kwargs.get('proposal_id', args[1] if len(args) > 1 else None)
+    return proposal_id if isinstance(proposal_id, Hashable) else None
+
+
+def touched_accounts(target, method, args, kwargs):
+    """Accounts whose balance a state command may change"""
+    if target == 'tokenomics' and method == 'create_transaction':
+        return args[1:3]
+    if target == 'tokenomics.token_contract':
+        return args[:1]
+    if target == 'genesis':
+        return tuple(args[0] if args else kwargs['balances'])
+    if target == 'governance' and method == 'vote':
+        # The contract may pay a voting reward
+        return (kwargs.get('voter'),)
+    return ()
+
+
+class _Tally:
+    __slots__ = ('snapshot_id', 'created_at', 'status', 'votes_for', 'votes_against', 'voters')
+
+    def __init__(self, snapshot_id, proposal):
+        self.snapshot_id = snapshot_id
+        self.created_at = proposal["created_at"]
+        self.status = proposal["status"]
+        self.votes_for = to_wei(proposal["votes_for"])
+        self.votes_against = to_wei(proposal["votes_against"])
+        self.voters = 0
+
+
+class GovernanceEngine:
+    """Governance tallies, a status index and voting power snapshots.
+
+    Part of the journaled state: proposals are created and votes cast
+    through ``StateManager.execute('governance', ...)``, which forwards to
+    ``tokenomics.governance_contract`` and keeps the engine in step.
+
+    Each proposal takes a balance snapshot when it is created. Snapshots
+    are copy-on-write: before a command changes an account, the account's
+    voting power (balance plus stake) is recorded once for the newest
+    snapshot it has not been recorded for, so taking a snapshot is O(1) and
+    looking up voting power at a snapshot is a bisect. Votes use the
+    snapshot power rather than a figure supplied by the voter.
+
+    Running tallies are kept per proposal and a list of
+    ``(created_at, proposal_id)`` per status, so listing a page of
+    proposals never copies or sorts the whole set. Both are brought up to
+    date after every command on either governance target (see
+    ``after_command``), so reads never change them. Voting power and
+    tallies are integers in wei.
+    """
+
+    def __init__(self, tokenomics):
+        self.tokenomics = tokenomics
+        self._lock = threading.RLock()
+        self._snapshot_id = 0
+        self._history = {}
+        self._tallies = {}
+        self._by_status = {}
+        self._all = []
+
+        proposals = tokenomics.governance_contract.proposals
+        if proposals:
+            self._snapshot_id += 1
+            for proposal_id, proposal in proposals.items():
+                self._index(proposal_id, _Tally(self._snapshot_id, proposal))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _index(self, proposal_id, tally):
+        self._tallies[proposal_id] = tally
+        key = (tally.created_at, proposal_id)
+        insort(self._all, key)
+        insort(self._by_status.setdefault(tally.status, []), key)
+
+    def _set_status(self, proposal_id, tally, status):
+        if status == tally.status:
+            return
+        key = (tally.created_at, proposal_id)
+        entries = self._by_status[tally.status]
+        del entries[bisect_left(entries, key)]
+        insort(self._by_status.setdefault(status, []), key)
+        tally.status = status
+
+    def _power_now(self, address):
+        account = self.tokenomics.token_contract.get_account(address)
+        if account is None:
+            return 0
+        return to_wei(account.balance) + to_wei(account.staked_amount)
+
+    def before_command(self, target, method, args, kwargs):
+        """Record pre-change voting power of the accounts a command touches"""
+        if not self._snapshot_id:
+            return
+        with self._lock:
+            for address in touched_accounts(target, method, args, kwargs):
+                if address is None:
+                    continue
+                history = self._history.get(address)
+                if history is None:
+                    history = self._history[address] = ([], [])
+                ids, values = history
+                if not ids or ids[-1] < self._snapshot_id:
+                    ids.append(self._snapshot_id)
+                    values.append(self._power_now(address))
+
+    def voting_power(self, address, proposal_id):
+        """Voting power in wei of an address at a proposal's snapshot, or ``None``"""
+        with self._lock:
+            tally = self._tallies.get(proposal_id)
+            if tally is None:
+                return None
+            history = self._history.get(address)
+            if history is not None:
+                ids, values = history
+                i = bisect_left(ids, tally.snapshot_id)
+                if i < len(ids):
+                    return values[i]
+            return self._power_now(address)
+
+    def after_command(self, target, method, args, kwargs, result):
+        """Index what a committed governance command changed.
+
+        Called by ``StateManager`` after every command, once the records it
+        created carry their journaled ids, so replay indexes proposals as
+        they were created. Proposals new on the contract are indexed under
+        a new voting power snapshot, and the proposal the command names has
+        its tally and status read back from the contract. Any other command
+        naming no proposal may change all of them, so they are all read back.
+        """
+        if target not in GOVERNANCE_TARGETS:
+            return
+        with self._lock:
+            proposals = self.tokenomics.governance_contract.proposals
+            created = list(islice(reversed(proposals), max(0, len(proposals) - len(self._tallies))))
+            if created:
+                self._snapshot_id += 1
+                for proposal_id in reversed(created):
+                    self._index(proposal_id, _Tally(self._snapshot_id, proposals[proposal_id]))
+                return
+
+            proposal_id = named_proposal(args, kwargs)
+            if proposal_id in self._tallies:
+                tally = self._tallies[proposal_id]
+                self._refresh(proposal_id, tally, proposals[proposal_id])
+                if method == 'vote' and result:
+                    tally.voters += 1
+            elif proposal_id is None and method != 'create_proposal':
+                for proposal_id, tally in self._tallies.items():
+                    self._refresh(proposal_id, tally, proposals[proposal_id])
+
+    def _refresh(self, proposal_id, tally, proposal):
+        tally.votes_for = to_wei(proposal["votes_for"])
+        tally.votes_against = to_wei(proposal["votes_against"])
+        self._set_status(proposal_id, tally, proposal["status"])
+
+    def create_proposal(self, proposer, title, description, proposal_data=None):
+        """Create a proposal on the contract; it is indexed and snapshotted
+        by ``after_command``"""
+        return self.tokenomics.governance_contract.create_proposal(
+            proposer=proposer,
+            title=title,
+            description=description,
+            proposal_data=proposal_data or {}
+        )
+
+    def vote(self, voter, proposal_id, vote_choice, max_voting_power=None):
+        """Cast a vote with the voter's snapshot power.
+
+        ``max_voting_power`` (wei) lets a voter commit less than their full
+        power. Returns the power used in wei, or ``None`` if the vote was
+        rejected.
+        """
+        with self._lock:
+            power = self.voting_power(voter, proposal_id)
+            if power is None:
+                return None
+            if max_voting_power is not None:
+                power = min(power, max_voting_power)
+            if power <= 0:
+                return None
+
+            contract = self.tokenomics.governance_contract
+            if not contract.vote(voter=voter, proposal_id=proposal_id, vote_choice=vote_choice, voting_power=from_wei(power)):
+                return None
+            return power
+
+    def _view(self, proposal_id, tally):
+        # Copy the stored proposal so responses never alias contract state
+        view = dict(self.tokenomics.governance_contract.proposals[proposal_id])
+        total_votes = tally.votes_for + tally.votes_against
+        view["votes_for"] = format_wei(tally.votes_for)
+        view["votes_against"] = format_wei(tally.votes_against)
+        view["for_percentage"] = tally.votes_for * 100 / total_votes if total_votes else 0
+        view["against_percentage"] = tally.votes_against * 100 / total_votes if total_votes else 0
+        view["voters"] = tally.voters
+        return view
+
+    def count(self, status=None):
+        with self._lock:
+            if status is None:
+                return len(self._all)
+            return len(self._by_status.get(status, ()))
+
+    def page(self, page, limit, status=None):
+        """One page of proposals, newest first, optionally by status"""
+        with self._lock:
+            entries = self._all if status is None else self._by_status.get(status, [])
+            end = max(0, len(entries) - (page - 1) * limit)
+            start = max(0, end - limit)
+            selected = entries[start:end]
+            selected.reverse()
+            return [self._view(proposal_id, self._tallies[proposal_id]) for _, proposal_id in selected]
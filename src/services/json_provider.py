@@ -0,0 +1,212 @@
+import dataclasses
+import datetime
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from enum import Enum
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from src.services.metrics import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_slot_names = {}
+
+# orjson serializes these natively; passing them through to the default hook
+# keeps datetimes in Flask's HTTP-date format whichever encoder runs
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+class EncodedJSON:
+    """A value that is already encoded as JSON, spliced into a response as is"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _slots_of(cls):
+    names = _slot_names.get(cls)
+    if names is None:
+        names = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get('__slots__', ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            names.extend(name for name in slots if not name.startswith('_'))
+        names = _slot_names[cls] = tuple(names)
+    return names
+
+
+def neurax_default(o):
+    """Serialize the model types used across the API"""
+    if isinstance(o, EncodedJSON):
+        # Only the stdlib encoder gets here; it has no way to embed raw JSON
+        return json.loads(o.data)
+    if isinstance(o, Decimal):
+        return str(o)
+    if isinstance(o, Enum):
+        return o.value
+    if hasattr(o, 'to_dict'):
+        return o.to_dict()
+    slots = _slots_of(type(o))
+    if slots:
+        return {name: getattr(o, name) for name in slots if hasattr(o, name)}
+    # The rest of what Flask's default provider accepts
+    if isinstance(o, datetime.date):
+        return http_date(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _response_obj(args, kwargs):
+    # The arguments of jsonify(): one value, several as a list, or keywords
+    if args and kwargs:
+        raise TypeError("app.json.response() takes either args or kwargs, not both")
+    if not args and not kwargs:
+        return None
+    if len(args) == 1:
+        return args[0]
+    return args or kwargs
+
+
+class NeuraXJSONProvider(DefaultJSONProvider):
+    """JSON provider that handles ``Decimal``, enums, ``to_dict()`` models,
+    dataclasses and ``__slots__`` records natively.
+
+    Uses ``orjson`` when it is installed and falls back to the standard
+    library for anything orjson rejects, such as integers wider than 64 bits.
+    Both encoders render dates as HTTP dates, like Flask's own provider.
+    """
+
+    default = staticmethod(neurax_default)
+
+    def _orjson_default(self, o):
+        if isinstance(o, EncodedJSON):
+            return orjson.Fragment(o.data)
+        return self.default(o)
+
+    def _orjson_dumps(self, obj, kwargs):
+        if orjson is None or set(kwargs) - {'separators', 'indent'}:
+            return None
+        option = _ORJSON_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self._orjson_default, option=option)
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        data = self._orjson_dumps(obj, kwargs)
+        if data is not None:
+            return data.decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        with metrics.phase('serialize'):
+            return self._response(*args, **kwargs)
+
+    def _response(self, *args, **kwargs):
+        obj = _response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        else:
+            dump_args['separators'] = (',', ':')
+
+        data = self._orjson_dumps(obj, dump_args)
+        if data is None:
+            data = super().dumps(obj, **dump_args).encode()
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+
+def encode(value):
+    """Compact JSON bytes of ``value``, keys sorted as in API responses"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=neurax_default, option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(value, default=neurax_default, sort_keys=True, separators=(',', ':')).encode()
+
+
+def decode(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class SerializedObjectCache:
+    """LRU cache of the encoded JSON of immutable, hash-addressed objects.
+
+    Confirmed blocks and transactions never change, so their ``to_dict()``
+    form is encoded once per class and hash. ``encoded()`` hands out the
+    bytes for a response to embed without serializing them again;
+    ``to_dict()`` decodes a fresh dict for callers that add keys to it.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encoded(self, obj):
+        """``EncodedJSON`` of ``obj.to_dict()``"""
+        key = (type(obj), getattr(obj, 'hash', None))
+        if key[1] is None:
+            return EncodedJSON(encode(obj.to_dict()))
+
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+                return entry
+
+        entry = EncodedJSON(encode(obj.to_dict()))
+        with self._lock:
+            self._items[key] = entry
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+        return entry
+
+    def encoded_list(self, objs):
+        """One ``EncodedJSON`` array of every object in ``objs``.
+
+        Embedding the list as a single value saves the encoder a call back
+        into Python for each object, and the cache is locked once for all
+        of them.
+        """
+        objs = list(objs)
+        keys = [(type(obj), getattr(obj, 'hash', None)) for obj in objs]
+        items = self._items
+        with self._lock:
+            parts = [items.get(key) for key in keys]
+            for key, part in zip(keys, parts):
+                if part is not None:
+                    items.move_to_end(key)
+
+        for i, part in enumerate(parts):
+            if part is None:
+                parts[i] = self.encoded(objs[i])
+        return EncodedJSON(b'[' + b','.join([part.data for part in parts]) + b']')
+
+    def to_dict(self, obj):
+        """A caller-owned copy of ``obj.to_dict()`` as the API renders it"""
+        return decode(self.encoded(obj).data)
+
+
+confirmed_objects = SerializedObjectCache()
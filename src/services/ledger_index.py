@@ -0,0 +1,82 @@
+from bisect import bisect_left, insort
+
+from src.services.followers import LedgerFollower
+
+
+def encode_cursor(timestamp, seq):
+    """Encode a (timestamp, ledger sequence) key as an opaque cursor"""
+    return f"{timestamp!r}:{seq}"
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by ``encode_cursor``"""
+    try:
+        timestamp, seq = cursor.rsplit(':', 1)
+        return float(timestamp), int(seq)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class AddressTransactionIndex(LedgerFollower):
+    """Per-address transaction index sorted by time.
+
+    Each address maps to a list of ``(timestamp, seq, tx_id)`` entries in
+    ascending order, where ``seq`` is the position of the transaction in the
+    ledger. The index is caught up from the ledger tail before every query,
+    so a history page costs O(log n + limit) instead of a full ledger scan.
+    """
+
+    def __init__(self, tokenomics):
+        super().__init__(tokenomics)
+        self._by_address = {}
+
+    def _apply_transaction(self, seq, tx_id, tx):
+        entry = (tx.timestamp, seq, tx_id)
+        self._add(tx.from_address, entry)
+        if tx.to_address != tx.from_address:
+            self._add(tx.to_address, entry)
+
+    def _add(self, address, entry):
+        entries = self._by_address.get(address)
+        if entries is None:
+            self._by_address[address] = [entry]
+        elif entries[-1] <= entry:
+            entries.append(entry)
+        else:
+            insort(entries, entry)
+
+    def count(self, address):
+        """Number of transactions involving an address"""
+        self.sync()
+        return len(self._by_address.get(address, ()))
+
+    def page(self, address, limit, page=1, before=None, after=None):
+        """Return one page of transactions for an address, newest first.
+
+        ``before`` and ``after`` are cursors from ``encode_cursor``; when
+        neither is given the classic ``page`` offset is used. Returns the
+        transactions together with the cursors for the next (older) and
+        previous (newer) pages, each ``None`` when there is nothing further.
+        """
+        self.sync()
+        entries = self._by_address.get(address, [])
+
+        if before is not None:
+            end = bisect_left(entries, decode_cursor(before))
+            start = max(0, end - limit)
+        elif after is not None:
+            timestamp, seq = decode_cursor(after)
+            start = bisect_left(entries, (timestamp, seq + 1))
+            end = min(len(entries), start + limit)
+        else:
+            end = max(0, len(entries) - (page - 1) * limit)
+            start = max(0, end - limit)
+
+        selected = entries[start:end]
+        selected.reverse()
+
+        transactions = self.tokenomics.transactions
+        page_transactions = [transactions[tx_id].to_dict() for _, _, tx_id in selected]
+        next_cursor = encode_cursor(*selected[-1][:2]) if selected and start > 0 else None
+        prev_cursor = encode_cursor(*selected[0][:2]) if selected and end < len(entries) else None
+        return page_transactions, next_cursor, prev_cursor
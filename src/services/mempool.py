@@ -0,0 +1,390 @@
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time
+from bisect import insort
+from collections import OrderedDict, deque
+
+from src.services.amounts import from_wei
+from src.services.signing import engine_transaction_kwargs, strip_secrets
+from src.services.transfers import check_transfer_balances
+
+logger = logging.getLogger(__name__)
+
+# Account that mempool fees are paid to unless NEURAX_FEE_COLLECTOR is set
+DEFAULT_FEE_COLLECTOR = 'NX' + '0' * 38
+
+
+def transaction_hash(sender, nonce, fee, payload):
+    """Hash of a pending transaction, used for duplicate detection.
+
+    Secret fields (``signing.SECRET_FIELDS``) are not hashed.
+    """
+    canonical = json.dumps(
+        {"sender": sender, "nonce": nonce, "fee": fee, "payload": strip_secrets(payload)},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def check_block_fees(state, commands):
+    """Reject block transactions whose sender cannot pay their fee.
+
+    Fee transfers (``tokenomics.create_transaction`` commands) are netted
+    through the block with ``check_transfer_balances``; a rejected fee also
+    rejects the chain transaction that follows it.
+    """
+    fee_indexes = [i for i, command in enumerate(commands) if command[0] == 'tokenomics']
+    errors = [None] * len(commands)
+    if not fee_indexes:
+        return errors
+    for i, error in zip(fee_indexes, check_transfer_balances(state, [commands[i] for i in fee_indexes])):
+        if error is not None:
+            errors[i] = errors[i + 1] = f"Cannot pay fee: {error}"
+    return errors
+
+
+class MempoolEntry:
+    """A pending transaction waiting to be packed into a block; ``fee`` is in wei"""
+
+    __slots__ = ('tx_hash', 'sender', 'nonce', 'fee', 'payload', 'arrival', 'order')
+
+    def __init__(self, sender, nonce, fee, payload):
+        self.tx_hash = None
+        self.sender = sender
+        self.nonce = nonce
+        self.fee = fee
+        self.payload = payload
+        self.arrival = 0.0
+        self.order = 0
+
+    def __lt__(self, other):
+        return self.nonce < other.nonce
+
+    def verification_args(self):
+        """``(sender, nonce, fee, payload, tx_hash)`` for a ``validation.ValidationPipeline`` verifier"""
+        return (self.sender, self.nonce, self.fee, self.payload, self.tx_hash)
+
+
+class Mempool:
+    """Fee-priority transaction pool with per-sender nonce ordering.
+
+    Each sender has a queue ordered by nonce; only the head of every queue
+    sits in the priority heap, keyed by highest fee and then earliest
+    arrival, so a sender's transactions always leave in nonce order.
+    Nonces are sequential per sender: an entry must carry the sender's next
+    nonce, and entries without one are given it before hashing, so a
+    resubmitted nonce is a duplicate but repeated identical transfers are
+    not. When the pool is over ``max_size`` the lowest-fee transaction is
+    evicted, and transactions older than ``max_age`` seconds expire; either
+    way the sender's later transactions are dropped with it and its next
+    nonce goes back to the dropped one, so no gap is ever packed. Heaps use
+    lazy deletion, so removals are O(log n) amortized.
+
+    A sender the pool has not seen yet starts at its nonce in
+    ``committed_nonces`` (``StateManager.nonces``, committed by the block
+    builder with each block), so nonces carry on across restarts.
+    """
+
+    def __init__(self, max_size=50000, max_age=3600, latency_samples=10000, committed_nonces=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.committed_nonces = committed_nonces
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._queues = {}
+        self._next_nonce = {}
+        self._ready = []
+        self._cheapest = []
+        self._arrivals = deque()
+        self._order = 0
+        self._latencies = deque(maxlen=latency_samples)
+        self.counters = {
+            "added": 0,
+            "drained": 0,
+            "duplicates_rejected": 0,
+            "nonce_conflicts_rejected": 0,
+            "nonce_gaps_rejected": 0,
+            "evicted_size": 0,
+            "evicted_age": 0
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, tx_hash):
+        return tx_hash in self._entries
+
+    def add(self, entry):
+        """Queue an entry and set its hash; returns ``(accepted, reason)``"""
+        with self._lock:
+            self._expire(time.time())
+            next_nonce = self._sender_nonce(entry.sender)
+            if entry.nonce is None:
+                entry.nonce = next_nonce
+            entry.tx_hash = transaction_hash(entry.sender, entry.nonce, entry.fee, entry.payload)
+            if entry.tx_hash in self._entries:
+                self.counters["duplicates_rejected"] += 1
+                return False, "Duplicate transaction"
+            if entry.nonce < next_nonce:
+                self.counters["nonce_conflicts_rejected"] += 1
+                return False, f"Nonce {entry.nonce} already used by {entry.sender}; next nonce is {next_nonce}"
+            if entry.nonce > next_nonce:
+                self.counters["nonce_gaps_rejected"] += 1
+                return False, f"Nonce gap: next nonce for {entry.sender} is {next_nonce}"
+            self._next_nonce[entry.sender] = next_nonce + 1
+
+            queue = self._queues.setdefault(entry.sender, [])
+
+            self._order += 1
+            entry.order = self._order
+            entry.arrival = time.time()
+            self._entries[entry.tx_hash] = entry
+            self._arrivals.append(entry)
+            heapq.heappush(self._cheapest, (entry.fee, -entry.order, entry.tx_hash))
+
+            head = queue[0] if queue else None
+            insort(queue, entry)
+            if queue[0] is not head:
+                self._push_ready(entry)
+            self.counters["added"] += 1
+
+            while len(self._entries) > self.max_size:
+                self._evict_cheapest()
+            if entry.tx_hash not in self._entries:
+                return False, "Mempool full: fee too low"
+            return True, None
+
+    def _sender_nonce(self, sender):
+        next_nonce = self._next_nonce.get(sender)
+        if next_nonce is None:
+            next_nonce = self.committed_nonces.get(sender) if self.committed_nonces is not None else 0
+        return next_nonce
+
+    def next_nonce(self, sender):
+        """The nonce the sender's next transaction must carry"""
+        with self._lock:
+            return self._sender_nonce(sender)
+
+    def _push_ready(self, entry):
+        heapq.heappush(self._ready, (-entry.fee, entry.order, entry.tx_hash))
+
+    def _remove(self, entry):
+        del self._entries[entry.tx_hash]
+        queue = self._queues[entry.sender]
+        was_head = queue[0] is entry
+        queue.remove(entry)
+        if not queue:
+            del self._queues[entry.sender]
+        elif was_head:
+            self._push_ready(queue[0])
+
+    def _drop(self, entry):
+        # Later nonces of the sender cannot be packed without this one
+        dropped = [pending for pending in self._queues[entry.sender] if pending.nonce >= entry.nonce]
+        for pending in reversed(dropped):
+            self._remove(pending)
+        self._next_nonce[entry.sender] = entry.nonce
+        return len(dropped)
+
+    def _evict_cheapest(self):
+        while self._cheapest:
+            _, _, tx_hash = heapq.heappop(self._cheapest)
+            entry = self._entries.get(tx_hash)
+            if entry is not None:
+                self.counters["evicted_size"] += self._drop(entry)
+                return
+
+    def _expire(self, now):
+        cutoff = now - self.max_age
+        while self._arrivals and self._arrivals[0].arrival < cutoff:
+            entry = self._arrivals.popleft()
+            if self._entries.get(entry.tx_hash) is entry:
+                self.counters["evicted_age"] += self._drop(entry)
+
+    def drain(self, max_count):
+        """Remove and return up to ``max_count`` entries in block order"""
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            drained = []
+            while self._ready and len(drained) < max_count:
+                _, _, tx_hash = heapq.heappop(self._ready)
+                entry = self._entries.get(tx_hash)
+                queue = self._queues.get(entry.sender) if entry else None
+                if queue is None or queue[0] is not entry:
+                    continue
+                self._remove(entry)
+                self._latencies.append(now - entry.arrival)
+                drained.append(entry)
+
+            self.counters["drained"] += len(drained)
+            # Drop stale heap items once they dominate the heaps
+            if len(self._cheapest) > 2 * len(self._entries) + 1024:
+                self._cheapest = [item for item in self._cheapest if item[2] in self._entries]
+                heapq.heapify(self._cheapest)
+            if len(self._arrivals) > 2 * len(self._entries) + 1024:
+                self._arrivals = deque(e for e in self._arrivals if self._entries.get(e.tx_hash) is e)
+            return drained
+
+    def stats(self):
+        """Depth, counters and queueing latency percentiles"""
+        with self._lock:
+            self._expire(time.time())
+            latencies = sorted(self._latencies)
+            return dict(
+                self.counters,
+                depth=len(self._entries),
+                senders=len(self._queues),
+                max_size=self.max_size,
+                max_age=self.max_age,
+                queue_latency_p50=round(percentile(latencies, 0.50), 6),
+                queue_latency_p99=round(percentile(latencies, 0.99), 6),
+                latency_samples=len(latencies)
+            )
+
+
+class BlockBuilder:
+    """Drains the mempool in bulk and submits each block's worth at once.
+
+    Every ``interval`` seconds up to ``max_block_transactions`` entries are
+    taken in priority order and applied to the blockchain through one
+    ``execute_batch`` call. An entry's fee is charged in the same batch as a
+    ledger transfer from its sender to ``fee_collector``, just before its
+    chain transaction; a sender who cannot pay the fee (netted across the
+    block, engine transaction fee included) has the transaction rejected.
+    A fee is kept even if the engine then refuses the chain transaction.
+    The nonces of every drained entry, committed or rejected, are
+    committed to ``state.nonces`` in the same batch.
+    The outcome of the most recent ``history`` transactions is kept for
+    status lookups.
+
+    With a ``pipeline`` (a ``validation.ValidationPipeline``) each drained
+    block is verified in worker processes first and committed from the
+    pipeline in drain order, so the builder can drain the next block while
+    the previous one is still being verified; when the pipeline is full the
+    builder waits and new transactions keep queueing in the mempool.
+    """
+
+    def __init__(self, mempool, state, interval, max_block_transactions=1000, history=100000, pipeline=None,
+                 fee_collector=None):
+        self.mempool = mempool
+        self.state = state
+        self.interval = interval
+        self.max_block_transactions = max_block_transactions
+        self.history = history
+        self.pipeline = pipeline
+        self.fee_collector = fee_collector
+        self._outcomes = OrderedDict()
+        self._validating = set()
+        self._outcomes_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def build_block(self):
+        """Drain one block's worth of transactions; returns how many"""
+        entries = self.mempool.drain(self.max_block_transactions)
+        if not entries:
+            return 0
+
+        if self.pipeline is None:
+            self._commit(entries, [None] * len(entries))
+            return len(entries)
+
+        with self._outcomes_lock:
+            self._validating.update(entry.tx_hash for entry in entries)
+        self.pipeline.submit(
+            [entry.verification_args() for entry in entries],
+            lambda _, errors: self._commit(entries, errors)
+        )
+        return len(entries)
+
+    def _fee_command(self, entry):
+        from tokenomics.smart_contracts import TransactionType
+        return ('tokenomics', 'create_transaction', (TransactionType.TRANSFER, entry.sender, self.fee_collector, from_wei(entry.fee)), {})
+
+    def _commit(self, entries, errors):
+        commands = []
+        nonces = {}
+        for entry, error in zip(entries, errors):
+            nonces[entry.sender] = max(nonces.get(entry.sender, 0), entry.nonce + 1)
+            if error is None:
+                if entry.fee and self.fee_collector:
+                    commands.append(self._fee_command(entry))
+                commands.append(('blockchain', 'create_transaction', (), engine_transaction_kwargs(entry.payload)))
+        # Drained nonces are spent whatever the outcome; this goes last so
+        # the outcomes above line up with the entries
+        commands.append(('nonces', 'commit', (nonces,), {}))
+        try:
+            outcomes = self.state.execute_batch(commands, validate=check_block_fees)
+        except Exception as e:
+            logger.exception("Failed to submit block of %d transactions", len(commands))
+            outcomes = [(False, str(e))] * len(commands)
+        outcomes = iter(outcomes)
+
+        with self._outcomes_lock:
+            for entry, error in zip(entries, errors):
+                self._validating.discard(entry.tx_hash)
+                fee_charged = False
+                if error is not None:
+                    ok, value = False, error
+                else:
+                    if entry.fee and self.fee_collector:
+                        fee_ok, fee_value = next(outcomes)
+                        fee_charged = bool(fee_ok and fee_value)
+                    ok, value = next(outcomes)
+                if ok and value:
+                    self._outcomes[entry.tx_hash] = {"status": "submitted", "chain_hash": value, "fee_charged": fee_charged}
+                else:
+                    self._outcomes[entry.tx_hash] = {
+                        "status": "rejected",
+                        "error": value or "Failed to create transaction",
+                        "fee_charged": fee_charged
+                    }
+            while len(self._outcomes) > self.history:
+                self._outcomes.popitem(last=False)
+
+    def status(self, tx_hash):
+        """Status of a submitted transaction, or ``None`` if unknown"""
+        if tx_hash in self.mempool:
+            return {"status": "pending"}
+        with self._outcomes_lock:
+            if tx_hash in self._validating:
+                return {"status": "validating"}
+            return self._outcomes.get(tx_hash)
+
+    def stats(self):
+        """Block building settings and, with a pipeline, its counters"""
+        stats = {
+            "block_interval": self.interval,
+            "max_block_transactions": self.max_block_transactions,
+            "fee_collector": self.fee_collector
+        }
+        if self.pipeline is not None:
+            stats["validation"] = self.pipeline.stats()
+        return stats
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            # Keep draining while a backlog exceeds one block
+            while self.build_block() >= self.max_block_transactions:
+                pass
+
+    def start(self):
+        if self.fee_collector and not self.state.tokenomics.token_contract.get_account(self.fee_collector):
+            self.state.execute('tokenomics.token_contract', 'create_account', self.fee_collector)
+        self._thread = threading.Thread(target=self._run, name='neurax-block-builder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,193 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Leaves and interior nodes are hashed with distinct prefixes (as in
+# RFC 6962) so an interior node can never be passed off as a leaf
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+class MerkleRootMismatch(ValueError):
+    """Raised when no known tree construction reproduces a block's merkle root"""
+
+
+def _hash_bytes(value):
+    try:
+        return bytes.fromhex(value)
+    except (TypeError, ValueError):
+        return str(value).encode()
+
+
+class MerkleScheme:
+    """One way of hashing transaction hashes into a Merkle tree.
+
+    Nodes are bytes: ``leaf(tx_hash)`` makes a leaf, ``node(left, right)``
+    an interior node, and ``to_hex``/``from_hex`` convert a node to and from
+    the form it takes in a block's ``merkle_root`` and in proofs. An odd
+    node at the end of a level is paired with itself in every scheme.
+    """
+
+    def __init__(self, name, leaf, node, to_hex, from_hex, description):
+        self.name = name
+        self.leaf = leaf
+        self.node = node
+        self.to_hex = to_hex
+        self.from_hex = from_hex
+        self.description = dict(description, name=name, odd_node="paired with itself")
+
+
+def _sha256(data):
+    return hashlib.sha256(data).digest()
+
+
+# The constructions chain engines commonly seal blocks with. The engine is
+# not part of this tree, so the one it uses is found by rebuilding a block
+# (see ``MerkleTreeCache``) or pinned with NEURAX_MERKLE_SCHEME
+SCHEMES = OrderedDict((scheme.name, scheme) for scheme in (
+    MerkleScheme(
+        'rfc6962',
+        leaf=lambda tx_hash: _sha256(LEAF_PREFIX + _hash_bytes(tx_hash)),
+        node=lambda left, right: _sha256(NODE_PREFIX + left + right),
+        to_hex=bytes.hex,
+        from_hex=bytes.fromhex,
+        description={
+            "hash": "sha256",
+            "leaf": f"sha256(0x{LEAF_PREFIX.hex()} || tx_hash)",
+            "node": f"sha256(0x{NODE_PREFIX.hex()} || left || right)"
+        }
+    ),
+    MerkleScheme(
+        'sha256',
+        leaf=_hash_bytes,
+        node=lambda left, right: _sha256(left + right),
+        to_hex=bytes.hex,
+        from_hex=bytes.fromhex,
+        description={"hash": "sha256", "leaf": "tx_hash", "node": "sha256(left || right)"}
+    ),
+    MerkleScheme(
+        'sha256-hex',
+        leaf=lambda tx_hash: str(tx_hash).encode(),
+        node=lambda left, right: hashlib.sha256(left + right).hexdigest().encode(),
+        to_hex=bytes.decode,
+        from_hex=str.encode,
+        description={"hash": "sha256", "leaf": "tx_hash", "node": "sha256(hex(left) + hex(right))"}
+    )
+))
+
+
+def hash_leaves(tx_hashes, scheme=SCHEMES['rfc6962']):
+    """Hash a block's transaction hashes into Merkle leaves in one pass"""
+    leaf = scheme.leaf
+    return [leaf(tx_hash) for tx_hash in tx_hashes]
+
+
+def build_levels(leaves, scheme=SCHEMES['rfc6962']):
+    """Build every level of the tree, leaves first and root last"""
+    node = scheme.node
+    levels = [leaves or [_sha256(b'')]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2:
+            level = level + [level[-1]]
+        levels.append([node(level[i], level[i + 1]) for i in range(0, len(level), 2)])
+    return levels
+
+
+def proof_from_levels(levels, position, scheme=SCHEMES['rfc6962']):
+    """Sibling path from leaf ``position`` up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling >= len(level):
+            sibling = position
+        proof.append({
+            "hash": scheme.to_hex(level[sibling]),
+            "side": "left" if sibling < position else "right"
+        })
+        position //= 2
+    return proof
+
+
+def verify_proof(tx_hash, proof, root, scheme=SCHEMES['rfc6962']):
+    """Check an inclusion proof produced by ``proof_from_levels``"""
+    node = scheme.leaf(tx_hash)
+    for step in proof:
+        sibling = scheme.from_hex(step["hash"])
+        node = scheme.node(sibling, node) if step["side"] == "left" else scheme.node(node, sibling)
+    return scheme.to_hex(node) == root
+
+
+class MerkleTreeCache:
+    """LRU cache of fully built Merkle trees keyed by block hash.
+
+    Blocks are immutable once appended, so a tree is built the first time a
+    proof is asked for and reused until it is evicted.
+
+    Proofs are only useful against the root the engine sealed the block
+    with. With no ``scheme`` a block is rebuilt with each of ``SCHEMES`` in
+    turn until one reproduces its ``merkle_root``; the first block with two
+    or more transactions settles the scheme for all later ones.
+    """
+
+    def __init__(self, capacity=1024, scheme=None):
+        self.capacity = capacity
+        self.scheme = SCHEMES[scheme] if isinstance(scheme, str) else scheme
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, block, scheme):
+        return build_levels(hash_leaves((tx.hash for tx in block.transactions), scheme), scheme)
+
+    def _detect(self, block):
+        if not block.transactions:
+            raise MerkleRootMismatch(f"Block {block.hash} has no transactions to detect its Merkle construction from")
+        for scheme in SCHEMES.values():
+            levels = self._build(block, scheme)
+            if scheme.to_hex(levels[-1][0]) == block.merkle_root:
+                # A lone leaf is its own root in several schemes
+                if len(block.transactions) > 1:
+                    self.scheme = scheme
+                return levels, scheme
+        raise MerkleRootMismatch(
+            f"No known Merkle construction ({', '.join(SCHEMES)}) reproduces merkle_root "
+            f"{block.merkle_root} of block {block.hash}"
+        )
+
+    def levels(self, block):
+        """``(levels, scheme)`` of a block's tree, building it on a cache miss"""
+        with self._lock:
+            tree = self._trees.get(block.hash)
+            if tree is not None:
+                self._trees.move_to_end(block.hash)
+                self.hits += 1
+                return tree
+
+        scheme = self.scheme
+        if scheme is None:
+            levels, scheme = self._detect(block)
+        else:
+            levels = self._build(block, scheme)
+        with self._lock:
+            self.misses += 1
+            self._trees[block.hash] = (levels, scheme)
+            while len(self._trees) > self.capacity:
+                self._trees.popitem(last=False)
+        return levels, scheme
+
+    def proof(self, block, position):
+        """Return ``(proof, root, scheme)`` for the transaction at ``position``.
+
+        Raises ``MerkleRootMismatch`` when the tree's root is not the
+        ``merkle_root`` the block was sealed with, since a proof against any
+        other root proves nothing about the block.
+        """
+        levels, scheme = self.levels(block)
+        root = scheme.to_hex(levels[-1][0])
+        if root != block.merkle_root:
+            raise MerkleRootMismatch(
+                f"Rebuilt Merkle root {root} ({scheme.name}) does not match block merkle_root {block.merkle_root}"
+            )
+        return proof_from_levels(levels, position, scheme), root, scheme
@@ -0,0 +1,283 @@
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import g, request
+
+# Histogram bucket upper bounds; the +Inf bucket is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+FAMILIES = {
+    'neurax_http_requests_total': (
+        'counter', "HTTP requests by blueprint, endpoint, method and status", None),
+    'neurax_http_exceptions_total': (
+        'counter', "Requests that ended in an unhandled exception", None),
+    'neurax_http_request_duration_seconds': (
+        'histogram', "Time from the first before_request hook to the response", LATENCY_BUCKETS),
+    'neurax_http_response_size_bytes': (
+        'histogram', "Response body size, for responses with a known length", SIZE_BUCKETS),
+    'neurax_phase_duration_seconds': (
+        'histogram', "Time spent in internal phases of request handling", LATENCY_BUCKETS),
+}
+
+
+class _Shard:
+    """Counters and histograms written by one thread only"""
+
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class _Owner:
+    """Thread-local token whose collection retires the thread's shard"""
+
+    __slots__ = ('shard', '__weakref__')
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class _PhaseTimer:
+    __slots__ = ('registry', 'key', 'started')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe('neurax_phase_duration_seconds', self.key, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Request and phase metrics kept in per-thread shards.
+
+    Each thread records into its own shard without taking a lock; a shard
+    is only ever written by its thread, so plain dict and list updates are
+    safe under the GIL. ``render`` merges the live shards with the totals
+    of threads that have exited and formats them as Prometheus text. The
+    registry lock is only taken when a thread records for the first time,
+    when a thread exits and when metrics are rendered.
+
+    Gauges are callables evaluated at render time. Numbers are per process:
+    each gunicorn worker keeps and serves its own, plus the series of any
+    other process registered with ``source`` (the state service).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._local = threading.local()
+        # Reentrant: a shard may be retired by a thread that holds the lock
+        self._lock = threading.RLock()
+        self._shards = set()
+        self._retired = _Shard()
+        self._gauges = {}
+        self._sources = {}
+
+    def _shard(self):
+        owner = getattr(self._local, 'owner', None)
+        if owner is None:
+            shard = _Shard()
+            owner = self._local.owner = _Owner(shard)
+            with self._lock:
+                self._shards.add(shard)
+            # Fold the shard into the retired totals once the thread is gone
+            weakref.finalize(owner, self._retire, shard)
+        return owner.shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._merge(self._retired, shard)
+            self._shards.discard(shard)
+
+    @staticmethod
+    def _merge(into, shard):
+        counters = into.counters
+        for key, value in shard.counters.copy().items():
+            counters[key] = counters.get(key, 0) + value
+        histograms = into.histograms
+        for key, values in shard.histograms.copy().items():
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    merged[i] += value
+
+    def increment(self, name, labels, amount=1):
+        if not self.enabled:
+            return
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Add ``value`` to the histogram ``name`` for ``labels``"""
+        if not self.enabled:
+            return
+        histograms = self._shard().histograms
+        key = (name, labels)
+        # Per-bucket counts (made cumulative on render), then sum and count
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(FAMILIES[name][2]) + 3)
+        values[bisect_left(FAMILIES[name][2], value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def phase(self, phase, operation=''):
+        """Context manager timing an internal phase such as a state command"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _PhaseTimer(self, (('phase', phase), ('operation', operation)))
+
+    def record_phase(self, phase, seconds, operation=''):
+        """Record an internal phase timed by the caller"""
+        self.observe('neurax_phase_duration_seconds', (('phase', phase), ('operation', operation)), seconds)
+
+    def gauge(self, name, help_text, read):
+        """Report ``read()`` as gauge ``name`` on every render"""
+        self._gauges[name] = (help_text, read)
+
+    def source(self, process, read):
+        """Merge ``read()``, another process's ``export()``, into every render.
+
+        Its series carry a ``process`` label; a source that cannot be read
+        is left out of that render.
+        """
+        self._sources[process] = read
+
+    def snapshot(self):
+        """Merged counters and histograms of every thread so far"""
+        total = _Shard()
+        with self._lock:
+            self._merge(total, self._retired)
+            for shard in list(self._shards):
+                self._merge(total, shard)
+        return total
+
+    def export(self):
+        """``(counters, histograms)`` of ``snapshot`` as plain dicts, for ``source``"""
+        total = self.snapshot()
+        return total.counters, total.histograms
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        by_family = {}
+        exports = [((), self.export())]
+        for process, read in sorted(self._sources.items()):
+            try:
+                exports.append(((('process', process),), read()))
+            except Exception:
+                continue
+        for extra, (counters, histograms) in exports:
+            for (name, labels), value in counters.items():
+                by_family.setdefault(name, []).append((labels + extra, value))
+            for (name, labels), values in histograms.items():
+                by_family.setdefault(name, []).append((labels + extra, values))
+
+        lines = []
+        for name, (kind, help_text, buckets) in FAMILIES.items():
+            series = by_family.get(name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series):
+                if kind == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def init_app(self, app):
+        """Record latency, size and status of every request to ``app``.
+
+        Call before registering other ``before_request`` hooks so their
+        time is included.
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.get('metrics_started')
+        if started is None or not self.enabled:
+            return response
+        route = (('blueprint', request.blueprint or 'app'), ('endpoint', request.endpoint or 'unmatched'))
+        self.observe('neurax_http_request_duration_seconds', route, time.perf_counter() - started)
+        self.increment(
+            'neurax_http_requests_total',
+            route + (('method', request.method), ('status', str(response.status_code)))
+        )
+        size = None if response.is_streamed else response.calculate_content_length()
+        if size is not None:
+            self.observe('neurax_http_response_size_bytes', route, size)
+        return response
+
+    def _teardown_request(self, exc):
+        if exc is not None:
+            route = (('blueprint', request.blueprint or 'app'), ('endpoint', request.endpoint or 'unmatched'))
+            self.increment('neurax_http_exceptions_total', route)
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+metrics = MetricsRegistry(enabled=os.environ.get('NEURAX_METRICS', '1') != '0')
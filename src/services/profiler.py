@@ -0,0 +1,261 @@
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import g, request
+
+MAX_STACK_DEPTH = 128
+PROFILE_HEADER = 'X-NeuraX-Profile'
+PROFILE_ID_HEADER = 'X-NeuraX-Profile-Id'
+TOKEN_HEADER = 'X-NeuraX-Admin-Token'
+FORMATS = ('collapsed', 'speedscope')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ProfilerBusy(Exception):
+    """A capture was requested while the profiler has no capacity left"""
+
+
+_labels = {}
+
+
+def _frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_ROOT):
+            filename = os.path.relpath(filename, _ROOT)
+        else:
+            filename = os.path.basename(filename)
+        # ';' separates frames in the collapsed format
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+    return label
+
+
+class Profile:
+    """Stack samples of one capture, aggregated by identical stack"""
+
+    def __init__(self, interval, name):
+        self.interval = interval
+        self.name = name
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.time()
+        self.duration = 0.0
+        self.complete = False
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format: ``root;...;leaf count`` per line"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def speedscope(self):
+        """A speedscope sampled profile (https://www.speedscope.app)"""
+        frames = []
+        index = {}
+        samples = []
+        weights = []
+        for stack, count in sorted(self.stacks.items()):
+            sample = []
+            for label in stack:
+                i = index.get(label)
+                if i is None:
+                    i = index[label] = len(frames)
+                    frames.append({"name": label})
+                sample.append(i)
+            samples.append(sample)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "neurax",
+            "name": self.name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "started_at": self.started,
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            "complete": self.complete
+        }
+
+
+class _Sampler:
+    """Thread that samples the stacks of other threads every ``interval``,
+    until stopped or for ``duration`` seconds; ``on_stop`` is called with
+    the finished profile from the sampler thread"""
+
+    def __init__(self, profile, thread_ids=None, thread_names=True, duration=None, on_stop=None):
+        self.profile = profile
+        self.thread_ids = thread_ids
+        self.thread_names = thread_names
+        self.duration = duration
+        self.on_stop = on_stop
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='neurax-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.profile
+
+    def _run(self):
+        profile = self.profile
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration is not None else None
+        while not self._stop.wait(profile.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if self.thread_names else None
+            frames = sys._current_frames()
+            if self._stop.is_set():
+                # Stopped while reading: the frames would show stop() itself
+                break
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if names is not None:
+                    stack.append(f"thread {names.get(thread_id, thread_id)}")
+                stack.reverse()
+                profile.stacks[tuple(stack)] += 1
+            profile.samples += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        profile.duration = time.perf_counter() - started
+        profile.complete = True
+        if self.on_stop is not None:
+            self.on_stop(profile)
+
+
+class SamplingProfiler:
+    """On-demand wall-clock sampling profiler.
+
+    Nothing runs until a capture is asked for: ``start_capture`` samples
+    every thread of the process in the background for a fixed number of
+    seconds, and requests carrying the profile header are sampled on their
+    own thread for their duration. Each capture runs one sampler thread
+    that reads ``sys._current_frames()`` every ``interval``, so its cost is
+    bounded by the sampling rate rather than by how much code runs; one
+    process-wide capture and ``max_requests`` request captures may run at a
+    time. Profiles are kept in memory, the last ``keep`` of them, under
+    the id returned by ``start_capture`` or in the response's profile id
+    header.
+
+    A sample costs roughly 30-40us of one core for a Flask-deep stack
+    (benchmarks/bench_profiler.py), and the sampler cannot take the GIL
+    from a busy thread more often than ``sys.getswitchinterval()`` (5ms),
+    so request captures default to that interval: under 1% of a core, and
+    a shorter one adds cost without adding samples to CPU-bound requests.
+
+    Captures are gated by an admin token compared in constant time.
+    """
+
+    def __init__(self, token, interval=0.01, request_interval=0.005, max_seconds=60, max_requests=4, keep=32):
+        self.token = token
+        self.interval = interval
+        self.request_interval = request_interval
+        self.max_seconds = max_seconds
+        self.keep = keep
+        self._capture_lock = threading.Lock()
+        self._request_slots = threading.BoundedSemaphore(max_requests)
+        self._profiles = OrderedDict()
+        self._profiles_lock = threading.Lock()
+
+    def authorized(self, supplied):
+        return bool(supplied) and hmac.compare_digest(supplied.encode(), self.token.encode())
+
+    def start_capture(self, seconds, interval=None):
+        """Start sampling every thread for ``seconds`` in the background and
+        return the id to fetch the profile under; raises ``ProfilerBusy`` if
+        a capture is running"""
+        seconds = min(max(seconds, 0.0), self.max_seconds)
+        if not self._capture_lock.acquire(blocking=False):
+            raise ProfilerBusy("A capture is already running")
+        try:
+            profile = Profile(interval or self.interval, f"capture {seconds:g}s")
+            profile_id = self._keep(profile)
+            _Sampler(profile, duration=seconds, on_stop=lambda _: self._capture_lock.release()).start()
+        except BaseException:
+            self._capture_lock.release()
+            raise
+        return profile_id
+
+    def start_request(self, name):
+        """Start sampling the calling thread; ``None`` when no slot is free"""
+        if not self._request_slots.acquire(blocking=False):
+            return None
+        profile = Profile(self.request_interval, name)
+        return _Sampler(profile, thread_ids={threading.get_ident()}, thread_names=False).start()
+
+    def finish_request(self, sampler):
+        """Stop a request capture and keep it; returns its id"""
+        try:
+            profile = sampler.stop()
+        finally:
+            self._request_slots.release()
+        return self._keep(profile)
+
+    def _keep(self, profile):
+        profile_id = secrets.token_hex(8)
+        with self._profiles_lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._profiles_lock:
+            return self._profiles.get(profile_id)
+
+    def recent(self):
+        with self._profiles_lock:
+            return [dict(profile.summary(), id=profile_id) for profile_id, profile in reversed(self._profiles.items())]
+
+    def init_app(self, app):
+        """Profile single requests that carry the profile and token headers"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        if PROFILE_HEADER in request.headers and self.authorized(request.headers.get(TOKEN_HEADER)):
+            g.profile_sampler = self.start_request(f"{request.method} {request.full_path.rstrip('?')}")
+
+    def _after_request(self, response):
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            response.headers[PROFILE_ID_HEADER] = self.finish_request(sampler)
+        elif PROFILE_HEADER in request.headers and self.authorized(request.headers.get(TOKEN_HEADER)):
+            response.headers[PROFILE_ID_HEADER] = 'busy'
+        return response
+
+    def _teardown_request(self, exc):
+        # A request that failed before after_request still frees its slot
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            self.finish_request(sampler)
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, Response
+
+
+def state_version():
+    """Version of the served state: chain height plus ledger sequence.
+
+    Anything that changes a cached response either appends a block or goes
+    through the state manager, which bumps the sequence.
+    """
+    blockchain = current_app.config['NEURAX_BLOCKCHAIN']
+    state = current_app.config['NEURAX_STATE']
+    return len(blockchain.blocks), state.sequence
+
+
+class ResponseCache:
+    """Cache of pre-serialized JSON responses for read-only endpoints.
+
+    Entries are keyed by endpoint and query arguments and tagged with the
+    state version they were rendered at, so they stay valid until the next
+    block or write. Responses carry an ETag; a matching ``If-None-Match``
+    gets a 304 without calling the view at all.
+    """
+
+    def __init__(self, version=state_version, max_entries=1024):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, view):
+        """Decorate a view whose JSON output depends only on state and args"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+            version = self.version()
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    entry = None
+                    self.misses += 1
+
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                body = response.get_data()
+                etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+                entry = (version, body, etag, response.mimetype)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+
+            _, body, etag, mimetype = entry
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,38 @@
+import hashlib
+import hmac
+import json
+
+# Request fields that must never be stored, hashed or journaled
+SECRET_FIELDS = ('private_key',)
+
+
+def address_for_key(private_key):
+    """Wallet address derived from a private key"""
+    return "NX" + hashlib.sha256(private_key.encode()).hexdigest()[:38]
+
+
+def sign_transaction(private_key, payload):
+    """HMAC-SHA256 signature of a transaction payload, as hex.
+
+    The payload is signed in canonical JSON form, so the same transaction
+    signed with the same key always gets the same signature.
+    """
+    canonical = json.dumps(strip_secrets(payload), sort_keys=True, separators=(',', ':'), default=str)
+    return hmac.new(private_key.encode(), canonical.encode(), hashlib.sha256).hexdigest()
+
+
+def strip_secrets(fields):
+    """Copy of a dict without ``SECRET_FIELDS``"""
+    return {name: value for name, value in fields.items() if name not in SECRET_FIELDS}
+
+
+def engine_transaction_kwargs(payload):
+    """``blockchain.create_transaction`` arguments for a signed payload.
+
+    The engine takes a ``private_key`` argument; it is given the signature,
+    so the key itself never reaches a state command (see
+    ``src.services.storage.StateManager``).
+    """
+    kwargs = dict(payload)
+    kwargs['private_key'] = kwargs.pop('signature')
+    return kwargs
@@ -0,0 +1,309 @@
+import time
+from array import array
+from bisect import bisect_right
+
+from src.services.amounts import WEI, format_wei, from_wei, to_wei
+from src.services.followers import LedgerFollower
+
+# Lock tiers as (name, minimum lock in seconds, multiplier percent)
+LOCK_TIERS = (
+    ('no_lock', 0, 100),
+    ('1_month', 30 * 86400, 110),
+    ('6_months', 180 * 86400, 125),
+    ('1_year', 365 * 86400, 150)
+)
+
+# Seconds in one unit of a position's lock_period
+LOCK_PERIOD_UNITS = {'seconds': 1, 'days': 86400}
+
+YEAR_MICROSECONDS = 365 * 86400 * 10 ** 6
+# Reward per unit of weighted stake is kept with 36 fractional digits so
+# per-microsecond increments of small APYs do not round away
+ACC_PRECISION = 10 ** 36
+
+
+def lock_multiplier(lock_period, unit_seconds=1):
+    """Multiplier percent of the highest tier a lock period reaches"""
+    seconds = (lock_period or 0) * unit_seconds
+    multiplier = LOCK_TIERS[0][2]
+    for _, minimum, percent in LOCK_TIERS:
+        if seconds >= minimum:
+            multiplier = percent
+    return multiplier
+
+
+def _micros(timestamp):
+    return int(timestamp * 10 ** 6)
+
+
+def _tx_type(tx):
+    return getattr(tx.tx_type, 'value', tx.tx_type)
+
+
+def _rate_per_micro(rate):
+    return to_wei(rate) * (ACC_PRECISION // WEI) // YEAR_MICROSECONDS
+
+
+class StakingRewards(LedgerFollower):
+    """Estimated staking rewards over columnar positions.
+
+    Positions live in parallel columns (owner, amount and weight in wei,
+    start time, multiplier, reward debt) indexed by row, with rows reused
+    after unstaking. Rewards accrue at the configured APY times the lock
+    multiplier: the accumulator ``acc(t)`` is the reward earned by one unit
+    of weighted stake since a reference time, stored as checkpoints that
+    only grow when the rate changes. A position's pending reward is
+    ``weight * (acc(now) - debt)``, and a claim just moves its debt to
+    ``acc(claim time)``, so accrual and claims are O(1) per position
+    whatever the number of positions.
+
+    The engine computes and pays rewards itself, and a claim reaches the
+    ledger with a zero amount, so these figures are estimates of what the
+    engine owes rather than records of what it paid; they are reported
+    under ``estimated_*`` keys.
+
+    Rate changes are read from ``rate_history``, the journaled
+    ``StateManager.reward_rates``, so accrual survives restarts; without
+    one the engine notices changes itself when it syncs. A position's
+    ``lock_period`` is counted in ``lock_period_unit`` (a
+    ``LOCK_PERIOD_UNITS`` name), which has to match the engine's.
+
+    New positions are read from the tail of
+    ``staking_contract.staking_positions``; claims and unstakes come from
+    the ledger.
+    """
+
+    def __init__(self, tokenomics, rate_history=None, lock_period_unit='seconds'):
+        super().__init__(tokenomics)
+        if lock_period_unit not in LOCK_PERIOD_UNITS:
+            raise ValueError(f"lock_period_unit must be one of: {', '.join(LOCK_PERIOD_UNITS)}")
+        self.lock_period_unit = lock_period_unit
+        self._unit_seconds = LOCK_PERIOD_UNITS[lock_period_unit]
+        self._rows = {}
+        self._closed = set()
+        self._closed_limit = 1024
+        self._free = []
+        self._ids = []
+        self._owners = []
+        self._amounts = []
+        self._weights = []
+        self._debts = []
+        self._starts = array('d')
+        self._lock_periods = array('q')
+        self._multipliers = array('H')
+        self._by_owner = {}
+        self.total_staked = 0
+        self.total_weight = 0
+
+        self._own_history = rate_history is None
+        if self._own_history:
+            rate_history = [(0.0, tokenomics.config.staking_reward_rate)]
+        self._use_history(rate_history)
+
+    def _use_history(self, rate_history):
+        self.rate_history = rate_history
+        self._cp_times = array('q')
+        self._cp_accs = []
+        self._cp_rates = []
+        self._load_checkpoints()
+
+    def _load_checkpoints(self):
+        for timestamp, rate in self.rate_history[len(self._cp_times):]:
+            micros = _micros(timestamp)
+            if self._cp_times:
+                micros = max(micros, self._cp_times[-1])
+                acc = self._cp_accs[-1] + self._cp_rates[-1] * (micros - self._cp_times[-1])
+            else:
+                acc = 0
+            self._cp_times.append(micros)
+            self._cp_accs.append(acc)
+            self._cp_rates.append(_rate_per_micro(rate))
+
+    def lock_tiers(self):
+        """``LOCK_TIERS`` with minimums in ``lock_period_unit``"""
+        return tuple((name, minimum // self._unit_seconds, percent) for name, minimum, percent in LOCK_TIERS)
+
+    def acc_at(self, timestamp):
+        """Accumulated reward per unit of weighted stake at ``timestamp``"""
+        micros = _micros(timestamp)
+        i = max(0, bisect_right(self._cp_times, micros) - 1)
+        return self._cp_accs[i] + self._cp_rates[i] * (micros - self._cp_times[i])
+
+    def checkpoint(self, now=None):
+        """Pick up rate changes: new ``rate_history`` entries, or without a
+        history of our own a change of the configured APY"""
+        if self._own_history:
+            rate = self.tokenomics.config.staking_reward_rate
+            if rate != self.rate_history[-1][1]:
+                self.rate_history.append((time.time() if now is None else now, rate))
+        self._load_checkpoints()
+
+    def rebind(self, tokenomics, rate_history=None):
+        """Follow a newer copy of the same ledger and its rate history"""
+        with self._lock:
+            super().rebind(tokenomics)
+            if rate_history is not None and rate_history is not self.rate_history:
+                self._own_history = False
+                self._use_history(rate_history)
+
+    def sync(self):
+        with self._lock:
+            self.checkpoint()
+            self._sync_positions()
+            super().sync()
+
+    def _sync_positions(self):
+        # Positions are appended to an insertion-ordered dict; walk back from
+        # the end until reaching one already known
+        positions = self.tokenomics.staking_contract.staking_positions
+        for _ in range(5):
+            try:
+                new = []
+                for position_id, position in reversed(positions.items()):
+                    if position_id in self._rows or position_id in self._closed:
+                        break
+                    new.append((position_id, position))
+                break
+            except RuntimeError:
+                continue
+        for position_id, position in reversed(new):
+            self._open(position_id, position)
+
+    def _open(self, position_id, position):
+        amount = to_wei(position["amount"])
+        lock_period = int(position.get("lock_period") or 0)
+        multiplier = lock_multiplier(lock_period, self._unit_seconds)
+        weight = amount * multiplier // 100
+        debt = self.acc_at(position["start_time"])
+
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = position_id
+            self._owners[row] = position["owner"]
+            self._amounts[row] = amount
+            self._weights[row] = weight
+            self._debts[row] = debt
+            self._starts[row] = position["start_time"]
+            self._lock_periods[row] = lock_period
+            self._multipliers[row] = multiplier
+        else:
+            row = len(self._ids)
+            self._ids.append(position_id)
+            self._owners.append(position["owner"])
+            self._amounts.append(amount)
+            self._weights.append(weight)
+            self._debts.append(debt)
+            self._starts.append(position["start_time"])
+            self._lock_periods.append(lock_period)
+            self._multipliers.append(multiplier)
+
+        self._rows[position_id] = row
+        self._by_owner.setdefault(position["owner"], set()).add(row)
+        self.total_staked += amount
+        self.total_weight += weight
+
+    def _close(self, position_id):
+        row = self._rows.pop(position_id)
+        self._closed.add(position_id)
+        self._by_owner[self._owners[row]].discard(row)
+        self.total_staked -= self._amounts[row]
+        self.total_weight -= self._weights[row]
+        self._ids[row] = None
+        self._amounts[row] = self._weights[row] = 0
+        self._free.append(row)
+        if len(self._closed) > self._closed_limit:
+            self._prune_closed()
+
+    def _prune_closed(self):
+        # Closed ids are only remembered so a tail scan does not reopen
+        # them; ids the contract no longer holds cannot come back
+        positions = self.tokenomics.staking_contract.staking_positions
+        self._closed = {position_id for position_id in self._closed if position_id in positions}
+        self._closed_limit = max(1024, 2 * len(self._closed))
+
+    def _apply_transaction(self, seq, tx_id, tx):
+        tx_type = _tx_type(tx)
+        if tx_type not in ('claim_rewards', 'unstake'):
+            return
+        position_id = (tx.data or {}).get("position_id")
+        if position_id not in self._rows:
+            # The position may have been created after our last tail scan
+            self._sync_positions()
+            if position_id not in self._rows:
+                return
+        if tx_type == 'claim_rewards':
+            self._debts[self._rows[position_id]] = self.acc_at(tx.timestamp)
+        else:
+            self._close(position_id)
+
+    def _pending(self, row, acc):
+        return max(0, self._weights[row] * (acc - self._debts[row]) // ACC_PRECISION)
+
+    def _position(self, row, acc):
+        return {
+            "position_id": self._ids[row],
+            "amount": format_wei(self._amounts[row]),
+            "lock_period": self._lock_periods[row],
+            "start_time": self._starts[row],
+            "multiplier": f"{self._multipliers[row] / 100}x",
+            "estimated_pending_rewards": format_wei(self._pending(row, acc))
+        }
+
+    def pending_rewards(self, position_id, now=None):
+        """Estimated unclaimed reward of one position, or ``None`` if unknown"""
+        self.sync()
+        with self._lock:
+            row = self._rows.get(position_id)
+            if row is None:
+                return None
+            return from_wei(self._pending(row, self.acc_at(time.time() if now is None else now)))
+
+    def positions(self, owner, now=None):
+        """Open positions of an owner with totals, oldest first"""
+        self.sync()
+        with self._lock:
+            acc = self.acc_at(time.time() if now is None else now)
+            rows = sorted(self._by_owner.get(owner, ()), key=lambda row: self._starts[row])
+            return {
+                "positions": [self._position(row, acc) for row in rows],
+                "total_staked": format_wei(sum(self._amounts[row] for row in rows)),
+                "estimated_total_pending_rewards": format_wei(sum(self._pending(row, acc) for row in rows))
+            }
+
+    def totals(self):
+        """Open positions, total stake and total weighted stake"""
+        self.sync()
+        with self._lock:
+            return {
+                "total_positions": len(self._rows),
+                "total_staked": format_wei(self.total_staked),
+                "total_weighted_stake": format_wei(self.total_weight)
+            }
+
+    def audit(self, now=None):
+        """Recompute every position from scratch and compare.
+
+        Builds a fresh engine from the current positions and the full
+        ledger, then checks that amounts and pending rewards match the
+        incrementally maintained columns.
+        """
+        now = time.time() if now is None else now
+        self.sync()
+        fresh = StakingRewards(self.tokenomics, self.rate_history, self.lock_period_unit)
+        fresh.sync()
+
+        with self._lock:
+            acc = self.acc_at(now)
+            mismatches = []
+            for position_id, row in self._rows.items():
+                other = fresh._rows.get(position_id)
+                if (other is None or fresh._amounts[other] != self._amounts[row]
+                        or fresh._pending(other, acc) != self._pending(row, acc)):
+                    mismatches.append(position_id)
+            mismatches.extend(set(fresh._rows) - set(self._rows))
+            return {
+                "positions": len(self._rows),
+                "total_staked": format_wei(self.total_staked),
+                "estimated_total_pending_rewards": format_wei(sum(self._pending(row, acc) for row in self._rows.values())),
+                "mismatches": mismatches
+            }
@@ -0,0 +1,462 @@
+"""Single-writer state service shared by several gunicorn workers.
+
+One process owns the ``StateManager`` and applies every write in order.
+Workers send writes to it over a Unix socket and serve reads from a local
+replica. Each replica starts from one snapshot and then tails the records
+the server commits, so a write costs the server one pickled record and
+every worker one replayed command, independent of the size of the state.
+Run the writer next to the web workers::
+
+    NEURAX_STATE_SOCKET=/tmp/neurax.sock python -m src.services.state_server &
+    NEURAX_STATE_SOCKET=/tmp/neurax.sock gunicorn -w 4 src.main:app
+
+Replicas trail the writer by the time it takes to stream and replay a
+record; a worker's own writes are visible to it as soon as they return.
+
+The service also hosts the one mempool and block builder of the
+deployment; workers queue transactions and look up their status through
+``RemoteMempool`` and ``RemoteBlockBuilder``. Its metrics, such as the
+state command phases, are served by every worker's ``/api/metrics``.
+"""
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from src.services.metrics import metrics
+from src.services.storage import StateManager, StorageError
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_HEADER = struct.Struct('>I')
+
+
+def _send(sock, obj):
+    payload = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(MESSAGE_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("State service connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock):
+    (length,) = MESSAGE_HEADER.unpack(_recv_exact(sock, MESSAGE_HEADER.size))
+    return pickle.loads(_recv_exact(sock, length))
+
+
+class RecordBuffer:
+    """The most recently committed records, for replicas to catch up from.
+
+    Registered as a ``StateManager`` listener, so records arrive in
+    sequence order with the payload already pickled for the log.
+    """
+
+    def __init__(self, sequence, capacity=100000):
+        self._records = deque(maxlen=capacity)
+        self._last = sequence
+        self._condition = threading.Condition()
+
+    def __call__(self, record, payload):
+        with self._condition:
+            self._records.append((record[0], payload))
+            self._last = record[0]
+            self._condition.notify_all()
+
+    def since(self, sequence, timeout):
+        """Payloads of the records after ``sequence``, waiting up to ``timeout``.
+
+        Returns ``None`` when they are no longer buffered (or ``sequence``
+        is not one this server committed) and the replica needs a snapshot.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last != sequence, timeout)
+            first = self._records[0][0] if self._records else self._last + 1
+            if not first - 1 <= sequence <= self._last:
+                return None
+            return [payload for _, payload in islice(self._records, sequence - first + 1, None)]
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request = _recv(self.request)
+            except (ConnectionError, EOFError):
+                return
+
+            if request[0] == 'subscribe':
+                # The connection now only carries records to a replica
+                server.stream_records(self.request, request[1])
+                return
+
+            try:
+                if request[0] == 'service':
+                    _, name, args = request
+                    result = server.call_service(name, args)
+                elif request[0] == 'execute_batch':
+                    _, commands, validate, strict = request
+                    result = server.state.execute_batch(commands, validate=validate, strict=strict)
+                else:
+                    _, target, method, args, kwargs = request
+                    result = server.state.execute(target, method, *args, **kwargs)
+                response = ('ok', result, server.state.sequence)
+            except Exception as e:
+                response = ('error', f"{type(e).__name__}: {e}", server.state.sequence)
+
+            _send(self.request, response)
+
+
+class StateServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server that applies writes and streams them to replicas"""
+
+    daemon_threads = True
+
+    def __init__(self, state, socket_path, buffer_records=100000, keepalive=15, block_builder=None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+        self.state = state
+        self.keepalive = keepalive
+        self.records = RecordBuffer(state.sequence, capacity=buffer_records)
+        state.listeners.append(self.records)
+
+        # The state phases are timed here; workers merge them into their
+        # own /api/metrics
+        self.services = {'metrics.export': metrics.export}
+        if block_builder is not None:
+            mempool = block_builder.mempool
+            self.services.update({
+                'mempool.add': self._mempool_add,
+                'mempool.stats': mempool.stats,
+                'mempool.len': mempool.__len__,
+                'mempool.contains': mempool.__contains__,
+                'mempool.next_nonce': mempool.next_nonce,
+                'block_builder.status': block_builder.status,
+                'block_builder.stats': block_builder.stats
+            })
+            self.mempool = mempool
+
+    def _mempool_add(self, entry):
+        accepted, reason = self.mempool.add(entry)
+        return accepted, reason, entry.tx_hash, entry.nonce
+
+    def call_service(self, name, args):
+        """Run one of the hosted mempool, block builder or metrics calls"""
+        service = self.services.get(name)
+        if service is None:
+            raise LookupError(f"Service not available: {name}")
+        return service(*args)
+
+    def stream_records(self, sock, since):
+        """Send a replica every record committed after ``since``.
+
+        A replica that has no state yet (``since`` is ``None``) or has
+        fallen out of the buffer gets a snapshot first. Runs until the
+        replica disconnects; an empty batch is sent as a keepalive.
+        """
+        try:
+            while True:
+                payloads = None if since is None else self.records.since(since, self.keepalive)
+                if payloads is None:
+                    since, _, snapshot = self.state.serialize()
+                    _send(sock, ('snapshot', snapshot))
+                    continue
+                _send(sock, ('records', payloads))
+                since += len(payloads)
+        except (OSError, ConnectionError):
+            return
+
+
+class StateClient:
+    """Worker-side view of the state service.
+
+    Exposes the same ``blockchain``, ``tokenomics``, ``governance``,
+    ``reward_rates``, ``nonces``, ``sequence``, ``listeners``, ``execute`` and
+    ``execute_batch`` interface
+    as ``StateManager``. Writes are forwarded to the server. Reads are
+    served from a local replica: a ``StateManager`` rebuilt from one
+    snapshot of the server's state, which a follower thread keeps current
+    by replaying every record the server commits after it and restoring the
+    records the server's engine created, so the replica changes in place
+    exactly as the server's state did. A write returns once the replica has applied
+    it, so a worker always reads its own writes.
+
+    A replica that falls out of the server's record buffer, reconnects to a
+    restarted server or fails to reproduce a record (``StorageError``) is
+    replaced by a fresh snapshot; the
+    ``blockchain``, ``tokenomics``, ``governance`` and ``reward_rates``
+    objects then change.
+    """
+
+    def __init__(self, socket_path, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.listeners = []
+        self.replica = None
+        self._local = threading.local()
+        self._applied = threading.Condition()
+        self._closed = False
+
+        sock = self._subscribe()
+        self._thread = threading.Thread(target=self._follow, args=(sock,), name='neurax-state-replica', daemon=True)
+        self._thread.start()
+
+    @property
+    def blockchain(self):
+        return self.replica.blockchain
+
+    @property
+    def tokenomics(self):
+        return self.replica.tokenomics
+
+    @property
+    def governance(self):
+        return self.replica.governance
+
+    @property
+    def reward_rates(self):
+        return self.replica.reward_rates
+
+    @property
+    def nonces(self):
+        return self.replica.nonces
+
+    @property
+    def sequence(self):
+        return self.replica.sequence
+
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _subscribe(self, fresh=False):
+        """Subscribe to the record stream, installing a snapshot first if needed"""
+        since = None if self.replica is None or fresh else self.replica.sequence
+        sock = self._open()
+        try:
+            _send(sock, ('subscribe', since))
+            if since is None:
+                self._receive(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _receive(self, sock):
+        kind, body = _recv(sock)
+        if kind == 'snapshot':
+            replica = StateManager.from_snapshot(body)
+            replica.listeners = self.listeners
+            with self._applied:
+                self.replica = replica
+                self._applied.notify_all()
+            return
+
+        replica = self.replica
+        for payload in body:
+            record = pickle.loads(payload)
+            if record[0] == replica.sequence + 1:
+                replica._replay(record)
+        if body:
+            with self._applied:
+                self._applied.notify_all()
+
+    def _follow(self, sock):
+        fresh = False
+        while not self._closed:
+            try:
+                if sock is None:
+                    sock = self._subscribe(fresh)
+                    fresh = False
+                # Keepalives arrive well within the socket timeout
+                self._receive(sock)
+            except StorageError:
+                logger.exception("State replica diverged from the server; reloading a snapshot")
+                sock.close()
+                sock = None
+                fresh = True
+            except (OSError, ConnectionError, EOFError):
+                if sock is not None:
+                    sock.close()
+                    sock = None
+                if not self._closed:
+                    logger.warning("Lost the state service record stream; reconnecting")
+                    time.sleep(1)
+
+    def wait_for(self, sequence, timeout=None):
+        """Block until the replica has applied ``sequence``; returns False on timeout"""
+        with self._applied:
+            return self._applied.wait_for(
+                lambda: self.replica.sequence >= sequence, self.timeout if timeout is None else timeout
+            )
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = self._local.sock = self._open()
+        return sock
+
+    def execute(self, target, method, *args, **kwargs):
+        """Apply a write on the state server and return its result"""
+        return self._call(('execute', target, method, args, kwargs))
+
+    def execute_batch(self, commands, validate=None, strict=False):
+        """Apply a batch of writes on the state server.
+
+        ``validate`` must be a module-level function so it can be pickled.
+        """
+        return self._call(('execute_batch', commands, validate, strict))
+
+    def call_service(self, name, *args):
+        """Call a mempool, block builder or metrics method hosted by the state server"""
+        return self._call(('service', name, args))
+
+    def _call(self, request):
+        sock = self._connection()
+        try:
+            _send(sock, request)
+            status, result, sequence = _recv(sock)
+        except (OSError, ConnectionError):
+            self._local.sock = None
+            sock.close()
+            raise
+
+        # Reads that follow a write must see it
+        if not self.wait_for(sequence):
+            logger.warning("State replica is still behind sequence %d after %ss", sequence, self.timeout)
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def close(self):
+        self._closed = True
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+class RemoteMempool:
+    """The state service's mempool, as seen from a worker"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __len__(self):
+        return self.client.call_service('mempool.len')
+
+    def __contains__(self, tx_hash):
+        return self.client.call_service('mempool.contains', tx_hash)
+
+    def add(self, entry):
+        """Queue an entry on the server and set its hash and nonce"""
+        accepted, reason, entry.tx_hash, entry.nonce = self.client.call_service('mempool.add', entry)
+        return accepted, reason
+
+    def next_nonce(self, sender):
+        return self.client.call_service('mempool.next_nonce', sender)
+
+    def stats(self):
+        return self.client.call_service('mempool.stats')
+
+
+class RemoteBlockBuilder:
+    """The state service's block builder, as seen from a worker"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def status(self, tx_hash):
+        return self.client.call_service('block_builder.status', tx_hash)
+
+    def stats(self):
+        return self.client.call_service('block_builder.stats')
+
+
+def main():
+    from core.blockchain import NeuraXBlockchain
+    from tokenomics.smart_contracts import NeuraXTokenomics
+
+    from src.services.governance import GovernanceEngine
+    from src.services.mempool import DEFAULT_FEE_COLLECTOR, BlockBuilder, Mempool
+    from src.services.validation import ValidationPipeline, resolve_verifier
+
+    logging.basicConfig(level=logging.INFO)
+    socket_path = os.environ.get('NEURAX_STATE_SOCKET', '/tmp/neurax-state.sock')
+    state = StateManager(
+        NeuraXBlockchain,
+        NeuraXTokenomics,
+        data_dir=os.environ.get('NEURAX_DATA_DIR'),
+        fsync=os.environ.get('NEURAX_WAL_FSYNC', '1') != '0',
+        governance_factory=GovernanceEngine,
+        compact=os.environ.get('NEURAX_COMPACT_STATE', '0') != '0'
+    )
+
+    # The deployment's single mempool; the validation pipeline, only built
+    # with NEURAX_VALIDATION_VERIFIER, forks its workers on start, so it is
+    # started before any other thread
+    mempool = Mempool(
+        max_size=int(os.environ.get('NEURAX_MEMPOOL_SIZE', 50000)),
+        max_age=int(os.environ.get('NEURAX_MEMPOOL_MAX_AGE', 3600)),
+        committed_nonces=state.nonces
+    )
+    validation = None
+    if os.environ.get('NEURAX_VALIDATION_VERIFIER'):
+        validation = ValidationPipeline(
+            resolve_verifier(os.environ['NEURAX_VALIDATION_VERIFIER']),
+            workers=int(os.environ.get('NEURAX_VALIDATION_WORKERS', 0)),
+            max_pending=int(os.environ.get('NEURAX_VALIDATION_QUEUE', 10000)),
+            chunk_size=int(os.environ.get('NEURAX_VALIDATION_CHUNK', 256))
+        )
+        validation.start()
+    block_builder = BlockBuilder(
+        mempool,
+        state,
+        interval=state.blockchain.block_time,
+        max_block_transactions=int(os.environ.get('NEURAX_MAX_BLOCK_TRANSACTIONS', 1000)),
+        pipeline=validation,
+        fee_collector=os.environ.get('NEURAX_FEE_COLLECTOR', DEFAULT_FEE_COLLECTOR)
+    )
+
+    server = StateServer(
+        state,
+        socket_path,
+        buffer_records=int(os.environ.get('NEURAX_STATE_BUFFER', 100000)),
+        block_builder=block_builder
+    )
+    block_builder.start()
+
+    print(f"NeuraX state service listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block_builder.stop()
+        if validation is not None:
+            validation.close()
+        server.server_close()
+        state.close()
+
+
+if __name__ == '__main__':
+    main()
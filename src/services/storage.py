@@ -0,0 +1,733 @@
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from decimal import Decimal
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from src.services.compact import compact_blocks, compact_tokenomics
+from src.services.effects import CommandEffects, EffectsMismatch
+from src.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Every log record is framed as <payload length><crc32 of payload><payload>
+FRAME_HEADER = struct.Struct('>II')
+SNAPSHOT_MAGIC = b'NXSNAP01'
+
+# Results of these types are journaled verbatim and checked on replay
+LOGGED_RESULT_TYPES = (str, int, float, bool, Decimal, type(None))
+
+
+class StorageError(Exception):
+    """Raised when the on-disk store is damaged beyond automatic recovery"""
+
+
+def command_outcome(result=None, error=None):
+    """Journaled form of a command's result, compared on replay"""
+    if error is not None:
+        return ('error', f"{type(error).__name__}: {error}")
+    if isinstance(result, LOGGED_RESULT_TYPES):
+        return ('ok', result)
+    return ('ok', type(result).__name__)
+
+
+def lock_directory(directory):
+    """Take an exclusive lock on ``directory`` for this process.
+
+    Returns the open lock file, which holds the lock until it is closed;
+    raises ``StorageError`` if another process (or another ``StateManager``
+    in this one) holds it.
+    """
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, 'LOCK'), 'a')
+    if fcntl is None:
+        logger.warning("fcntl is unavailable; %s is not protected against a second writer", directory)
+        return lock_file
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise StorageError(
+            f"{directory} is locked by another process; run a single state owner per data "
+            f"directory (see NEURAX_STATE_SOCKET)"
+        )
+    return lock_file
+
+
+def _fsync_directory(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_framed(path, payload):
+    """Atomically replace ``path`` with a checksummed snapshot file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload)))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(path) or '.')
+
+
+def read_framed(path):
+    """Read a file written by ``write_framed``, or ``None`` if it is damaged"""
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = len(SNAPSHOT_MAGIC) + FRAME_HEADER.size
+        if len(data) < header_end or data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        length, crc = FRAME_HEADER.unpack_from(data, len(SNAPSHOT_MAGIC))
+        payload = data[header_end:header_end + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+
+class SegmentLog:
+    """Append-only write-ahead log split into fixed-size segment files.
+
+    Positions are ``(segment, offset)`` tuples pointing just past a record.
+    ``append`` only writes; ``sync`` makes a position durable and covers
+    every record appended before it, so concurrent writers share one fsync
+    (group commit). Segments are read back through ``mmap``; a torn or
+    corrupt record at the end of the newest segment (an interrupted write)
+    is truncated away on recovery, while damage anywhere else raises
+    ``StorageError``.
+    """
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, fsync=True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        segments = self.segments()
+        self._segment = segments[-1] if segments else 1
+        self._file = open(self._path(self._segment), 'ab')
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._durable = self.position()
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"wal-{segment:08d}.log")
+
+    def segments(self):
+        """Indexes of the segment files on disk, oldest first"""
+        return sorted(
+            int(name[4:12]) for name in os.listdir(self.directory)
+            if name.startswith('wal-') and name.endswith('.log')
+        )
+
+    def position(self):
+        """Position just past the last appended record"""
+        return self._segment, self._file.tell()
+
+    def append(self, payload):
+        """Append one record and return the position just past it"""
+        with self._lock:
+            if self._file.tell() >= self.segment_size:
+                self._rotate()
+
+            self._file.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload)))
+            self._file.write(payload)
+            self._file.flush()
+            return self.position()
+
+    def sync(self, position):
+        """Block until every record up to ``position`` is on disk"""
+        if not self.fsync:
+            return
+        with self._sync_lock:
+            if self._durable >= position:
+                return
+            with self._lock:
+                os.fsync(self._file.fileno())
+                self._durable = self.position()
+
+    def _rotate(self):
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._path(self._segment), 'ab')
+        _fsync_directory(self.directory)
+
+    def replay(self, position=(0, 0)):
+        """Yield every record payload after ``position``, oldest first"""
+        start_segment, start_offset = position
+        segments = [s for s in self.segments() if s >= start_segment]
+
+        for segment in segments:
+            offset = start_offset if segment == start_segment else 0
+            for payload in self._read_segment(segment, offset, last=segment == segments[-1]):
+                yield payload
+
+    def _read_segment(self, segment, offset, last):
+        path = self._path(segment)
+        size = os.path.getsize(path)
+        if size <= offset:
+            return
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while offset < size:
+                if offset + FRAME_HEADER.size > size:
+                    break
+                length, crc = FRAME_HEADER.unpack_from(data, offset)
+                start = offset + FRAME_HEADER.size
+                payload = data[start:start + length]
+                if len(payload) != length or zlib.crc32(payload) != crc:
+                    break
+                yield payload
+                offset = start + length
+
+        if offset < size:
+            if not last:
+                raise StorageError(f"Corrupt record in {path} at offset {offset}")
+            logger.warning("Truncating torn write-ahead log tail in %s at offset %d", path, offset)
+            self._file.close()
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+            self._file = open(self._path(self._segment), 'ab')
+
+    def discard_before(self, segment):
+        """Delete segments that are fully covered by a snapshot"""
+        for old in self.segments():
+            if old < segment:
+                os.remove(self._path(old))
+
+    def close(self):
+        self._file.close()
+
+
+class SnapshotStore:
+    """Atomic, checksummed snapshot files written next to the log"""
+
+    def __init__(self, directory, keep=2):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def _snapshots(self):
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith('snapshot-') and name.endswith('.pickle')
+        )
+
+    def write(self, sequence, payload):
+        """Durably write a snapshot taken at ``sequence``"""
+        write_framed(os.path.join(self.directory, f"snapshot-{sequence:016d}.pickle"), payload)
+        for name in self._snapshots()[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+
+    def load_latest(self):
+        """Return the payload of the newest intact snapshot, or ``None``"""
+        for name in reversed(self._snapshots()):
+            path = os.path.join(self.directory, name)
+            payload = read_framed(path)
+            if payload is None:
+                logger.warning("Ignoring corrupt snapshot %s", path)
+                continue
+            return payload
+        return None
+
+
+class Genesis:
+    """Balance allocations outside the engine's transaction ledger.
+
+    The engine has no mint or faucet call, so seeded test and benchmark
+    state credits its starting balances through this target
+    (``execute('genesis', 'allocate', balances)``); like any command the
+    allocation is journaled, replayed and streamed to replicas.
+    """
+
+    def __init__(self, tokenomics):
+        self.tokenomics = tokenomics
+
+    def allocate(self, balances):
+        """Set the balance of each ``{address: amount}``, creating missing accounts"""
+        token_contract = self.tokenomics.token_contract
+        for address, amount in balances.items():
+            if token_contract.get_account(address) is None:
+                token_contract.create_account(address)
+            token_contract.get_account(address).balance = amount
+        return len(balances)
+
+
+class Nonces:
+    """Next mempool nonce of each sender whose transactions were packed.
+
+    The block builder commits the nonces a block used in the block's own
+    batch (``execute('nonces', 'commit', {sender: next_nonce})``), so they
+    are journaled, snapshotted and replayed with the rest of the state and
+    a restarted mempool continues every sender's sequence.
+    """
+
+    def __init__(self):
+        self._next = {}
+
+    def commit(self, nonces):
+        """Raise each sender's next nonce to at least the given one"""
+        for sender, nonce in nonces.items():
+            if nonce > self._next.get(sender, 0):
+                self._next[sender] = nonce
+        return len(nonces)
+
+    def get(self, sender):
+        return self._next.get(sender, 0)
+
+
+class StateManager:
+    """Owner of the blockchain and tokenomics state.
+
+    Every state-changing call goes through ``execute`` as a command
+    ``(target, method, args, kwargs)``, where ``target`` is a dotted path
+    such as ``'tokenomics'`` or ``'tokenomics.governance_contract'``, or
+    ``'governance'`` for the optional governance engine built by
+    ``governance_factory(tokenomics)``, ``'genesis'`` for starting
+    balances (see ``Genesis``) or ``'nonces'`` for the mempool's committed
+    nonces (see ``Nonces``).
+    Commands run one at a time under a single apply lock, which also
+    assigns the sequence number. The engine needs it: every call updates
+    shared counters such as collected fees and supply and shared dicts
+    such as the ledger, none of it thread-safe, and the log must list
+    commands in the order they really ran. (Per-account lock striping on
+    top of this lock measured no faster.) A batch is validated and applied
+    under one acquisition, so its balance checks stay valid. With a ``data_dir`` each command is appended
+    to a segmented log as soon as it has been applied, together with the
+    records it created (see ``src.services.effects``) and its result; the
+    fsync happens after the apply lock is released, so concurrent commands
+    share it (group commit) and callers only get their result once it is
+    durable. The full state is snapshotted every ``snapshot_every`` commands
+    or ``snapshot_interval`` seconds. Startup loads the newest snapshot and
+    replays the log tail written after it (a new data directory is
+    snapshotted before its first command), giving the records each command
+    creates their journaled ids and timestamps; a command that does not
+    reproduce its journaled records and result raises ``StorageError``.
+    The data directory is locked for the lifetime of the manager, so a
+    second process cannot append to the same log. Without a ``data_dir``
+    state is kept purely in memory.
+
+    Commands must not carry secrets: they are journaled, snapshotted and
+    streamed to replicas as given. Routes verify private keys and pass
+    signatures instead (see ``src.services.signing``).
+
+    ``listeners`` are called as ``listener(record, payload)`` with every
+    command applied, under the apply lock and in sequence order, where
+    ``record`` is the journaled tuple and ``payload`` its pickled form (see
+    ``src.services.state_server`` for replicas that replay them).
+
+    A failed snapshot is retried after ``snapshot_retry`` seconds. Once
+    ``max_unsnapshotted`` commands are not covered by a snapshot, writes
+    fail with ``StorageError`` until one succeeds, so the log cannot grow
+    without bound.
+
+    With ``compact`` accounts, the ledger and confirmed block transactions
+    are kept in struct-of-arrays tables with fixed-point amounts (see
+    ``src.services.compact``); blocks are compacted as they are appended.
+    This trades time for memory: building the tables at startup, recovery
+    and on each block is several times slower than keeping plain objects
+    (see ``benchmarks/bench_memory.py``), and each amount read rebuilds a
+    Decimal.
+
+    ``reward_rates`` lists ``(timestamp, staking_reward_rate)`` each time
+    the configured staking APY changes, starting with the rate at time 0.
+    The engine keeps no such history, so it is part of the journaled state:
+    checked after each command, journaled with the command that changed it,
+    snapshotted and rebuilt by replay, for ``src.services.staking_rewards``
+    to accrue against.
+    """
+
+    def __init__(self, blockchain_factory, tokenomics_factory, data_dir=None,
+                 snapshot_every=10000, snapshot_interval=300, fsync=True,
+                 governance_factory=None, compact=False, snapshot_retry=30, max_unsnapshotted=None):
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_retry = snapshot_retry
+        self.max_unsnapshotted = max_unsnapshotted or 10 * snapshot_every
+        self.snapshot_failures = 0
+        self.sequence = 0
+        self.compact = compact
+        self._compacted_height = 0
+        self._apply_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._position = (0, 0)
+        self._last_snapshot_sequence = 0
+        self._last_snapshot_time = time.time()
+        self._snapshot_retry_at = 0.0
+        self._log_error = None
+        self.listeners = []
+        self.reward_rates = []
+        self.nonces = Nonces()
+        self._log = None
+        self._snapshots = None
+        self._dir_lock = None
+        self._effects = CommandEffects(self)
+
+        self.blockchain = None
+        self.tokenomics = None
+        self.governance = None
+
+        if data_dir:
+            self._dir_lock = lock_directory(data_dir)
+            try:
+                self._snapshots = SnapshotStore(data_dir)
+                self._log = SegmentLog(os.path.join(data_dir, 'wal'), fsync=fsync)
+                self._recover(blockchain_factory, tokenomics_factory, governance_factory)
+            except BaseException:
+                if self._log is not None:
+                    self._log.close()
+                self._dir_lock.close()
+                raise
+        else:
+            self.blockchain = blockchain_factory()
+            self.tokenomics = tokenomics_factory()
+            if governance_factory:
+                self.governance = governance_factory(self.tokenomics)
+            self._prepare_state()
+
+    def _prepare_state(self):
+        if self.compact:
+            compact_tokenomics(self.tokenomics)
+            self._compacted_height = compact_blocks(self.blockchain)
+        self._track_reward_rate()
+
+    def _recover(self, blockchain_factory, tokenomics_factory, governance_factory=None):
+        started = time.time()
+        payload = self._snapshots.load_latest()
+        if payload is not None:
+            snapshot = pickle.loads(payload)
+            self.blockchain = snapshot['blockchain']
+            self.tokenomics = snapshot['tokenomics']
+            self.governance = snapshot.get('governance')
+            self.reward_rates = snapshot.get('reward_rates', [])
+            self.nonces = snapshot.get('nonces') or Nonces()
+            self.sequence = self._last_snapshot_sequence = snapshot['sequence']
+            self._position = snapshot['position']
+        else:
+            self.blockchain = blockchain_factory()
+            self.tokenomics = tokenomics_factory()
+        if self.governance is None and governance_factory:
+            self.governance = governance_factory(self.tokenomics)
+        self._prepare_state()
+        if payload is None:
+            # The engine stamps its initial state (the genesis block) when it
+            # is constructed; keep that state rather than rebuilding it
+            self.snapshot(wait=True)
+
+        replayed = 0
+        for record in self._log.replay(self._position):
+            record = pickle.loads(record)
+            if record[0] <= self.sequence:
+                continue
+            self._replay(record)
+            replayed += 1
+
+        self._position = self._log.position()
+        logger.info(
+            "Recovered state at sequence %d (%d commands replayed) in %.2fs",
+            self.sequence, replayed, time.time() - started
+        )
+
+    def _replay(self, record):
+        """Re-apply a journaled command, restoring the records it created.
+
+        Raises ``StorageError`` if the command does not reproduce its
+        journaled records and outcome; the state is then unusable.
+        """
+        if len(record) == 5:
+            # Written before results and effects were journaled
+            record = record + (None, None)
+        sequence, target, method, args, kwargs, effects, outcome = record
+        if not isinstance(effects, bytes):
+            effects = None
+        try:
+            result, error, _ = self._apply(target, method, args, kwargs, phase='state_replay', journaled=effects)
+        except EffectsMismatch as e:
+            raise StorageError(f"Replayed command {sequence} ({target}.{method}) diverged: {e}") from e
+        replayed_outcome = command_outcome(result, error)
+        if outcome is not None and replayed_outcome != outcome:
+            raise StorageError(
+                f"Replayed command {sequence} ({target}.{method}) did not reproduce its journaled "
+                f"outcome: {replayed_outcome!r}, journaled {outcome!r}"
+            )
+        self.sequence = sequence
+        self._notify(record, None)
+        return replayed_outcome
+
+    def _notify(self, record, payload):
+        for listener in self.listeners:
+            try:
+                listener(record, payload)
+            except Exception:
+                # The command is applied and journaled either way
+                logger.exception("State listener failed on command %d", record[0])
+
+    def _resolve(self, target):
+        root, _, path = target.partition('.')
+        if root == 'genesis':
+            obj = Genesis(self.tokenomics)
+        elif root == 'nonces':
+            obj = self.nonces
+        else:
+            obj = {'blockchain': self.blockchain, 'tokenomics': self.tokenomics, 'governance': self.governance}[root]
+        for name in filter(None, path.split('.')):
+            obj = getattr(obj, name)
+        return obj
+
+    def _apply(self, target, method, args, kwargs, phase='state_apply', journaled=None):
+        """Run one command; returns ``(result, error, effects)``.
+
+        ``effects`` is the pickled records the command created. On replay
+        the records are given the ``journaled`` ones' contents instead and
+        ``result`` is mapped to the journaled id it was renamed from.
+        """
+        marks = self._effects.mark()
+        result = error = None
+        try:
+            if self.governance is not None:
+                # Record voting power snapshots before balances change
+                self.governance.before_command(target, method, args, kwargs)
+            # Replays (recovery and worker replicas) are timed apart from the
+            # commands this process applies for the first time
+            with metrics.phase(phase, f"{target}.{method}"):
+                result = getattr(self._resolve(target), method)(*args, **kwargs)
+        except Exception as e:
+            error = e
+        self._track_reward_rate()
+        if phase == 'state_replay':
+            effects = self._effects.restore(marks, target, method, result, journaled)
+            if isinstance(result, str):
+                result = effects.get(result, result)
+        else:
+            effects = self._effects.capture(marks, target, method, result)
+        if self.governance is not None and error is None:
+            # Index what the command created under its journaled ids
+            self.governance.after_command(target, method, args, kwargs, result)
+        if self.compact and target == 'blockchain':
+            self._compacted_height = compact_blocks(self.blockchain, self._compacted_height)
+        return result, error, effects
+
+    def _track_reward_rate(self):
+        config = getattr(self.tokenomics, 'config', None)
+        rate = getattr(config, 'staking_reward_rate', None)
+        if rate is None or (self.reward_rates and self.reward_rates[-1][1] == rate):
+            return
+        if not self.reward_rates:
+            # The starting rate applies from the beginning of time
+            self.reward_rates.append((0.0, rate))
+        else:
+            # Replay restores the journaled date (see src.services.effects)
+            self.reward_rates.append((time.time(), rate))
+
+    def _commit(self, target, method, args, kwargs):
+        """Apply one command, then number and journal it; hold ``_apply_lock``"""
+        if self._log_error is not None:
+            raise StorageError(f"Write-ahead log failed, refusing writes: {self._log_error}")
+        result, error, effects = self._apply(target, method, args, kwargs)
+        self.sequence += 1
+
+        if self._log is not None or self.listeners:
+            started = time.perf_counter()
+            record = (self.sequence, target, method, args, kwargs, effects, command_outcome(result, error))
+            try:
+                payload = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+                if self._log is not None:
+                    self._position = self._log.append(payload)
+            except Exception as e:
+                # The state is now ahead of the log; stop before they diverge further
+                self._log_error = e
+                logger.exception("Failed to journal command %d (%s.%s)", self.sequence, target, method)
+                raise StorageError(f"Failed to journal command: {e}") from e
+            metrics.record_phase('state_journal', time.perf_counter() - started)
+            self._notify(record, payload)
+
+        if error is not None:
+            raise error
+        return result
+
+    def _sync(self, position):
+        """Wait until the log is durable up to ``position``"""
+        if self._log is not None:
+            started = time.perf_counter()
+            self._log.sync(position)
+            metrics.record_phase('state_sync', time.perf_counter() - started)
+
+    def _check_log_size(self):
+        """Snapshot, or refuse the write, once too much log is uncovered"""
+        if self._log is None or self.sequence - self._last_snapshot_sequence < self.max_unsnapshotted:
+            return
+        self.snapshot(wait=True)
+        if self.sequence - self._last_snapshot_sequence >= self.max_unsnapshotted:
+            raise StorageError(
+                f"{self.sequence - self._last_snapshot_sequence} commands are not covered by a snapshot "
+                f"and snapshots are failing; refusing writes until one succeeds"
+            )
+
+    def execute(self, target, method, *args, **kwargs):
+        """Journal and apply one state-changing call, returning its result"""
+        self._check_log_size()
+        started = time.perf_counter()
+        with self._apply_lock:
+            metrics.record_phase('state_lock_wait', time.perf_counter() - started)
+            result = self._commit(target, method, args, kwargs)
+            position = self._position
+
+        self._sync(position)
+        if self._log is not None and self._snapshot_due():
+            self.snapshot()
+        return result
+
+    def execute_batch(self, commands, validate=None, strict=False):
+        """Journal and apply many commands under a single lock acquisition.
+
+        ``commands`` is a list of ``(target, method, args, kwargs)``. While
+        the lock is held, ``validate(state, commands)`` may return an error
+        message (or ``None``) per command; rejected commands are skipped. With
+        ``strict`` nothing is applied if any command is rejected, and applying
+        stops at the first command that raises or returns a falsy result; the
+        commands after it are reported as not applied. Commands applied before
+        that one stay applied: there is no rollback. The accepted commands
+        share one durable log write. Returns a list of
+        ``(ok, result_or_error)`` tuples in command order.
+        """
+        self._check_log_size()
+        started = time.perf_counter()
+        with self._apply_lock:
+            metrics.record_phase('state_lock_wait', time.perf_counter() - started)
+            errors = validate(self, commands) if validate else [None] * len(commands)
+            if strict and any(errors):
+                return [
+                    (False, error or "Batch rejected: another command in the batch is invalid")
+                    for error in errors
+                ]
+
+            results = []
+            stopped = False
+            for command, error in zip(commands, errors):
+                if stopped:
+                    error = "Not applied: an earlier command in the batch failed"
+                if error is not None:
+                    results.append((False, error))
+                    continue
+                try:
+                    result = self._commit(*command)
+                    results.append((True, result))
+                    stopped = strict and not result
+                except Exception as e:
+                    results.append((False, str(e)))
+                    stopped = strict
+            position = self._position
+
+        self._sync(position)
+        if self._log is not None and self._snapshot_due():
+            self.snapshot()
+        return results
+
+    def _snapshot_due(self):
+        if time.time() < self._snapshot_retry_at:
+            return False
+        return (
+            self.sequence - self._last_snapshot_sequence >= self.snapshot_every
+            or time.time() - self._last_snapshot_time >= self.snapshot_interval
+        )
+
+    def _pickle_state(self, sequence, position):
+        return pickle.dumps({
+            'blockchain': self.blockchain,
+            'tokenomics': self.tokenomics,
+            'governance': self.governance,
+            'compact': self.compact,
+            'reward_rates': list(self.reward_rates),
+            'nonces': self.nonces,
+            'sequence': sequence,
+            'position': position
+        }, pickle.HIGHEST_PROTOCOL)
+
+    def serialize(self):
+        """Pickle a consistent cut of the state.
+
+        Returns ``(sequence, position, payload)``; the payload is the format
+        read back by ``_recover`` and ``from_snapshot``. It is pickled under
+        the apply lock, so writers wait for the pickling but not for the
+        disk write. (Forking a copy-on-write child instead is unsafe here:
+        the process runs request threads that may hold other locks.)
+        """
+        with self._apply_lock:
+            return self.sequence, self._position, self._pickle_state(self.sequence, self._position)
+
+    @classmethod
+    def from_snapshot(cls, payload, **kwargs):
+        """In-memory state rebuilt from a ``serialize`` payload.
+
+        Used for worker replicas: records committed after the cut are
+        applied with ``_replay``.
+        """
+        snapshot = pickle.loads(payload)
+        state = cls(
+            lambda: snapshot['blockchain'],
+            lambda: snapshot['tokenomics'],
+            governance_factory=(lambda _: snapshot['governance']) if snapshot.get('governance') is not None else None,
+            compact=snapshot.get('compact', False),
+            **kwargs
+        )
+        state.sequence = snapshot['sequence']
+        state.reward_rates = snapshot.get('reward_rates', state.reward_rates)
+        state.nonces = snapshot.get('nonces') or state.nonces
+        return state
+
+    def snapshot(self, wait=False):
+        """Write a snapshot of the current state and drop covered log segments.
+
+        Returns True on success. Without ``wait`` nothing happens while
+        another snapshot is being written.
+        """
+        if self._snapshots is None or not self._snapshot_lock.acquire(blocking=wait):
+            return False
+
+        try:
+            # Writers only wait for the cut; the disk write happens after
+            sequence, position, payload = self.serialize()
+            self._snapshots.write(sequence, payload)
+            self._log.discard_before(position[0])
+
+            self._last_snapshot_sequence = sequence
+            self._last_snapshot_time = time.time()
+            self.snapshot_failures = 0
+            return True
+        except Exception:
+            # Leave the log in place and back off; _check_log_size stops
+            # writes if failures persist
+            self.snapshot_failures += 1
+            self._snapshot_retry_at = time.time() + self.snapshot_retry
+            logger.exception("Failed to write state snapshot (%d in a row)", self.snapshot_failures)
+            return False
+        finally:
+            self._snapshot_lock.release()
+
+    def close(self):
+        """Snapshot, close the log and release the data directory"""
+        if self._log is not None:
+            if self.sequence != self._last_snapshot_sequence:
+                self.snapshot()
+            self._log.close()
+        if self._dir_lock is not None:
+            self._dir_lock.close()
+            self._dir_lock = None
@@ -0,0 +1,104 @@
+import json
+
+from src.services.amounts import AmountError, from_wei, parse_amount, to_wei
+
+MAX_BATCH_SIZE = 10000
+TRANSFER_FIELDS = ('from_address', 'to_address', 'amount', 'private_key')
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonlines')
+
+
+def read_transfer_batch(request):
+    """Read the transfers of a batch request.
+
+    Accepts a JSON list, a JSON object with a ``transfers`` list, or an
+    NDJSON body with one transfer per line. Returns ``(items, strict)``
+    where ``strict`` comes from the object body or the ``strict`` query arg.
+    """
+    strict = request.args.get('strict', 'false').lower() in ('1', 'true', 'yes')
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = []
+        for line in request.stream:
+            line = line.strip()
+            if line:
+                items.append(json.loads(line))
+                if len(items) > MAX_BATCH_SIZE:
+                    break
+    else:
+        body = request.get_json()
+        if isinstance(body, dict):
+            strict = bool(body.get('strict', strict))
+            body = body.get('transfers')
+        items = body
+
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list of transfers")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch exceeds maximum size of {MAX_BATCH_SIZE} transfers")
+    return items, strict
+
+
+def build_transfer_commands(items, transfer_type):
+    """Turn raw transfer items into state commands.
+
+    Returns ``(commands, errors)``; items that fail field or amount checks
+    get an error message and ``None`` in place of a command.
+    """
+    commands = []
+    errors = []
+    for item in items:
+        error = None
+        amount = None
+        if not isinstance(item, dict):
+            error = "Transfer must be an object"
+        else:
+            missing = [field for field in TRANSFER_FIELDS if field not in item]
+            if missing:
+                error = f"Missing required field: {missing[0]}"
+            else:
+                try:
+                    amount = parse_amount(item['amount'], positive=True)
+                except AmountError as e:
+                    error = str(e)
+
+        if error is None:
+            args = (transfer_type, item['from_address'], item['to_address'], from_wei(amount))
+            commands.append(('tokenomics', 'create_transaction', args, {}))
+        else:
+            commands.append(None)
+        errors.append(error)
+    return commands, errors
+
+
+def check_transfer_balances(state, commands):
+    """Validate a transfer batch against current balances in one pass.
+
+    Balances are netted through the batch: funds received by an earlier
+    transfer can be spent by a later one, and every account is read from
+    the token contract at most once. Each transfer needs its amount plus the
+    engine's ``transaction_fee`` from the sender. Netting is done in wei.
+    Runs under the state's apply lock.
+    """
+    token_contract = state.tokenomics.token_contract
+    fee = to_wei(state.tokenomics.config.transaction_fee)
+    available = {}
+    errors = []
+
+    for _, _, (_, from_address, to_address, amount), _ in commands:
+        amount = to_wei(amount)
+        for address in (from_address, to_address):
+            if address not in available:
+                account = token_contract.get_account(address)
+                available[address] = to_wei(account.available_balance()) if account else None
+
+        if available[from_address] is None:
+            errors.append(f"Account not found: {from_address}")
+        elif available[to_address] is None:
+            errors.append(f"Account not found: {to_address}")
+        elif available[from_address] < amount + fee:
+            errors.append("Insufficient balance")
+        else:
+            available[from_address] -= amount + fee
+            available[to_address] += amount
+            errors.append(None)
+    return errors
@@ -0,0 +1,189 @@
+import importlib
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_verifier(path):
+    """Import a verifier given as ``'package.module:function'``"""
+    module_name, _, name = path.partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def verify_chunk(verify, items):
+    """Run ``verify`` over a chunk of argument tuples in a worker process"""
+    results = []
+    for item in items:
+        try:
+            results.append(verify(*item))
+        except Exception as e:
+            results.append(f"Verification failed: {e}")
+    return results
+
+
+def _noop():
+    return None
+
+
+class _Batch:
+    __slots__ = ('items', 'futures', 'on_done')
+
+    def __init__(self, items, futures, on_done):
+        self.items = items
+        self.futures = futures
+        self.on_done = on_done
+
+
+class ValidationPipeline:
+    """Verifies batches across worker processes and commits them in order.
+
+    ``submit(items, on_done)`` splits a batch into chunks of ``chunk_size``
+    argument tuples and hands them to a ``ProcessPoolExecutor`` running
+    ``verify``, a picklable module-level function returning an error
+    message or ``None`` per item. For mempool blocks the items are
+    ``MempoolEntry.verification_args()``; the mempool has already checked
+    hashes, nonces and amounts on admission, so a verifier is for what it
+    cannot check, such as signatures, and the repo ships none. A single
+    committer thread waits for the oldest batch and calls
+    ``on_done(items, results)``, so batches are committed in submission
+    order while later batches are still being verified. At most ``max_pending`` items are in flight: ``submit``
+    blocks (or returns ``False`` when not blocking) until older batches
+    have been committed.
+
+    With ``workers=0`` there is no pool and the committer verifies each
+    batch itself.
+    """
+
+    def __init__(self, verify, workers=0, max_pending=10000, chunk_size=256, mp_context=None):
+        self.verify = verify
+        self.workers = workers
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(workers, mp_context=mp_context) if workers else None
+        self._condition = threading.Condition()
+        self._batches = deque()
+        self._pending = 0
+        self._closed = False
+        self._thread = None
+        self.counters = {
+            "submitted": 0,
+            "committed": 0,
+            "rejected": 0,
+            "backpressure_waits": 0
+        }
+        self._busy_seconds = 0.0
+
+    def start(self):
+        """Start the committer and the worker processes.
+
+        Call before starting other threads: with the ``fork`` start method
+        the pool forks every worker on its first task.
+        """
+        if self._executor is not None:
+            self._executor.submit(_noop).result()
+        self._thread = threading.Thread(target=self._run, name='neurax-validation-commit', daemon=True)
+        self._thread.start()
+
+    def _full(self, count):
+        # An oversized batch is let through once the pipeline is empty
+        return self._pending and self._pending + count > self.max_pending
+
+    def submit(self, items, on_done, block=True, timeout=None):
+        """Queue a batch for verification; returns ``False`` if the queue stayed full"""
+        items = list(items)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Validation pipeline is closed")
+            if self._full(len(items)):
+                if not block:
+                    return False
+                self.counters["backpressure_waits"] += 1
+                if not self._condition.wait_for(lambda: not self._full(len(items)), timeout):
+                    return False
+
+            futures = None
+            if self._executor is not None:
+                futures = [
+                    self._executor.submit(verify_chunk, self.verify, items[i:i + self.chunk_size])
+                    for i in range(0, len(items), self.chunk_size)
+                ]
+            self._batches.append(_Batch(items, futures, on_done))
+            self._pending += len(items)
+            self.counters["submitted"] += len(items)
+            self._condition.notify_all()
+            return True
+
+    def verify_many(self, items, timeout=None):
+        """Verify items through the pipeline and wait for their results"""
+        done = threading.Event()
+        results = []
+
+        def on_done(_, batch_results):
+            results.extend(batch_results)
+            done.set()
+
+        if not self.submit(items, on_done, timeout=timeout) or not done.wait(timeout):
+            raise TimeoutError("Validation pipeline is full")
+        return results
+
+    def _results(self, batch):
+        if batch.futures is None:
+            return verify_chunk(self.verify, batch.items)
+        results = []
+        for i, future in enumerate(batch.futures):
+            chunk_size = min(self.chunk_size, len(batch.items) - i * self.chunk_size)
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                # A crashed worker fails its whole chunk
+                results.extend([f"Verification failed: {e}"] * chunk_size)
+        return results
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._batches or self._closed)
+                if not self._batches:
+                    return
+                batch = self._batches[0]
+
+            started = time.time()
+            results = self._results(batch)
+            try:
+                batch.on_done(batch.items, results)
+            except Exception:
+                logger.exception("Failed to commit a validated batch of %d items", len(batch.items))
+
+            with self._condition:
+                self._batches.popleft()
+                self._pending -= len(batch.items)
+                self.counters["committed"] += len(batch.items)
+                self.counters["rejected"] += sum(1 for result in results if result is not None)
+                self._busy_seconds += time.time() - started
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return dict(
+                self.counters,
+                workers=self.workers,
+                pending=self._pending,
+                pending_batches=len(self._batches),
+                max_pending=self.max_pending,
+                chunk_size=self.chunk_size,
+                commit_busy_seconds=round(self._busy_seconds, 3)
+            )
+
+    def close(self, wait=True):
+        """Commit what is queued, then stop the committer and the workers"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait and self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
@@ -0,0 +1,222 @@
+import math
+from bisect import bisect_left, insort
+from collections import deque
+
+from src.services.amounts import format_wei, to_wei
+from src.services.followers import LedgerFollower
+
+DEFAULT_SCORE = 50.0
+# Rank labels as (label, largest share of validators ranked at or above)
+RANK_TIERS = (
+    ('Top 10%', 0.10),
+    ('Top 25%', 0.25)
+)
+
+
+def _tx_type(tx):
+    return getattr(tx.tx_type, 'value', tx.tx_type)
+
+
+class _SortedChunks:
+    """Sorted list split into chunks of about ``load`` keys.
+
+    Inserts and removals only shift one chunk, so they stay cheap with
+    hundreds of thousands of keys where a single flat list would move the
+    whole tail on every change.
+    """
+
+    def __init__(self, keys=(), load=1000):
+        keys = sorted(keys)
+        self._load = load
+        self._chunks = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        self._len += 1
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            return
+        i = min(bisect_left(self._maxes, key), len(self._chunks) - 1)
+        chunk = self._chunks[i]
+        insort(chunk, key)
+        self._maxes[i] = chunk[-1]
+        if len(chunk) > 2 * self._load:
+            self._chunks[i:i + 1] = [chunk[:self._load], chunk[self._load:]]
+            self._maxes[i:i + 1] = [chunk[self._load - 1], chunk[-1]]
+
+    def remove(self, key):
+        i = bisect_left(self._maxes, key)
+        chunk = self._chunks[i]
+        del chunk[bisect_left(chunk, key)]
+        self._len -= 1
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+
+    def bisect_left(self, key):
+        """Number of keys less than ``key``"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._chunks):
+            return self._len
+        return sum(map(len, self._chunks[:i])) + bisect_left(self._chunks[i], key)
+
+    def slice(self, start, stop):
+        keys = []
+        for chunk in self._chunks:
+            if start >= len(chunk):
+                start -= len(chunk)
+                stop -= len(chunk)
+                continue
+            keys.extend(chunk[start:stop])
+            stop -= len(chunk)
+            start = 0
+            if stop <= 0:
+                break
+        return keys
+
+
+class _History:
+    """Last ``size`` validations of one validator with running totals"""
+
+    __slots__ = ('entries', 'accuracy_sum', 'total_validations', 'total_rewards', 'consumed')
+
+    def __init__(self, size):
+        self.entries = deque(maxlen=size)
+        self.accuracy_sum = 0.0
+        self.total_validations = 0
+        self.total_rewards = 0
+        # Entries of the contract's validation_history already read
+        self.consumed = 0
+
+    def push(self, entry):
+        if len(self.entries) == self.entries.maxlen:
+            self.accuracy_sum -= self.entries[0]['validation_result'].get('accuracy', 0.5)
+        self.entries.append(entry)
+        self.accuracy_sum += entry['validation_result'].get('accuracy', 0.5)
+        self.total_validations += 1
+        self.total_rewards += to_wei(entry['reward'])
+
+    def recent_accuracy(self):
+        return self.accuracy_sum / max(1, len(self.entries))
+
+
+class ValidatorLeaderboard(LedgerFollower):
+    """AI validator scores kept in rank order.
+
+    Validators are kept as ``(-score, address)`` keys in a chunked sorted
+    list that is updated whenever an AI validation moves a validator's
+    score, so percentile ranks and leaderboard pages are bisections and
+    slices, and the average score is a running sum.
+
+    Each validator's recent validations are kept in a ring buffer of
+    ``history_size`` entries with a running accuracy sum; new entries are
+    read from the contract's ``validation_history`` by position as the
+    ledger reports validations, so the full history is never re-sliced.
+    """
+
+    def __init__(self, tokenomics, history_size=10):
+        super().__init__(tokenomics)
+        self.history_size = history_size
+        self._scores = dict(tokenomics.ai_rewards_contract.ai_scores)
+        self._board = _SortedChunks((-score, address) for address, score in self._scores.items())
+        self._score_sum = sum(self._scores.values())
+        self._histories = {}
+
+    def _set_score(self, address, score):
+        previous = self._scores.get(address)
+        if previous == score:
+            return
+        if previous is not None:
+            self._board.remove((-previous, address))
+            self._score_sum -= previous
+        self._scores[address] = score
+        self._board.add((-score, address))
+        self._score_sum += score
+
+    def _apply_transaction(self, seq, tx_id, tx):
+        if _tx_type(tx) != 'ai_validation':
+            return
+        address = tx.from_address
+        contract = self.tokenomics.ai_rewards_contract
+        score = contract.ai_scores.get(address)
+        if score is not None:
+            self._set_score(address, score)
+
+        history = self._histories.get(address)
+        if history is None:
+            history = self._histories[address] = _History(self.history_size)
+        entries = contract.validation_history.get(address, ())
+        # Entries recorded since the last validation we saw; on a lagging
+        # replica one transaction may pick up several
+        for i in range(history.consumed, len(entries)):
+            history.push(entries[i])
+        history.consumed = len(entries)
+
+    def count(self):
+        self.sync()
+        with self._lock:
+            return len(self._scores)
+
+    def average_score(self):
+        self.sync()
+        with self._lock:
+            return self._score_sum / max(1, len(self._scores))
+
+    def _rank(self, score):
+        total = len(self._board)
+        # (-score,) sorts before every (-score, address) key, so these count
+        # validators scoring strictly higher and at least as high
+        above = self._board.bisect_left((-score,))
+        at_least = self._board.bisect_left((math.nextafter(-score, math.inf),))
+        below = total - at_least
+        position = above + 1
+        share = position / max(1, total)
+        label = next((name for name, limit in RANK_TIERS if share <= limit), 'Average')
+        return {
+            "rank": label,
+            "position": position,
+            "percentile": round((below + (total - below - above) / 2) / max(1, total) * 100, 2),
+            "total_validators": total
+        }
+
+    def validator(self, address):
+        """Score, rank and recent validations of one validator"""
+        self.sync()
+        with self._lock:
+            score = self._scores.get(address, DEFAULT_SCORE)
+            history = self._histories.get(address)
+            stats = {
+                "address": address,
+                "ai_score": score,
+                "total_validations": history.total_validations if history else 0,
+                "total_rewards": format_wei(history.total_rewards if history else 0),
+                "recent_accuracy": history.recent_accuracy() if history else 0.0,
+                "validation_history": list(history.entries) if history else []
+            }
+            stats.update(self._rank(score))
+            return stats
+
+    def page(self, page, limit):
+        """One page of validators, highest score first"""
+        self.sync()
+        with self._lock:
+            start = (page - 1) * limit
+            entries = []
+            for negative_score, address in self._board.slice(start, start + limit):
+                history = self._histories.get(address)
+                entry = {
+                    "address": address,
+                    "ai_score": -negative_score,
+                    "total_validations": history.total_validations if history else 0,
+                    "recent_accuracy": history.recent_accuracy() if history else 0.0
+                }
+                entry.update(self._rank(-negative_score))
+                entries.append(entry)
+            return entries
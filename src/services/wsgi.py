@@ -0,0 +1,83 @@
+"""Running the Flask WSGI app for ASGI requests (see ``src.asgi``).
+
+A minimal PEP 3333 bridge: ``build_environ`` turns an ASGI HTTP scope into
+a WSGI environ and ``run_wsgi`` calls the app on the current thread,
+handing its response to a blocking ``send`` as ASGI messages.
+"""
+import io
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP ``scope`` whose request body is the file ``body``"""
+    script_name = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+    path_info = scope['path'].encode('utf-8').decode('latin-1')
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin-1')
+        # Repeated headers are folded into one, as WSGI servers do
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ, send):
+    """Call ``wsgi_app`` and pass its response to the blocking ``send``.
+
+    Runs on a pool thread; ``send`` takes ASGI messages. The response body
+    is sent as the app yields it, so streamed responses stay streamed.
+    """
+    response_start = None
+    started = False
+
+    def write(data):
+        nonlocal started
+        if not started:
+            if response_start is None:
+                raise AssertionError("write() before start_response()")
+            started = True
+            send(response_start)
+        if data:
+            send({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+    def start_response(status, headers, exc_info=None):
+        nonlocal response_start
+        if exc_info is not None and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        response_start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        }
+        return write
+
+    iterable = wsgi_app(environ, start_response)
+    try:
+        for data in iterable:
+            write(data)
+        write(b'')
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    send({'type': 'http.response.body'})
@@ -0,0 +1,69 @@
+from decimal import Decimal, localcontext, ROUND_HALF_UP
+
+import pytest
+
+from src.services.amm import EXACT_IN, EXACT_OUT, QuoteError, SwapRouter, amount_out_for
+
+
+class Pool:
+    def __init__(self, token_a, token_b, reserve_a, reserve_b, fee_rate='0.003'):
+        self.token_a = token_a
+        self.token_b = token_b
+        self.reserve_a = Decimal(reserve_a)
+        self.reserve_b = Decimal(reserve_b)
+        self.fee_rate = Decimal(fee_rate)
+
+
+class Tokenomics:
+    def __init__(self, pools):
+        self.liquidity_pools = pools
+
+
+def router():
+    return SwapRouter(Tokenomics({
+        'nrx-usdt': Pool('NRX', 'USDT', 1000, 2000),
+        'nrx-eth': Pool('NRX', 'ETH', 1000, 1),
+        'eth-usdt': Pool('ETH', 'USDT', 10, 25000)
+    }))
+
+
+def test_two_hop_route_wins_when_it_pays_more():
+    quote = router().quote('NRX', 'USDT', Decimal(10))
+    direct = amount_out_for(Decimal(1000), Decimal(2000), Decimal(10), Decimal('0.003'))
+
+    # 1 ETH per 1000 NRX is worth 2500 USDT through the ETH pool
+    assert [hop["pool_id"] for hop in quote["route"]] == ['nrx-eth', 'eth-usdt']
+    assert quote["amount_out"] > direct
+    assert quote["route"][0]["amount_out"] == quote["route"][1]["amount_in"]
+    assert 0 < quote["price_impact"] < Decimal('0.02')
+
+
+def test_exact_out_quotes_round_inputs_up():
+    swaps = router()
+    quote = swaps.quote('USDT', 'NRX', Decimal(5), side=EXACT_OUT, max_hops=1)
+    # Paying the quoted input gives back at least the requested output
+    assert amount_out_for(Decimal(2000), Decimal(1000), quote["amount_in"], Decimal('0.003')) >= 5
+    with pytest.raises(QuoteError):
+        swaps.quote('USDT', 'NRX', Decimal(1000), side=EXACT_OUT, max_hops=1)
+
+
+def test_quotes_are_dropped_when_a_pool_on_their_route_moves():
+    tokenomics = Tokenomics({'nrx-usdt': Pool('NRX', 'USDT', 1000, 2000)})
+    swaps = SwapRouter(tokenomics)
+    first = swaps.quote('NRX', 'USDT', Decimal(10), EXACT_IN)
+    assert swaps.quote('NRX', 'USDT', Decimal(10), EXACT_IN) is first and swaps.hits == 1
+
+    tokenomics.liquidity_pools['nrx-usdt'].reserve_b = Decimal(4000)
+    assert swaps.quote('NRX', 'USDT', Decimal(10), EXACT_IN)["amount_out"] > first["amount_out"]
+    assert swaps.misses == 2
+
+
+def test_pool_value_does_not_depend_on_the_decimal_context():
+    swaps = router()
+    pool = Pool('NRX', 'USDT', '0.006', '0.01', fee_rate='0')
+    # 0.006 NRX at 2.5 plus 0.01 USDT is 0.025, a tie rounded to even
+    assert swaps.pool_value(pool, 'USDT') == Decimal('0.02')
+    with localcontext() as context:
+        context.rounding = ROUND_HALF_UP
+        assert swaps.pool_value(pool, 'USDT') == Decimal('0.02')
+    assert swaps.pool_value(Pool('NRX', 'DOGE', 1, 1), 'DOGE') is None
@@ -0,0 +1,42 @@
+from decimal import Decimal, localcontext
+
+import pytest
+
+from src.services.amounts import WEI, AmountError, format_wei, from_wei, parse_amount, to_wei
+
+
+@pytest.mark.parametrize('value, wei', [
+    (12, 12 * WEI),
+    ("0.5", WEI // 2),
+    (" .25 ", WEI // 4),
+    (0.1, WEI // 10),
+    ("1.000000000000000001", WEI + 1),
+    ("2." + "0" * 30, 2 * WEI),
+    (Decimal("-3.5"), -3 * WEI - WEI // 2),
+])
+def test_api_amounts_parse_exactly(value, wei):
+    assert parse_amount(value) == wei
+
+
+@pytest.mark.parametrize('value', [True, "1e3", "NaN", "Infinity", "0.0000000000000000001", "1,5", None, [1]])
+def test_api_amounts_are_not_rounded_or_guessed(value):
+    with pytest.raises(AmountError):
+        parse_amount(value)
+
+
+def test_positive_amounts_reject_zero_and_negatives():
+    with pytest.raises(AmountError, match="fee"):
+        parse_amount("0", field='fee', positive=True)
+    with pytest.raises(AmountError):
+        parse_amount(-1, positive=True)
+
+
+def test_engine_amounts_round_trip_without_the_decimal_context():
+    with localcontext() as context:
+        context.prec = 5
+        wei = to_wei(Decimal("123456789.123456789123456789"))
+        assert wei == 123456789123456789123456789
+        assert from_wei(wei) == Decimal("123456789.123456789123456789")
+        assert str(from_wei(150 * WEI)) == "150"
+    assert to_wei(Decimal("1E-19")) == 0 and to_wei(7) == 7 * WEI
+    assert format_wei(-WEI - WEI // 20) == "-1.05" and format_wei(0) == "0"
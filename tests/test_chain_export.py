@@ -0,0 +1,79 @@
+import json
+
+from flask import Flask
+
+from src.routes.blockchain import blockchain_bp
+from src.services.chain_export import FRAME_HEADER
+
+
+class Transaction:
+    def __init__(self, height, i):
+        self.hash = f"{height:02x}{i:062x}"
+
+    def to_dict(self):
+        return {"hash": self.hash}
+
+
+class Block:
+    def __init__(self, height, count):
+        self.height = height
+        self.hash = f"block{height}"
+        self.previous_hash = f"block{height - 1}"
+        self.merkle_root = "00" * 32
+        self.timestamp = 1700000000.0 + height
+        self.validator = "NXv"
+        self.ai_validation_score = 0.9
+        self.quantum_signature = "sig"
+        self.transactions = [Transaction(height, i) for i in range(count)]
+
+
+class Blockchain:
+    def __init__(self, counts):
+        self.blocks = [Block(height, count) for height, count in enumerate(counts)]
+
+
+def client(counts):
+    app = Flask(__name__)
+    app.config['NEURAX_BLOCKCHAIN'] = Blockchain(counts)
+    app.register_blueprint(blockchain_bp, url_prefix='/api/blockchain')
+    return app.test_client()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+
+def test_export_streams_blocks_then_their_transactions():
+    records = ndjson(client([1, 2, 0]).get('/api/blockchain/export'))
+    assert [(r["type"], r.get("height", r.get("block_height"))) for r in records[:-1]] == [
+        ("block", 0), ("transaction", 0), ("block", 1), ("transaction", 1), ("transaction", 1), ("block", 2)
+    ]
+    assert records[-1] == {"type": "end", "next_height": 3, "last_cursor": records[4]["cursor"]}
+
+
+def test_an_interrupted_export_resumes_after_its_last_cursor():
+    api = client([1, 3, 2])
+    full = [r for r in ndjson(api.get('/api/blockchain/export')) if r["type"] == "transaction"]
+    resumed = ndjson(api.get('/api/blockchain/export', query_string={"cursor": full[1]["cursor"]}))
+    # The rest of block 1 without its header, then everything after it
+    assert [r.get("hash") for r in resumed[:-1]] == [full[2]["hash"], full[3]["hash"], "block2"] + [
+        tx["hash"] for tx in full[4:]
+    ]
+
+
+def test_binary_frames_carry_type_and_length():
+    body = client([2]).get('/api/blockchain/export', query_string={"format": "binary"}).get_data()
+    kinds = []
+    while body:
+        kind, length = FRAME_HEADER.unpack_from(body)
+        json.loads(body[FRAME_HEADER.size:FRAME_HEADER.size + length])
+        kinds.append(kind)
+        body = body[FRAME_HEADER.size + length:]
+    assert kinds == [b'B', b'T', b'T', b'E']
+
+
+def test_bad_export_parameters_are_rejected():
+    api = client([1])
+    assert api.get('/api/blockchain/export', query_string={"format": "xml"}).status_code == 400
+    assert api.get('/api/blockchain/export', query_string={"include": "accounts"}).status_code == 400
+    assert api.get('/api/blockchain/export', query_string={"from_height": -1}).status_code == 400
@@ -0,0 +1,70 @@
+import pickle
+from decimal import Decimal
+
+from src.services.compact import ACCOUNT_SCHEMA, LEDGER_TRANSACTION_SCHEMA, CompactMapping, RecordTable
+
+
+class Account:
+    def __init__(self, address, balance):
+        self.address = address
+        self.balance = balance
+        self.staked_amount = Decimal(0)
+        self.locked_amount = Decimal(0)
+        self.ai_score = 50.0
+        self.reputation_score = 50.0
+        self.last_activity = 0.0
+
+    def available_balance(self):
+        return self.balance - self.locked_amount
+
+
+class Transaction:
+    def __init__(self, tx_id, from_address, to_address, amount):
+        self.tx_id = tx_id
+        self.tx_type = 'transfer'
+        self.from_address = from_address
+        self.to_address = to_address
+        self.amount = amount
+        self.data = {}
+        self.timestamp = 1.5
+
+
+def test_amounts_keep_their_exact_decimal_form():
+    amounts = [Decimal('1.50'), Decimal('-0.000000000000000001'), Decimal('7'), Decimal('1e-19'), Decimal('1E+3')]
+    accounts = CompactMapping(ACCOUNT_SCHEMA, ((str(i), Account(str(i), a)) for i, a in enumerate(amounts)))
+    # The last two do not fit the fixed-point column and are kept as they are
+    assert [str(accounts[str(i)].balance) for i in range(len(amounts))] == ['1.50', '-1E-18', '7', '1E-19', '1E+3']
+
+
+def test_stored_objects_stay_live():
+    accounts = CompactMapping(ACCOUNT_SCHEMA)
+    account = Account('NXa', Decimal(10))
+    accounts['NXa'] = account
+
+    account.locked_amount = Decimal(4)
+    assert accounts['NXa'] is account and isinstance(account, Account)
+    assert accounts['NXa'].available_balance() == 6
+
+    del accounts['NXa']
+    # A removed object becomes a plain instance holding its last values
+    assert type(account) is Account and account.balance == 10 and account.locked_amount == 4
+
+
+def test_a_pickled_mapping_keeps_its_views_and_values():
+    transactions = CompactMapping(LEDGER_TRANSACTION_SCHEMA)
+    transactions['ab' * 16] = Transaction('ab' * 16, 'NXa', 'NXb', Decimal('2.5'))
+    transactions['not-hex'] = Transaction('not-hex', 'NXa', 'NXa', Decimal(1))
+
+    restored = pickle.loads(pickle.dumps(transactions))
+    assert list(restored) == ['ab' * 16, 'not-hex']
+    assert restored['ab' * 16] is restored['ab' * 16]
+    assert vars(restored['not-hex'].__copy__()) == vars(transactions['not-hex'].__copy__())
+
+
+def test_the_intern_table_is_bounded():
+    table = RecordTable(LEDGER_TRANSACTION_SCHEMA, max_strings=3)
+    rows = [table.append(Transaction('cd' * 16, 'NXa', f'NX{i}', Decimal(i))) for i in range(5)]
+    assert len(table._strings) == 3
+    # Past the bound strings are held per row and still read back
+    assert [table.get(row, 'to_address') for row in rows] == [f'NX{i}' for i in range(5)]
+    assert table.get(rows[4], 'from_address') == 'NXa'
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from src.services.events import EventBus, EventPump, parse_timeout
+from src.services.storage import StateManager
+
+
+class Transaction:
+    def __init__(self, i):
+        self.hash = f"{i:064x}"
+        self.from_address = 'NXa'
+        self.to_address = 'NXb'
+        self.serialized_on = []
+
+    def to_dict(self):
+        self.serialized_on.append(threading.current_thread().name)
+        return {"hash": self.hash, "from_address": self.from_address, "to_address": self.to_address}
+
+
+class Block:
+    def __init__(self, height, transactions):
+        self.height = height
+        self.hash = f"block{height}"
+        self.previous_hash = f"block{height - 1}"
+        self.timestamp = 1700000000.0 + height
+        self.validator = 'NXv'
+        self.ai_validation_score = 0.9
+        self.transactions = transactions
+
+
+class Chain:
+    """Engine stand-in that seals one block per call"""
+
+    def __init__(self):
+        self.blocks = [Block(0, [])]
+
+    def mine(self, count):
+        transactions = [Transaction(len(self.blocks) * 100 + i) for i in range(count)]
+        self.blocks.append(Block(len(self.blocks), transactions))
+        return self.blocks[-1].hash
+
+
+class GovernanceContract:
+    def __init__(self):
+        self.proposals = {}
+
+
+class Tokenomics:
+    def __init__(self):
+        self.transactions = {}
+        self.governance_contract = GovernanceContract()
+
+
+def test_timeouts_are_clamped_and_bad_values_rejected():
+    assert parse_timeout('5', 60) == 5
+    assert parse_timeout(600, 60) == 60
+    assert parse_timeout('0', 60) == 0
+    for value in ('nan', 'inf', '-inf', '-1', 'soon', None):
+        with pytest.raises(ValueError):
+            parse_timeout(value, 60)
+
+
+def test_bus_resumes_from_a_cursor_and_reports_missed_events():
+    bus = EventBus(capacity=3)
+    bus.publish_many(1, [('blocks', None, {"height": 1}), ('address', 'NXa', {})])
+    bus.publish_many(2, [('address', 'NXb', {})])
+
+    events, last_id, missed = bus.wait((1, 1), {('address', 'NXb')}, 0)
+    assert [event[0] for event in events] == [(2, 1)] and last_id == (2, 1) and not missed
+
+    bus.publish_many(3, [('blocks', None, {"height": 2}), ('blocks', None, {"height": 3})])
+    events, _, missed = bus.wait((1, 0), {('blocks', None)}, 0)
+    assert missed and [event[4]["height"] for event in events] == [2, 3]
+
+
+def test_pump_serializes_blocks_off_the_apply_lock():
+    state = StateManager(Chain, Tokenomics)
+    bus = EventBus()
+    pump = EventPump(state, bus)
+    pump.start()
+    try:
+        state.execute('blockchain', 'mine', 2)
+        events, last_id, _ = bus.wait((0, 0), {('blocks', None), ('address', 'NXb')}, 5)
+    finally:
+        pump.stop()
+
+    assert [(event[1], event[2]) for event in events] == [('blocks', None), ('address', 'NXb'), ('address', 'NXb')]
+    assert events[0][4]["transactions"] == 2 and last_id == (1, 5)
+    # The committing thread only queued a reference to the block
+    for tx in state.blockchain.blocks[1].transactions:
+        assert tx.serialized_on == ['neurax-event-pump']
@@ -0,0 +1,140 @@
+import time
+import uuid
+from decimal import Decimal
+
+from src.services.governance import GovernanceEngine
+from src.services.storage import StateManager
+
+
+class Account:
+    def __init__(self):
+        self.balance = Decimal(0)
+        self.staked_amount = Decimal(0)
+
+
+class TokenContract:
+    def __init__(self):
+        self.accounts = {}
+
+    def create_account(self, address):
+        self.accounts[address] = Account()
+
+    def get_account(self, address):
+        return self.accounts.get(address)
+
+
+class GovernanceContract:
+    """Engine stand-in that names, stamps and settles proposals like the real one"""
+
+    def __init__(self):
+        self.proposals = {}
+        self.votes = {}
+
+    def create_proposal(self, proposer, title, description, proposal_data):
+        proposal_id = uuid.uuid4().hex[:12]
+        self.proposals[proposal_id] = {
+            "id": proposal_id, "proposer": proposer, "title": title, "description": description,
+            "status": "pending", "votes_for": Decimal(0), "votes_against": Decimal(0), "created_at": time.time()
+        }
+        return proposal_id
+
+    def vote(self, voter, proposal_id, vote_choice, voting_power):
+        proposal = self.proposals.get(proposal_id)
+        if proposal is None or (voter, proposal_id) in self.votes:
+            return False
+        self.votes[(voter, proposal_id)] = vote_choice
+        proposal["votes_for" if vote_choice == "for" else "votes_against"] += voting_power
+        if proposal["votes_for"] > 100:
+            proposal["status"] = "passed"
+        return True
+
+    def reject(self, proposal_id):
+        self.proposals[proposal_id]["status"] = "rejected"
+        return True
+
+    def expire_all(self):
+        for proposal in self.proposals.values():
+            if proposal["status"] == "pending":
+                proposal["status"] = "expired"
+        return True
+
+
+class Tokenomics:
+    def __init__(self):
+        self.token_contract = TokenContract()
+        self.governance_contract = GovernanceContract()
+        self.transactions = {}
+
+    def create_transaction(self, tx_type, from_address, to_address, amount, data=None):
+        self.token_contract.get_account(from_address).balance -= amount
+        self.token_contract.get_account(to_address).balance += amount
+        tx_id = uuid.uuid4().hex
+        self.transactions[tx_id] = (tx_type, from_address, to_address, amount)
+        return tx_id
+
+
+def make_state(**kwargs):
+    state = StateManager(lambda: None, Tokenomics, governance_factory=GovernanceEngine, **kwargs)
+    state.execute('genesis', 'allocate', {'NXa': Decimal(150), 'NXb': Decimal(50)})
+    return state
+
+
+def test_votes_use_the_balance_snapshot_taken_at_creation():
+    state = make_state()
+    proposal_id = state.execute('governance', 'create_proposal', proposer='NXa', title='t', description='d')
+    state.execute('tokenomics', 'create_transaction', 'TRANSFER', 'NXa', 'NXb', Decimal(100))
+
+    governance = state.governance
+    assert governance.voting_power('NXa', proposal_id) == 150 * 10 ** 18
+    assert governance.voting_power('NXb', proposal_id) == 50 * 10 ** 18
+    assert state.execute('governance', 'vote', voter='NXb', proposal_id=proposal_id, vote_choice='for') == 50 * 10 ** 18
+    assert state.execute('governance', 'vote', voter='NXb', proposal_id=proposal_id, vote_choice='for') is None
+
+    # A proposal created now sees the transfer
+    later = state.execute('governance', 'create_proposal', proposer='NXa', title='t2', description='d')
+    assert governance.voting_power('NXb', later) == 150 * 10 ** 18
+
+
+def test_status_index_follows_commands_on_either_target():
+    state = make_state()
+    governance = state.governance
+    first = state.execute('governance', 'create_proposal', proposer='NXa', title='t', description='d')
+    # Straight to the contract, bypassing the governance engine
+    second = state.execute('tokenomics.governance_contract', 'create_proposal', 'NXa', 't2', 'd', {})
+    third = state.execute('tokenomics.governance_contract', 'create_proposal', 'NXa', 't3', 'd', {})
+    assert governance.count() == 3 and governance.count('pending') == 3
+
+    state.execute('governance', 'vote', voter='NXa', proposal_id=first, vote_choice='for')
+    state.execute('tokenomics.governance_contract', 'reject', second)
+    assert (governance.count('passed'), governance.count('rejected'), governance.count('pending')) == (1, 1, 1)
+
+    state.execute('tokenomics.governance_contract', 'vote', 'NXb', third, 'against', Decimal(5))
+    state.execute('tokenomics.governance_contract', 'expire_all')
+    assert governance.count('expired') == 1
+    [expired] = governance.page(1, 10, 'expired')
+    assert expired["id"] == third and expired["votes_against"] == "5" and expired["voters"] == 1
+
+
+def test_page_does_not_write_to_the_index():
+    state = make_state()
+    governance = state.governance
+    proposal_id = state.execute('governance', 'create_proposal', proposer='NXa', title='t', description='d')
+    # A change that no command made is not indexed by reading it
+    state.tokenomics.governance_contract.proposals[proposal_id]["status"] = "passed"
+    assert governance.page(1, 10)[0]["status"] == "passed"
+    assert governance.count('pending') == 1 and governance.page(1, 10, 'passed') == []
+
+
+def test_tallies_and_snapshots_are_rebuilt_on_recovery(tmp_path):
+    state = make_state(data_dir=str(tmp_path), fsync=False, snapshot_every=10 ** 9)
+    proposal_id = state.execute('governance', 'create_proposal', proposer='NXa', title='t', description='d')
+    state.execute('tokenomics', 'create_transaction', 'TRANSFER', 'NXa', 'NXb', Decimal(100))
+    state.execute('governance', 'vote', voter='NXa', proposal_id=proposal_id, vote_choice='for')
+    expected = state.governance.page(1, 10)
+    state.close()
+
+    recovered = StateManager(lambda: None, Tokenomics, governance_factory=GovernanceEngine,
+                             data_dir=str(tmp_path), fsync=False)
+    assert recovered.governance.page(1, 10) == expected
+    assert recovered.governance.count('passed') == 1
+    assert recovered.governance.voting_power('NXa', proposal_id) == 150 * 10 ** 18
@@ -0,0 +1,76 @@
+import datetime
+import json
+from decimal import Decimal
+
+from flask import Flask
+
+from src.services import json_provider
+from src.services.json_provider import NeuraXJSONProvider, SerializedObjectCache
+
+
+class Transaction:
+    """Confirmed-transaction stand-in that counts its to_dict() calls"""
+
+    calls = 0
+
+    def __init__(self, i):
+        self.hash = f"{i:064x}"
+        self.amount = Decimal(i) / 4
+        self.timestamp = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+    def to_dict(self):
+        Transaction.calls += 1
+        return {"hash": self.hash, "amount": self.amount, "timestamp": self.timestamp, "tags": []}
+
+
+def render(value):
+    app = Flask(__name__)
+    app.json = NeuraXJSONProvider(app)
+    with app.app_context():
+        return app.json.response(value).get_data()
+
+
+def test_datetimes_render_the_same_with_or_without_orjson(monkeypatch):
+    value = {"at": datetime.datetime(2024, 1, 2, 3, 4, 5), "on": datetime.date(2024, 1, 2)}
+    fast = render(value)
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert render(value) == fast
+    assert json.loads(fast)["at"] == "Tue, 02 Jan 2024 03:04:05 GMT"
+
+
+def test_cached_objects_are_encoded_once_and_spliced_into_responses(monkeypatch):
+    cache = SerializedObjectCache()
+    transactions = [Transaction(i) for i in range(3)]
+    expected = render({"transactions": [tx.to_dict() for tx in transactions]})
+    single = render(transactions[1].to_dict())
+
+    Transaction.calls = 0
+    for _ in range(2):
+        assert render({"transactions": cache.encoded_list(transactions)}) == expected
+        assert render(cache.encoded(transactions[1])) == single
+    assert Transaction.calls == 3
+
+    # The stdlib fallback cannot embed raw JSON but renders the same body
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert render({"transactions": cache.encoded_list(transactions)}) == expected
+
+
+def test_to_dict_hands_out_independent_copies():
+    cache = SerializedObjectCache()
+    tx = Transaction(1)
+    first = cache.to_dict(tx)
+    first["tags"].append("changed")
+    first["extra"] = True
+    assert cache.to_dict(tx) == {"hash": tx.hash, "amount": "0.25", "timestamp": "Tue, 02 Jan 2024 03:04:05 GMT", "tags": []}
+
+
+def test_capacity_evicts_the_least_recently_used():
+    cache = SerializedObjectCache(capacity=2)
+    transactions = [Transaction(i) for i in range(3)]
+    for tx in transactions:
+        cache.encoded(tx)
+    Transaction.calls = 0
+    cache.encoded_list(transactions[1:])
+    assert Transaction.calls == 0
+    cache.encoded(transactions[0])
+    assert Transaction.calls == 1
@@ -0,0 +1,79 @@
+import hashlib
+
+from src.services.mempool import BlockBuilder, Mempool, MempoolEntry, transaction_hash
+from src.services.storage import StateManager
+
+
+class Chain:
+    """Engine stand-in that records what it is asked to create"""
+
+    def __init__(self):
+        self.created = []
+
+    def create_transaction(self, from_address, to_address, amount, private_key, data=None):
+        self.created.append((from_address, to_address, amount, private_key))
+        return hashlib.sha256(repr(self.created[-1]).encode()).hexdigest()
+
+
+class Ledger:
+    pass
+
+
+def entry(sender, fee, nonce=None, amount=1):
+    return MempoolEntry(sender, nonce, fee, {
+        "from_address": sender, "to_address": "NXz", "amount": amount, "data": {}, "signature": "sig"
+    })
+
+
+def test_drain_orders_by_fee_but_keeps_each_senders_nonces_in_order():
+    mempool = Mempool()
+    for e in (entry('NXa', 1), entry('NXa', 50), entry('NXb', 10), entry('NXc', 5)):
+        assert mempool.add(e) == (True, None)
+
+    drained = [(e.sender, e.nonce) for e in mempool.drain(10)]
+    # NXa's fee-50 transaction waits behind its fee-1 nonce 0
+    assert drained == [('NXb', 0), ('NXc', 0), ('NXa', 0), ('NXa', 1)]
+
+
+def test_duplicates_and_nonce_gaps_are_rejected():
+    mempool = Mempool()
+    assert mempool.add(entry('NXa', 1, nonce=0))[0]
+    assert mempool.add(entry('NXa', 1, nonce=0)) == (False, "Duplicate transaction")
+    accepted, reason = mempool.add(entry('NXa', 1, nonce=5))
+    assert not accepted and reason.startswith("Nonce gap")
+    assert mempool.next_nonce('NXa') == 1
+
+
+def test_eviction_drops_the_senders_later_nonces():
+    mempool = Mempool(max_size=2)
+    assert mempool.add(entry('NXa', 5))[0]
+    assert mempool.add(entry('NXa', 9))[0]
+    accepted, reason = mempool.add(entry('NXb', 7))
+    assert accepted
+    # The cheapest entry was NXa's nonce 0, and nonce 1 cannot be packed without it
+    assert len(mempool) == 1
+    assert mempool.next_nonce('NXa') == 0
+    assert mempool.counters["evicted_size"] == 2
+
+
+def test_secret_fields_are_not_hashed():
+    payload = {"from_address": "NXa", "to_address": "NXz", "amount": 1}
+    assert transaction_hash('NXa', 0, 1, dict(payload, private_key="secret")) == transaction_hash('NXa', 0, 1, payload)
+
+
+def test_committed_nonces_survive_a_restart(tmp_path):
+    state = StateManager(Chain, Ledger, data_dir=str(tmp_path), fsync=False)
+    mempool = Mempool(committed_nonces=state.nonces)
+    builder = BlockBuilder(mempool, state, interval=1)
+    for amount in range(3):
+        assert mempool.add(entry('NXa', 0, amount=amount))[0]
+    assert builder.build_block() == 3
+    # The engine gets the signature, never a key
+    assert [created[3] for created in state.blockchain.created] == ["sig"] * 3
+    state.close()
+
+    restarted = StateManager(Chain, Ledger, data_dir=str(tmp_path), fsync=False)
+    mempool = Mempool(committed_nonces=restarted.nonces)
+    assert mempool.next_nonce('NXa') == 3
+    accepted, reason = mempool.add(entry('NXa', 0, nonce=0))
+    assert not accepted and "already used" in reason
@@ -0,0 +1,60 @@
+import hashlib
+
+import pytest
+
+from src.services.merkle import SCHEMES, MerkleRootMismatch, MerkleTreeCache, verify_proof
+
+
+class Transaction:
+    def __init__(self, i):
+        self.hash = hashlib.sha256(f"tx{i}".encode()).hexdigest()
+
+
+class Block:
+    """Engine stand-in that seals its transactions the way many chain
+    engines do: pairwise sha256 over the concatenated hex digests, with
+    an odd node paired with itself"""
+
+    def __init__(self, count, height=1):
+        self.transactions = [Transaction(f"{height}:{i}") for i in range(count)]
+        self.merkle_root = self.calculate_merkle_root()
+        self.hash = hashlib.sha256(f"block{height}{self.merkle_root}".encode()).hexdigest()
+
+    def calculate_merkle_root(self):
+        level = [tx.hash for tx in self.transactions]
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [hashlib.sha256((level[i] + level[i + 1]).encode()).hexdigest() for i in range(0, len(level), 2)]
+        return level[0]
+
+
+@pytest.mark.parametrize('count', [1, 2, 5, 8, 13])
+def test_proofs_verify_against_the_engine_root(count):
+    trees = MerkleTreeCache()
+    block = Block(count)
+    for position, tx in enumerate(block.transactions):
+        proof, root, scheme = trees.proof(block, position)
+        assert root == block.merkle_root
+        assert verify_proof(tx.hash, proof, block.merkle_root, scheme)
+        assert not verify_proof('ff' * 32, proof, block.merkle_root, scheme)
+
+
+def test_scheme_is_settled_by_a_multi_transaction_block():
+    trees = MerkleTreeCache()
+    trees.proof(Block(1), 0)
+    assert trees.scheme is None
+    trees.proof(Block(3, height=2), 0)
+    assert trees.scheme is SCHEMES['sha256-hex']
+    trees.proof(Block(3, height=2), 1)
+    assert trees.hits == 1
+
+
+def test_root_no_scheme_reproduces_is_refused():
+    block = Block(4)
+    block.merkle_root = "00" * 32
+    with pytest.raises(MerkleRootMismatch):
+        MerkleTreeCache().proof(block, 0)
+    # A pinned scheme that does not match the engine is refused as well
+    with pytest.raises(MerkleRootMismatch):
+        MerkleTreeCache(scheme='rfc6962').proof(Block(4), 0)
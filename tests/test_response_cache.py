@@ -0,0 +1,56 @@
+from flask import Flask, jsonify, request
+
+from src.services.response_cache import ResponseCache
+
+
+def make_app(version, max_entries=1024):
+    cache = ResponseCache(version=lambda: version[0], max_entries=max_entries)
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/info')
+    @cache.cached
+    def info():
+        calls.append(request.args.get('page'))
+        return jsonify({"version": version[0], "page": request.args.get('page')})
+
+    @app.route('/missing')
+    @cache.cached
+    def missing():
+        calls.append('missing')
+        return jsonify({"error": "not found"}), 404
+
+    return app.test_client(), cache, calls
+
+
+def test_responses_are_served_from_cache_until_the_state_changes():
+    version = [1]
+    client, cache, calls = make_app(version)
+    first = client.get('/info')
+    assert client.get('/info').get_data() == first.get_data() and calls == [None]
+
+    version[0] = 2
+    assert client.get('/info').get_json()["version"] == 2 and len(calls) == 2
+    # Query arguments are part of the key
+    client.get('/info?page=2')
+    assert calls == [None, None, '2'] and (cache.hits, cache.misses) == (1, 3)
+
+
+def test_a_matching_etag_gets_a_304_without_running_the_view():
+    client, _, calls = make_app([1])
+    etag = client.get('/info').headers['ETag']
+    response = client.get('/info', headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.get_data() == b'' and calls == [None]
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_errors_are_not_cached_and_entries_are_bounded():
+    client, cache, calls = make_app([1], max_entries=2)
+    client.get('/missing')
+    assert client.get('/missing').status_code == 404 and calls == ['missing', 'missing']
+
+    for page in '123':
+        client.get(f'/info?page={page}')
+    client.get('/info?page=1')
+    # The oldest entry was evicted to stay within max_entries
+    assert calls[-1] == '1' and len(cache._entries) == 2
@@ -0,0 +1,26 @@
+from src.services.signing import address_for_key, engine_transaction_kwargs, sign_transaction, strip_secrets
+
+
+def payload():
+    return {"from_address": "NXa", "to_address": "NXb", "amount": "1.5", "data": {}}
+
+
+def test_signature_is_deterministic_and_keyed():
+    assert sign_transaction("k1", payload()) == sign_transaction("k1", payload())
+    assert sign_transaction("k1", payload()) != sign_transaction("k2", payload())
+    # A key left in the payload is not part of what is signed
+    assert sign_transaction("k1", dict(payload(), private_key="k1")) == sign_transaction("k1", payload())
+
+
+def test_engine_receives_the_signature_not_the_key():
+    signed = dict(payload(), signature=sign_transaction("secret", payload()))
+    kwargs = engine_transaction_kwargs(signed)
+    assert kwargs["private_key"] == signed["signature"]
+    assert "secret" not in repr(kwargs)
+    assert "signature" in signed
+
+
+def test_wallet_addresses_derive_from_keys():
+    address = address_for_key("secret")
+    assert address.startswith("NX") and len(address) == 40
+    assert strip_secrets({"private_key": "secret", "amount": 1}) == {"amount": 1}
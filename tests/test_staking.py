@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+from flask import Flask
+
+from src.routes.admin import admin_bp
+from src.routes.wallet import wallet_bp
+from src.services.profiler import TOKEN_HEADER, SamplingProfiler
+from src.services.staking_rewards import StakingRewards
+
+YEAR = 365 * 86400
+
+
+def about(value, expected):
+    # The per-microsecond rate is floored, losing under a wei per year
+    return abs(value - Decimal(expected)) < Decimal('1e-15')
+
+
+class StakingContract:
+    def __init__(self):
+        self.staking_positions = {}
+
+    def get_staking_info(self, address):
+        return [
+            {"position_id": position_id, "amount": str(p["amount"]), "lock_period": p["lock_period"]}
+            for position_id, p in self.staking_positions.items() if p["owner"] == address
+        ]
+
+
+class Config:
+    staking_reward_rate = Decimal("0.10")
+
+
+class Transaction:
+    def __init__(self, tx_type, position_id, timestamp):
+        self.tx_type = tx_type
+        self.data = {"position_id": position_id}
+        self.timestamp = timestamp
+
+
+class Tokenomics:
+    """Engine stand-in holding staking positions and the ledger"""
+
+    def __init__(self):
+        self.config = Config()
+        self.staking_contract = StakingContract()
+        self.transactions = {}
+
+    def stake(self, position_id, owner, amount, start_time, lock_period=0):
+        self.staking_contract.staking_positions[position_id] = {
+            "owner": owner, "amount": Decimal(amount), "lock_period": lock_period, "start_time": start_time
+        }
+
+    def record(self, tx_type, position_id, timestamp):
+        self.transactions[f"tx{len(self.transactions)}"] = Transaction(tx_type, position_id, timestamp)
+
+
+def test_rewards_accrue_by_lock_tier_and_reset_on_claim():
+    tokenomics = Tokenomics()
+    tokenomics.stake('p1', 'NXa', 1000, 0)
+    tokenomics.stake('p2', 'NXa', 1000, 0, lock_period=YEAR)
+    rewards = StakingRewards(tokenomics)
+
+    # 10% a year, and 1.5x for the one-year lock
+    assert about(rewards.pending_rewards('p1', now=YEAR), 100)
+    assert about(rewards.pending_rewards('p2', now=YEAR), 150)
+
+    tokenomics.record('claim_rewards', 'p1', YEAR)
+    assert rewards.pending_rewards('p1', now=YEAR) == 0
+    tokenomics.record('unstake', 'p2', YEAR)
+    assert rewards.pending_rewards('p2', now=YEAR) is None
+    assert rewards.totals()["total_staked"] == "1000"
+    assert rewards.audit(now=2 * YEAR)["mismatches"] == []
+
+
+def test_rate_changes_only_apply_from_when_they_happen():
+    tokenomics = Tokenomics()
+    tokenomics.stake('p1', 'NXa', 1000, 0)
+    history = [(0.0, Decimal("0.10")), (YEAR / 2, Decimal("0.20"))]
+    rewards = StakingRewards(tokenomics, rate_history=history)
+    assert about(rewards.pending_rewards('p1', now=YEAR), 150)
+
+
+def make_app(tokenomics):
+    app = Flask(__name__)
+    app.config['NEURAX_TOKENOMICS'] = tokenomics
+    app.config['NEURAX_STAKING_REWARDS'] = StakingRewards(tokenomics)
+    app.config['NEURAX_PROFILER'] = SamplingProfiler('secret')
+    app.register_blueprint(wallet_bp, url_prefix='/api/wallet')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    return app
+
+
+def test_staking_positions_are_the_engines_with_estimates_apart():
+    tokenomics = Tokenomics()
+    tokenomics.stake('p1', 'NXa', '2.5', 0)
+    tokenomics.stake('p2', 'NXb', 7, 0)
+    body = make_app(tokenomics).test_client().get('/api/wallet/staking_positions/NXa').get_json()
+
+    assert body["positions"] == tokenomics.staking_contract.get_staking_info('NXa')
+    assert body["total_positions"] == 1 and body["total_staked"] == "2.5"
+    assert set(body["estimated_rewards"]["positions"]) == {'p1'}
+    assert Decimal(body["estimated_rewards"]["total_pending"]) > 0
+
+
+def test_staking_audit_needs_the_admin_token():
+    client = make_app(Tokenomics()).test_client()
+    assert client.get('/api/admin/staking_audit').status_code == 403
+    assert client.get('/api/admin/staking_audit', headers={TOKEN_HEADER: 'wrong'}).status_code == 403
+    response = client.get('/api/admin/staking_audit', headers={TOKEN_HEADER: 'secret'})
+    assert response.status_code == 200 and response.get_json()["mismatches"] == []
@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from src.services.storage import StateManager, StorageError
+
+
+class Account:
+    def __init__(self, address):
+        self.address = address
+        self.balance = 0
+
+
+class TokenContract:
+    def __init__(self):
+        self.accounts = {}
+
+    def create_account(self, address):
+        self.accounts[address] = Account(address)
+
+    def get_account(self, address):
+        return self.accounts.get(address)
+
+
+class Ledger:
+    """Engine stand-in that stamps and names its records like the real one"""
+
+    def __init__(self):
+        self.transactions = {}
+        self.token_contract = TokenContract()
+
+    def create_transaction(self, from_address, to_address, amount):
+        tx_id = uuid.uuid4().hex
+        self.transactions[tx_id] = (from_address, to_address, amount, time.time())
+        return tx_id
+
+
+class Chain:
+    pass
+
+
+def open_state(data_dir, **kwargs):
+    return StateManager(Chain, Ledger, data_dir=str(data_dir), fsync=False, **kwargs)
+
+
+def crash(state):
+    # Drop the process state without the closing snapshot; the data
+    # directory lock goes with the process
+    state._log.close()
+    state._dir_lock.close()
+
+
+def test_replay_reproduces_engine_ids_and_timestamps(tmp_path):
+    state = open_state(tmp_path)
+    tx_ids = [state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', i) for i in range(20)]
+    before = dict(state.tokenomics.transactions)
+    crash(state)
+
+    recovered = open_state(tmp_path)
+    assert recovered.sequence == 20
+    assert list(recovered.tokenomics.transactions) == tx_ids
+    assert recovered.tokenomics.transactions == before
+
+
+def test_replay_after_snapshot_only_replays_the_tail(tmp_path):
+    state = open_state(tmp_path, snapshot_every=5)
+    for i in range(12):
+        state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', i)
+    before = dict(state.tokenomics.transactions)
+    crash(state)
+
+    recovered = open_state(tmp_path, snapshot_every=5)
+    assert recovered.sequence == 12
+    assert recovered.tokenomics.transactions == before
+
+
+def test_replay_that_creates_other_records_is_an_error(tmp_path, monkeypatch):
+    state = open_state(tmp_path)
+    state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', 1)
+    crash(state)
+
+    create_transaction = Ledger.create_transaction
+
+    def create_twice(self, from_address, to_address, amount):
+        create_transaction(self, from_address, to_address, amount)
+        return create_transaction(self, from_address, to_address, amount)
+
+    monkeypatch.setattr(Ledger, 'create_transaction', create_twice)
+    with pytest.raises(StorageError, match="diverged"):
+        open_state(tmp_path)
+
+
+def test_replay_that_returns_another_outcome_is_an_error(tmp_path, monkeypatch):
+    state = open_state(tmp_path)
+    state.execute('tokenomics.token_contract', 'create_account', 'NXa')
+    crash(state)
+
+    monkeypatch.setattr(TokenContract, 'create_account', lambda self, address: False)
+    with pytest.raises(StorageError, match="did not reproduce"):
+        open_state(tmp_path)
+
+
+def test_data_dir_has_a_single_owner(tmp_path):
+    state = open_state(tmp_path)
+    with pytest.raises(StorageError, match="locked"):
+        open_state(tmp_path)
+
+    state.close()
+    open_state(tmp_path).close()
+
+
+def test_concurrent_commands_are_journaled_in_apply_order(tmp_path):
+    state = open_state(tmp_path)
+    applied = []
+    state.listeners.append(lambda record, payload: applied.append(record[0]))
+
+    def worker(offset):
+        for i in range(50):
+            state.execute('tokenomics', 'create_transaction', f'NX{offset}', 'NXb', i)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert applied == list(range(1, 401))
+    before = dict(state.tokenomics.transactions)
+    crash(state)
+    assert open_state(tmp_path).tokenomics.transactions == before
+
+
+def test_genesis_balances_are_journaled(tmp_path):
+    state = open_state(tmp_path)
+    state.execute('tokenomics.token_contract', 'create_account', 'NXa')
+    state.execute('genesis', 'allocate', {'NXa': 100, 'NXb': 250})
+    crash(state)
+
+    recovered = open_state(tmp_path)
+    assert recovered.sequence == 2
+    token_contract = recovered.tokenomics.token_contract
+    assert [token_contract.get_account(a).balance for a in ('NXa', 'NXb')] == [100, 250]
+
+
+def test_failing_snapshots_stop_writes_before_the_log_grows_unbounded(tmp_path):
+    state = open_state(tmp_path, snapshot_every=5, max_unsnapshotted=8, snapshot_retry=3600)
+    # Something the engine keeps that cannot be pickled
+    state.tokenomics.callback = lambda: None
+
+    for i in range(8):
+        state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', i)
+    assert state.snapshot_failures == 1
+
+    with pytest.raises(StorageError):
+        state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', 8)
+    assert state.sequence == 8
+
+    del state.tokenomics.callback
+    state.execute('tokenomics', 'create_transaction', 'NXa', 'NXb', 8)
+    assert state.snapshot_failures == 0
+    assert state.sequence == 9
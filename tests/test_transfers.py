@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from src.services.storage import StateManager
+from src.services.transfers import build_transfer_commands, check_transfer_balances
+
+
+class Account:
+    def __init__(self, balance):
+        self.balance = Decimal(balance)
+
+    def available_balance(self):
+        return self.balance
+
+
+class TokenContract:
+    def __init__(self, balances):
+        self.accounts = {address: Account(balance) for address, balance in balances.items()}
+
+    def get_account(self, address):
+        return self.accounts.get(address)
+
+
+class Config:
+    transaction_fee = Decimal("0.001")
+
+
+class Tokenomics:
+    """Engine stand-in that charges the transfer fee like the real one"""
+
+    def __init__(self):
+        self.config = Config()
+        self.token_contract = TokenContract({'NXa': 10, 'NXb': 0, 'NXc': 0})
+        self.transactions = {}
+
+    def create_transaction(self, tx_type, from_address, to_address, amount, data=None):
+        sender = self.token_contract.get_account(from_address)
+        if sender.balance < amount + self.config.transaction_fee:
+            return None
+        sender.balance -= amount + self.config.transaction_fee
+        self.token_contract.get_account(to_address).balance += amount
+        tx_id = f"tx{len(self.transactions)}"
+        self.transactions[tx_id] = (from_address, to_address, amount)
+        return tx_id
+
+
+def transfer(from_address, to_address, amount):
+    return {"from_address": from_address, "to_address": to_address, "amount": amount, "private_key": "k"}
+
+
+def test_items_with_bad_fields_or_amounts_get_errors():
+    items = [transfer('NXa', 'NXb', '1.5'), {"from_address": 'NXa'}, transfer('NXa', 'NXb', '-1'), 'NXa']
+    commands, errors = build_transfer_commands(items, 'TRANSFER')
+
+    assert commands[0] == ('tokenomics', 'create_transaction', ('TRANSFER', 'NXa', 'NXb', Decimal('1.5')), {})
+    assert commands[1:] == [None, None, None]
+    assert errors[0] is None
+    assert errors[1] == "Missing required field: to_address"
+    assert "must be positive" in errors[2]
+    assert errors[3] == "Transfer must be an object"
+
+
+def test_balances_are_netted_through_the_batch():
+    state = StateManager(lambda: None, Tokenomics)
+    commands, _ = build_transfer_commands([
+        transfer('NXa', 'NXb', '9'),
+        # Spends what the first transfer brought in
+        transfer('NXb', 'NXc', '8'),
+        # NXa has 10 - 9 - fee left
+        transfer('NXa', 'NXc', '1'),
+        transfer('NXd', 'NXa', '1')
+    ], 'TRANSFER')
+
+    assert check_transfer_balances(state, commands) == [
+        None, None, "Insufficient balance", "Account not found: NXd"
+    ]
+
+
+def test_valid_transfers_apply_in_one_batch():
+    state = StateManager(lambda: None, Tokenomics)
+    commands, _ = build_transfer_commands([transfer('NXa', 'NXb', '2'), transfer('NXb', 'NXc', '50')], 'TRANSFER')
+
+    results = state.execute_batch(commands, validate=check_transfer_balances)
+    assert results == [(True, 'tx0'), (False, "Insufficient balance")]
+    assert state.sequence == 1
+
+    strict = state.execute_batch(commands, validate=check_transfer_balances, strict=True)
+    assert [ok for ok, _ in strict] == [False, False]
+    assert state.sequence == 1
+    assert state.tokenomics.token_contract.get_account('NXb').balance == Decimal(2)
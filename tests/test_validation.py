@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from src.services.mempool import BlockBuilder, Mempool, MempoolEntry
+from src.services.storage import StateManager
+from src.services.validation import ValidationPipeline
+
+
+def reject_odd(value):
+    """Verifier that rejects odd numbers, reporting the process it ran in"""
+    return f"odd in {os.getpid()}" if value % 2 else None
+
+
+def explode(value):
+    if value == 3:
+        raise ValueError("bad signature")
+    return None
+
+
+def pipeline(verify, workers):
+    return ValidationPipeline(verify, workers=workers, chunk_size=4, mp_context=multiprocessing.get_context('fork'))
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_batches_are_verified_and_committed_in_submission_order(workers):
+    validation = pipeline(reject_odd, workers)
+    validation.start()
+    committed = []
+    try:
+        for start in range(0, 100, 10):
+            validation.submit([(value,) for value in range(start, start + 10)],
+                              lambda items, results: committed.append((items, results)))
+    finally:
+        validation.close()
+
+    assert [items[0][0] for items, _ in committed] == list(range(0, 100, 10))
+    results = [result for _, batch in committed for result in batch]
+    assert [result is None for result in results] == [value % 2 == 0 for value in range(100)]
+    # With workers the verifier runs outside this process
+    pids = {int(result.rsplit(' ', 1)[1]) for result in results if result}
+    assert (os.getpid() in pids) == (workers == 0)
+    assert validation.stats()["committed"] == 100 and validation.stats()["rejected"] == 50
+
+
+def test_a_failing_verifier_only_rejects_its_item():
+    validation = pipeline(explode, 0)
+    validation.start()
+    try:
+        assert validation.verify_many([(value,) for value in range(5)], timeout=5) == [
+            None, None, None, "Verification failed: bad signature", None
+        ]
+    finally:
+        validation.close()
+
+
+def test_submit_applies_backpressure_until_batches_commit():
+    validation = ValidationPipeline(reject_odd, max_pending=10)
+    release = threading.Event()
+    validation.start()
+    try:
+        assert validation.submit([(0,)] * 10, lambda items, results: release.wait(5))
+        # The committer is holding the first batch, so the pipeline is full
+        assert validation.submit([(0,)], lambda items, results: None, block=False) is False
+        release.set()
+        assert validation.submit([(0,)], lambda items, results: None, timeout=5)
+    finally:
+        release.set()
+        validation.close()
+    assert validation.stats()["backpressure_waits"] == 1 and validation.stats()["committed"] == 11
+
+
+def reject_big(sender, nonce, fee, payload, tx_hash):
+    return "Amount too large" if payload["amount"] > 5 else None
+
+
+class Chain:
+    def __init__(self):
+        self.created = []
+
+    def create_transaction(self, from_address, to_address, amount, private_key, data=None):
+        self.created.append(amount)
+        return f"chain{len(self.created)}"
+
+    def get_transaction_by_hash(self, tx_hash):
+        return self.created[int(tx_hash[5:]) - 1]
+
+
+def test_block_builder_commits_only_what_the_verifier_accepts():
+    state = StateManager(Chain, lambda: type('Ledger', (), {})())
+    mempool = Mempool(committed_nonces=state.nonces)
+    validation = pipeline(reject_big, 2)
+    validation.start()
+    builder = BlockBuilder(mempool, state, interval=1, pipeline=validation)
+    entries = [
+        MempoolEntry('NXa', None, 0, {"from_address": 'NXa', "to_address": 'NXz', "amount": amount,
+                                      "data": {}, "signature": "sig"})
+        for amount in (1, 10, 2)
+    ]
+    for entry in entries:
+        assert mempool.add(entry)[0]
+    try:
+        assert builder.build_block() == 3
+    finally:
+        validation.close()
+
+    assert state.blockchain.created == [1, 2]
+    assert [builder.status(entry.tx_hash)["status"] for entry in entries] == ['submitted', 'rejected', 'submitted']
+    assert builder.status(entries[1].tx_hash)["error"] == "Amount too large"
+    assert state.nonces.get('NXa') == 3
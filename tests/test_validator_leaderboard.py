@@ -0,0 +1,82 @@
+import random
+from decimal import Decimal
+
+from src.services.validator_leaderboard import ValidatorLeaderboard, _SortedChunks
+
+
+class Transaction:
+    def __init__(self, tx_type, from_address):
+        self.tx_type = tx_type
+        self.from_address = from_address
+
+
+class AIRewardsContract:
+    def __init__(self, scores):
+        self.ai_scores = dict(scores)
+        self.validation_history = {}
+
+
+class Tokenomics:
+    """Engine stand-in recording AI validations the way the contract does"""
+
+    def __init__(self, scores=()):
+        self.ai_rewards_contract = AIRewardsContract(scores)
+        self.transactions = {}
+
+    def validate(self, address, score, accuracy, reward='1'):
+        contract = self.ai_rewards_contract
+        contract.ai_scores[address] = score
+        contract.validation_history.setdefault(address, []).append(
+            {"validation_result": {"accuracy": accuracy}, "reward": Decimal(reward)}
+        )
+        self.transactions[f"tx{len(self.transactions)}"] = Transaction('ai_validation', address)
+
+
+def test_sorted_chunks_match_a_sorted_list():
+    rng = random.Random(7)
+    chunks = _SortedChunks(range(0, 100, 3), load=4)
+    expected = sorted(range(0, 100, 3))
+    for _ in range(300):
+        if expected and rng.random() < 0.4:
+            key = rng.choice(expected)
+            expected.remove(key)
+            chunks.remove(key)
+        else:
+            key = rng.randrange(200)
+            expected.append(key)
+            expected.sort()
+            chunks.add(key)
+    probe = rng.randrange(200)
+    assert chunks.slice(0, len(expected)) == expected and len(chunks) == len(expected)
+    assert chunks.slice(5, 17) == expected[5:17]
+    assert chunks.bisect_left(probe) == sum(key < probe for key in expected)
+
+
+def test_validators_are_ranked_as_scores_move():
+    tokenomics = Tokenomics({'NXa': 80.0, 'NXb': 60.0, 'NXc': 60.0, 'NXd': 10.0})
+    leaderboard = ValidatorLeaderboard(tokenomics)
+    assert [v["address"] for v in leaderboard.page(1, 10)] == ['NXa', 'NXb', 'NXc', 'NXd']
+    assert leaderboard.average_score() == 52.5
+
+    tokenomics.validate('NXd', 95.0, 0.9)
+    first = leaderboard.validator('NXd')
+    assert (first["position"], first["rank"], first["percentile"]) == (1, 'Top 25%', 87.5)
+    # Ties share a position and sit in the middle of their percentile band
+    tied = leaderboard.validator('NXc')
+    assert tied["position"] == 3 and tied["percentile"] == 25.0
+    assert [v["address"] for v in leaderboard.page(2, 2)] == ['NXb', 'NXc']
+
+
+def test_history_keeps_the_latest_validations_even_when_read_late():
+    tokenomics = Tokenomics()
+    leaderboard = ValidatorLeaderboard(tokenomics, history_size=2)
+    tokenomics.validate('NXa', 55.0, 0.2, '0.5')
+    assert leaderboard.validator('NXa')["total_validations"] == 1
+
+    # Two validations land before the next sync
+    tokenomics.validate('NXa', 60.0, 0.6, '0.25')
+    tokenomics.validate('NXa', 70.0, 1.0, '0.25')
+    stats = leaderboard.validator('NXa')
+    assert stats["total_validations"] == 3 and stats["total_rewards"] == "1"
+    assert stats["recent_accuracy"] == 0.8 and len(stats["validation_history"]) == 2
+    assert stats["ai_score"] == 70.0 and leaderboard.count() == 1
@@ -0,0 +1,70 @@
+import io
+import json
+
+from flask import Flask, Response, request
+
+from src.services.wsgi import build_environ, run_wsgi
+
+
+def scope(path, query=b'', headers=()):
+    return {
+        'type': 'http', 'method': 'POST', 'path': path, 'query_string': query, 'root_path': '',
+        'headers': list(headers), 'server': ('api.local', 8080), 'client': ('10.0.0.1', 5000),
+        'scheme': 'https', 'http_version': '1.1'
+    }
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/echo', methods=['POST'])
+    def echo():
+        return {
+            "args": request.args.to_dict(),
+            "body": request.get_json(),
+            "forwarded": request.headers.get('X-Forwarded-For'),
+            "remote": request.remote_addr,
+            "url": request.url
+        }
+
+    @app.route('/stream', methods=['POST'])
+    def stream():
+        return Response(iter([b'a\n', b'', b'b\n']), mimetype='application/x-ndjson')
+
+    return app
+
+
+def call(app, asgi_scope, body=b''):
+    messages = []
+    run_wsgi(app, build_environ(asgi_scope, io.BytesIO(body)), messages.append)
+    return messages
+
+
+def test_requests_reach_the_app_as_wsgi_would_pass_them():
+    messages = call(make_app(), scope('/echo', b'x=1', [
+        (b'content-type', b'application/json'), (b'content-length', b'8'),
+        (b'x-forwarded-for', b'1.1.1.1'), (b'x-forwarded-for', b'2.2.2.2')
+    ]), b'{"a": 1}')
+
+    start, *body = messages
+    assert start['type'] == 'http.response.start' and start['status'] == 200
+    assert (b'content-type', b'application/json') in start['headers']
+    assert body[-1] == {'type': 'http.response.body'}
+    assert json.loads(b''.join(message.get('body', b'') for message in body)) == {
+        "args": {"x": "1"},
+        "body": {"a": 1},
+        "forwarded": "1.1.1.1,2.2.2.2",
+        "remote": "10.0.0.1",
+        "url": "https://api.local:8080/echo?x=1"
+    }
+
+
+def test_streamed_responses_are_sent_chunk_by_chunk():
+    messages = call(make_app(), scope('/stream'))
+    assert [message.get('body') for message in messages[1:]] == [b'a\n', b'b\n', None]
+    assert messages[1]['more_body'] and 'more_body' not in messages[-1]
+
+
+def test_errors_keep_their_status():
+    start = call(make_app(), scope('/missing'))[0]
+    assert start['status'] == 404